@@ -1,7 +1,8 @@
-from sqlalchemy import create_engine, Column, String, DateTime, Text, Index, Integer, text, event
+from sqlalchemy import create_engine, Column, String, DateTime, Text, Index, Integer, Float, text, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import datetime
+import hashlib
 import os
 import json
 from pathlib import Path
@@ -38,6 +39,36 @@ class ProjectModel(Base):
     updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
     meta_json = Column(Text, nullable=True)
+    # Copies of frequently listed meta fields, kept in sync by meta_store
+    duration = Column(String, nullable=True)
+    thumbnail = Column(String, nullable=True)
+    final_video = Column(String, nullable=True)
+    final_duration = Column(Float, nullable=True)
+    language = Column(String, nullable=True)
+    narrator_gender = Column(String, nullable=True)
+
+    __table_args__ = (
+        Index("ix_projects_status_updated_at", "status", "updated_at"),
+        Index("ix_projects_subreddit_updated_at", "subreddit", "updated_at"),
+    )
+
+# meta key -> projects column holding a copy of it
+META_COLUMNS = {
+    "duration": "duration",
+    "thumbnail": "thumbnail",
+    "final_video": "final_video",
+    "final_duration": "final_duration",
+    "global_language": "language",
+    "narrator_gender": "narrator_gender"
+}
+
+def meta_column_value(value):
+    if value is None or isinstance(value, (str, int, float)):
+        return value
+    return json.dumps(value)
+
+def meta_column_values(meta: dict) -> dict:
+    return {column: meta_column_value(meta.get(key)) for key, column in META_COLUMNS.items()}
 
 class AssetModel(Base):
     __tablename__ = "assets"
@@ -50,6 +81,60 @@ class AssetModel(Base):
     url = Column(String)
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
 
+class MediaProbeModel(Base):
+    __tablename__ = "media_probes"
+
+    id = Column(String, primary_key=True, index=True) # absolute path
+    size = Column(Integer)
+    mtime = Column(Float)
+    duration = Column(Float, nullable=True)
+    width = Column(Integer, nullable=True)
+    height = Column(Integer, nullable=True)
+    fps = Column(Float, nullable=True)
+    video_codec = Column(String, nullable=True)
+    audio_codec = Column(String, nullable=True)
+    audio_channels = Column(Integer, nullable=True)
+    audio_sample_rate = Column(Integer, nullable=True)
+    probed_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+class FileDigestModel(Base):
+    __tablename__ = "file_digests"
+
+    id = Column(String, primary_key=True, index=True) # absolute path
+    size = Column(Integer)
+    mtime = Column(Float)
+    digest = Column(String)
+    hashed_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+class TranslationCacheModel(Base):
+    __tablename__ = "translation_cache"
+
+    id = Column(String, primary_key=True, index=True) # sha256 of model/prompt version/source/title
+    model = Column(String, index=True)
+    prompt_version = Column(String, index=True)
+    source_hash = Column(String)
+    title = Column(Text, nullable=True)
+    translation_es = Column(Text)
+    title_es = Column(Text, nullable=True)
+    narrator_gender = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+class FeedStateModel(Base):
+    __tablename__ = "feed_states"
+
+    id = Column(String, primary_key=True, index=True) # feed url
+    etag = Column(String, nullable=True)
+    last_modified = Column(String, nullable=True)
+    checked_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+class ProjectSyncModel(Base):
+    __tablename__ = "project_sync"
+
+    id = Column(String, primary_key=True, index=True) # project folder name
+    dir_mtime = Column(Float)
+    meta_mtime = Column(Float)
+    meta_hash = Column(String, nullable=True)
+
 class AssetCategoryModel(Base):
     __tablename__ = "asset_categories"
 
@@ -119,12 +204,42 @@ def ensure_project_columns():
             existing = {row[1] for row in result.fetchall()}
             if "author" not in existing:
                 conn.execute(text("ALTER TABLE projects ADD COLUMN author TEXT"))
+            added = []
+            for column in META_COLUMNS.values():
+                if column not in existing:
+                    column_type = "REAL" if column == "final_duration" else "TEXT"
+                    conn.execute(text(f"ALTER TABLE projects ADD COLUMN {column} {column_type}"))
+                    added.append(column)
+            if added:
+                # Backfill the new columns from the meta already stored
+                assignments = ", ".join(
+                    f"{column} = json_extract(meta_json, '$.{key}')"
+                    for key, column in META_COLUMNS.items() if column in added
+                )
+                conn.execute(text(f"UPDATE projects SET {assignments} WHERE json_valid(meta_json)"))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_projects_status_updated_at ON projects (status, updated_at)"))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_projects_subreddit_updated_at ON projects (subreddit, updated_at)"))
             conn.commit()
     except Exception as e:
         print(f"Schema migration warning: {e}")
 
 ensure_project_columns()
 
+def ensure_list_indexes():
+    # Keyset pagination walks these newest first
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("DROP INDEX IF EXISTS ix_projects_updated_at_id"))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_projects_created_at_id ON projects (created_at, id)"))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_assets_created_at_id ON assets (created_at, id)"))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_jobs_created_at_id ON jobs (created_at, id)"))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_templates_created_at_id ON templates (created_at, id)"))
+            conn.commit()
+    except Exception as e:
+        print(f"Schema migration warning: {e}")
+
+ensure_list_indexes()
+
 def get_db():
     db = SessionLocal()
     try:
@@ -132,82 +247,181 @@ def get_db():
     finally:
         db.close()
 
+# Progress of the last sync_projects_to_db run, reported by /health
+SYNC_STATUS = {
+    "state": "idle",
+    "total": 0,
+    "processed": 0,
+    "skipped": 0,
+    "created": 0,
+    "updated": 0,
+    "started_at": None,
+    "finished_at": None,
+    "error": None
+}
+SYNC_COMMIT_EVERY = 500
+
+def _project_fingerprint(d: Path):
+    """(dir mtime, meta.json mtime) without reading anything."""
+    meta_path = d / "meta.json"
+    journal_path = d / "meta.journal"
+    meta_mtime = max(
+        meta_path.stat().st_mtime if meta_path.exists() else 0.0,
+        journal_path.stat().st_mtime if journal_path.exists() else 0.0
+    )
+    return d.stat().st_mtime, meta_mtime
+
 def sync_projects_to_db():
+    """
+    Brings the projects table in line with the project folders. Folders
+    whose mtimes and meta hash match the sync manifest (project_sync) are
+    skipped, so a restart only reads the projects that changed.
+    """
+    # meta_store imports this module
+    from .services.meta_store import invalidate_meta, read_meta_file
+
     print("Syncing existing projects to database...")
+    SYNC_STATUS.update({
+        "state": "running", "total": 0, "processed": 0, "skipped": 0, "created": 0, "updated": 0,
+        "started_at": datetime.datetime.utcnow().isoformat(), "finished_at": None, "error": None
+    })
     db = SessionLocal()
     try:
         if not PROJECTS_ROOT.exists():
+            SYNC_STATUS["state"] = "done"
             return
-            
-        for d in PROJECTS_ROOT.iterdir():
-            if not d.is_dir():
+
+        dirs = [d for d in PROJECTS_ROOT.iterdir() if d.is_dir()]
+        SYNC_STATUS["total"] = len(dirs)
+        manifest = {row.id: row for row in db.query(ProjectSyncModel).all()}
+
+        changed = []
+        for d in dirs:
+            try:
+                dir_mtime, meta_mtime = _project_fingerprint(d)
+            except OSError as e:
+                # Removed or unreadable since the listing; the next sync retries it
+                print(f"Skipping project folder {d.name}: {e}")
+                SYNC_STATUS["skipped"] += 1
+                SYNC_STATUS["processed"] += 1
                 continue
-                
-            project_id = d.name
-            existing = db.query(ProjectModel).filter(ProjectModel.id == project_id).first()
-                
-            meta_path = d / "meta.json"
-            title = project_id
-            subreddit = "Unknown"
-            status = "Success"
-            stage = "Text Scrapped"
-            updated_at = datetime.datetime.fromtimestamp(d.stat().st_mtime)
-            
-            meta = {}
-            if meta_path.exists():
-                try:
-                    meta = json.loads(meta_path.read_text())
-                    title = meta.get("title", title)
-                    author = meta.get("author")
-                    subreddit = meta.get("subreddit", subreddit)
-                    status = meta.get("status", "Success")
-                    stage = meta.get("currentStage", stage)
-                except:
-                    meta = {}
-                    author = None
-            else:
-                author = None
-            
-            if existing:
-                if meta:
-                    if existing.meta_json:
-                        try:
-                            existing_meta = json.loads(existing.meta_json)
-                        except Exception:
-                            existing_meta = {}
-                        for key, value in meta.items():
-                            if key not in existing_meta:
-                                existing_meta[key] = value
-                        existing.meta_json = json.dumps(existing_meta)
-                    else:
-                        existing.meta_json = json.dumps(meta)
-                if existing.title != title:
-                    existing.title = title
-                if author and existing.author != author:
-                    existing.author = author
-                if existing.subreddit != subreddit:
-                    existing.subreddit = subreddit
-                if existing.status != status:
-                    existing.status = status
-                if existing.current_stage != stage:
-                    existing.current_stage = stage
+            state = manifest.get(d.name)
+            if state and state.dir_mtime == dir_mtime and state.meta_mtime == meta_mtime:
+                SYNC_STATUS["skipped"] += 1
+                SYNC_STATUS["processed"] += 1
                 continue
-            
-            new_project = ProjectModel(
-                id=project_id,
-                title=title,
-                author=author,
-                subreddit=subreddit,
-                status=status,
-                current_stage=stage,
-                updated_at=updated_at,
-                meta_json=json.dumps(meta) if meta else None
-            )
-            db.add(new_project)
-        
-        db.commit()
-        print("Sync complete.")
+            changed.append((d, dir_mtime, meta_mtime))
+
+        for start in range(0, len(changed), SYNC_COMMIT_EVERY):
+            batch = changed[start:start + SYNC_COMMIT_EVERY]
+            rows = {
+                p.id: p for p in db.query(ProjectModel).filter(ProjectModel.id.in_([d.name for d, _, _ in batch]))
+            }
+            merges = []
+            for d, dir_mtime, meta_mtime in batch:
+                _sync_project(db, d, dir_mtime, meta_mtime, rows.get(d.name), manifest.get(d.name), read_meta_file, merges)
+                SYNC_STATUS["processed"] += 1
+            # Applied last so the write lock is only held for the commit
+            _merge_file_metas(db, merges)
+            db.commit()
+            for d, _, _ in batch:
+                invalidate_meta(d.name)
+
+        SYNC_STATUS["state"] = "done"
+        print(f"Sync complete: {len(changed)} changed, {SYNC_STATUS['skipped']} unchanged.")
     except Exception as e:
+        SYNC_STATUS.update({"state": "error", "error": str(e)})
         print(f"Sync error: {e}")
     finally:
+        SYNC_STATUS["finished_at"] = datetime.datetime.utcnow().isoformat()
         db.close()
+
+def _merge_file_metas(db, merges):
+    """
+    Adds the meta.json keys missing from the stored meta. Done with
+    json_insert in one UPDATE per project, so keys the pipeline patched in
+    meanwhile are neither reverted nor lost; the promoted columns are then
+    refreshed from the merged meta.
+    """
+    refresh = ", ".join(f"{column} = json_extract(meta_json, '$.\"{key}\"')" for key, column in META_COLUMNS.items())
+    for project_id, meta in merges:
+        params = {"id": project_id, "file_meta": json.dumps(meta)}
+        expr = "meta_json"
+        items = list(meta.items())
+        # Stays under SQLite's function argument limit
+        for start in range(0, len(items), 50):
+            args = []
+            for idx, (key, value) in enumerate(items[start:start + 50], start):
+                params[f"k{idx}"] = '$."' + key.replace('"', '\\"') + '"'
+                params[f"v{idx}"] = json.dumps(value)
+                args.append(f":k{idx}, json(:v{idx})")
+            expr = f"json_insert({expr}, {', '.join(args)})"
+        db.execute(text(
+            f"UPDATE projects SET meta_json = CASE WHEN json_valid(meta_json) THEN {expr} ELSE json(:file_meta) END "
+            "WHERE id = :id"
+        ), params)
+        db.execute(text(f"UPDATE projects SET {refresh} WHERE id = :id AND json_valid(meta_json)"), {"id": project_id})
+
+def _sync_project(db, d: Path, dir_mtime: float, meta_mtime: float, existing, state, read_meta_file, merges: list):
+    project_id = d.name
+    title = project_id
+    subreddit = "Unknown"
+    status = "Success"
+    stage = "Text Scrapped"
+    updated_at = datetime.datetime.fromtimestamp(dir_mtime)
+
+    meta = {}
+    meta_hash = None
+    author = None
+    if meta_mtime:
+        try:
+            meta = read_meta_file(d)
+            meta_hash = hashlib.sha256(json.dumps(meta, sort_keys=True).encode("utf-8")).hexdigest()
+            title = meta.get("title", title)
+            author = meta.get("author")
+            subreddit = meta.get("subreddit", subreddit)
+            status = meta.get("status", "Success")
+            stage = meta.get("currentStage", stage)
+        except Exception:
+            meta = {}
+            author = None
+
+    if state is None:
+        state = ProjectSyncModel(id=project_id)
+        db.add(state)
+    unchanged_meta = existing is not None and meta_hash is not None and state.meta_hash == meta_hash
+    state.dir_mtime = dir_mtime
+    state.meta_mtime = meta_mtime
+    state.meta_hash = meta_hash
+    if unchanged_meta:
+        # Only the folder was touched (renders, audio...)
+        SYNC_STATUS["skipped"] += 1
+        return
+
+    if existing:
+        if meta:
+            merges.append((project_id, meta))
+        if existing.title != title:
+            existing.title = title
+        if author and existing.author != author:
+            existing.author = author
+        if existing.subreddit != subreddit:
+            existing.subreddit = subreddit
+        # status/current_stage are owned by the pipeline once the row exists;
+        # a stale meta.json must not reset a project that is running now
+        SYNC_STATUS["updated"] += 1
+        return
+
+    new_project = ProjectModel(
+        id=project_id,
+        title=title,
+        author=author,
+        subreddit=subreddit,
+        status=status,
+        current_stage=stage,
+        updated_at=updated_at,
+        meta_json=json.dumps(meta) if meta else None,
+        **meta_column_values(meta)
+    )
+    db.add(new_project)
+    SYNC_STATUS["created"] += 1
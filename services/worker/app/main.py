@@ -4,8 +4,7 @@ import json
 import asyncio
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, List, Dict, Any
-import httpx
+from typing import Optional, List, Dict, Any, Tuple
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Header, HTTPException, Depends, BackgroundTasks, Query, Request, UploadFile, File, Form
@@ -13,15 +12,23 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse, StreamingResponse, Response
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
+from sqlalchemy import text
 from sqlalchemy.orm import Session
 
 # Local imports
 # Local imports
-from .database import engine, Base, ProjectModel, AssetModel, AssetCategoryModel, TemplateModel, WorkflowModel, JobModel, SessionLocal, get_db, sync_projects_to_db
+from .database import engine, Base, ProjectModel, AssetModel, AssetCategoryModel, TemplateModel, WorkflowModel, JobModel, SessionLocal, get_db, sync_projects_to_db, SYNC_STATUS
 from .services.harvester import harvest_from_reddit, HarvesterService
-from .services.pipeline import execute_stage, execute_remaining_stages, STAGE_SEQUENCE
-from .services.meta_store import update_meta
+from .services.pipeline import execute_remaining_stages, schedule_stage, scheduler, STAGE_SEQUENCE, PRIORITY_HIGH, PRIORITY_LOW
+from .services.meta_store import compact_meta_journals, invalidate_meta, update_meta
+from .services.media_probe import get_media_duration, probe_media, prewarm_probes, is_probeable
+from .services.proxy_cache import wants_proxy, schedule_proxy_builds
+from .services.translation_batch import resume_translation_batches, schedule_translation_batch
+from .services.clients import clients
+from .services.translation_cache import invalidate_translations
+from .nodes.translation import TRANSLATION_PROMPT_VERSION
 from .services.log_store import read_logs
+from .services.listing import MAX_PAGE_SIZE, list_response, paginate, parse_fields, serialize
 from .workflows.registry import get_default_workflows
 from .services.template_service import generate_preview_for_project, render_preview_bytes
 from .broadcaster import broadcaster
@@ -70,23 +77,6 @@ def _parse_srt_time(value: str) -> Optional[float]:
         return None
 
 
-async def _get_media_duration(path: Path) -> Optional[float]:
-    try:
-        proc = await asyncio.create_subprocess_exec(
-            "ffprobe", "-v", "error",
-            "-show_entries", "format=duration",
-            "-of", "default=noprint_wrappers=1:nokey=1",
-            str(path),
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE
-        )
-        stdout, _ = await proc.communicate()
-        if proc.returncode == 0:
-            return float(stdout.decode().strip())
-    except:
-        return None
-    return None
-
 def _build_short_segments(starts: List[float], total_duration: float, count: int, segment_length: float) -> List[tuple]:
     segments: List[tuple] = []
     if total_duration <= 0:
@@ -123,7 +113,7 @@ async def _generate_shorts_task(project_id: str, count: int, segment_length: flo
         await broadcaster.broadcast("log", {"level": "error", "message": "Shorts failed: final video not found", "project_id": project_id})
         return
 
-    total_duration = await _get_media_duration(final_path)
+    total_duration = await get_media_duration(final_path)
     if not total_duration:
         await broadcaster.broadcast("log", {"level": "error", "message": "Shorts failed: unable to read video duration", "project_id": project_id})
         return
@@ -229,7 +219,7 @@ def _schedule_datetime_for_day(day: datetime, schedule_hm: tuple) -> datetime:
     return day.replace(hour=sched_h, minute=sched_m, second=0, microsecond=0)
 
 def _should_run_job(job: JobModel, now: datetime) -> bool:
-    if job.status == "Running":
+    if job.status in ("Running", "Queued"):
         return False
 
     interval = (job.schedule_interval or "once").lower()
@@ -263,6 +253,20 @@ def _should_run_job(job: JobModel, now: datetime) -> bool:
 
     return False
 
+def _queue_job(job: JobModel, priority: int = PRIORITY_LOW):
+    job.status = "Queued"
+    job_id = job.id
+    scheduler.schedule("io", lambda: execute_job_task(job_id), f"job:{job_id}", priority)
+
+def _requeue_interrupted_jobs():
+    db = SessionLocal()
+    try:
+        for job in db.query(JobModel).filter(JobModel.status == "Queued").all():
+            job.status = "Pending"
+        db.commit()
+    finally:
+        db.close()
+
 async def scheduler_loop():
     print(">>> SCHEDULER: Starting periodic check loop...")
     while True:
@@ -275,7 +279,8 @@ async def scheduler_loop():
             for job in jobs:
                 if _should_run_job(job, now):
                     print(f">>> SCHEDULER: Triggering job {job.id} ({job.schedule_interval})")
-                    asyncio.create_task(execute_job_task(job.id))
+                    _queue_job(job)
+            db.commit()
             
             db.close()
         except Exception as e:
@@ -285,12 +290,21 @@ async def scheduler_loop():
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    sync_projects_to_db()
-    sync_assets_to_db()
+    # Runs in a thread while the API is already serving; see /health
+    project_sync = asyncio.create_task(asyncio.to_thread(sync_projects_to_db))
+    proxy_sources, probe_sources = sync_assets_to_db()
+    # ffprobe of new/changed assets also runs in a thread after startup
+    probe_prewarm = asyncio.create_task(asyncio.to_thread(prewarm_probes, probe_sources))
     sync_workflows_to_db()
+    _requeue_interrupted_jobs()
+    schedule_proxy_builds(proxy_sources)
     
-    # Start scheduler
+    # Shared HTTP/OpenAI clients, stage worker pools and scheduler
+    await clients.start()
+    scheduler.start()
     scheduler_task = asyncio.create_task(scheduler_loop())
+    # Batches submitted before a restart are still being worked on by OpenAI
+    resume_translation_batches()
     
     yield
     
@@ -298,6 +312,13 @@ async def lifespan(app: FastAPI):
     scheduler_task.cancel()
     try: await scheduler_task
     except asyncio.CancelledError: pass
+    if not project_sync.done():
+        print("Shutting down before the project sync finished; it resumes from its manifest on next start")
+    if not probe_prewarm.done():
+        print("Shutting down before media probes finished; remaining assets are probed on first use")
+    await scheduler.stop()
+    await clients.stop()
+    compact_meta_journals()
 
 app = FastAPI(title="FrameForge Worker API", lifespan=lifespan)
 
@@ -307,6 +328,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
 # --- Static Files ---
@@ -370,7 +392,36 @@ def auth(x_worker_token: str = Header(default=""), token: str = Query(default=""
 # --- Endpoints ---
 @app.get("/health")
 def health():
-    return {"ok": True, "timestamp": datetime.now().isoformat()}
+    return {"ok": True, "timestamp": datetime.now().isoformat(), "project_sync": dict(SYNC_STATUS)}
+
+@app.get("/queue")
+def get_queue(deps = Depends(auth)):
+    return scheduler.snapshot()
+
+@app.get("/metrics/clients")
+def get_client_metrics(deps = Depends(auth)):
+    return clients.snapshot()
+
+@app.delete("/translations/cache")
+def clear_translation_cache(
+    model: Optional[str] = None,
+    prompt_version: Optional[str] = None,
+    stale_only: bool = False,
+    deps = Depends(auth)
+):
+    """
+    Invalidates cached translations by model and/or prompt version.
+    stale_only drops everything not made with the current prompt.
+    """
+    keep_version = TRANSLATION_PROMPT_VERSION if stale_only else None
+    removed = invalidate_translations(model, prompt_version, keep_version)
+    return {"status": "ok", "removed": removed, "current_prompt_version": TRANSLATION_PROMPT_VERSION}
+
+@app.post("/translations/batch")
+async def translate_pending_batch(deps = Depends(auth)):
+    """Submits every project still waiting for translation as one OpenAI batch."""
+    schedule_translation_batch()
+    return {"status": "started"}
 
 @app.get("/config/global")
 def get_config_global(deps = Depends(auth)):
@@ -426,36 +477,70 @@ async def trigger_n8n(deps = Depends(auth)):
         raise HTTPException(status_code=400, detail="n8n Webhook URL not configured")
 
     internal_url = webhook_url.replace("localhost", "n8n").replace("127.0.0.1", "n8n")
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        try:
-            resp = await client.post(internal_url, json={"trigger": "dashboard"})
-            if resp.status_code < 400: return {"ok": True, "n8n_response": resp.text}
-        except: pass
-        
-        try:
-            resp = await client.post(webhook_url, json={"trigger": "dashboard"})
-            if resp.status_code < 400: return {"ok": True, "n8n_response": resp.text}
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"n8n trigger failed: {str(e)}")
+    try:
+        resp = await clients.request("POST", internal_url, json={"trigger": "dashboard"}, timeout=10.0)
+        if resp.status_code < 400: return {"ok": True, "n8n_response": resp.text}
+    except: pass
+
+    try:
+        resp = await clients.request("POST", webhook_url, json={"trigger": "dashboard"}, timeout=10.0)
+        if resp.status_code < 400: return {"ok": True, "n8n_response": resp.text}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"n8n trigger failed: {str(e)}")
 
 @app.post("/projects/harvest")
-def harvest_projects(db: Session = Depends(get_db), deps = Depends(auth)):
+async def harvest_projects(db: Session = Depends(get_db), deps = Depends(auth)):
     config = get_config_global(deps)
-    harvested = harvest_from_reddit(db, config)
+    harvested = await harvest_from_reddit(db, config)
     return {"status": "ok", "harvested_count": len(harvested), "projects": harvested}
 
+PROJECT_FIELDS = {
+    "id": lambda p: p.id,
+    "name": lambda p: p.title,
+    "category": lambda p: p.subreddit,
+    "status": lambda p: p.status,
+    "currentStage": lambda p: p.current_stage,
+    "duration": lambda p: p.duration,
+    "thumbnail": lambda p: p.thumbnail,
+    "updatedAt": lambda p: p.updated_at.isoformat() if p.updated_at else None,
+    "createdAt": lambda p: p.created_at.isoformat() if p.created_at else None
+}
+
 @app.get("/projects")
-def list_projects(db: Session = Depends(get_db), deps = Depends(auth)):
-    results = db.query(ProjectModel).order_by(ProjectModel.updated_at.desc()).all()
-    return [{
-        "id": p.id, 
-        "name": p.title, 
-        "category": p.subreddit,
-        "status": p.status,
-        "currentStage": p.current_stage,
-        "duration": _parse_meta_json(p.meta_json).get("duration"),
-        "thumbnail": _parse_meta_json(p.meta_json).get("thumbnail")
-    } for p in results]
+def list_projects(
+    request: Request,
+    status: Optional[str] = None,
+    stage: Optional[str] = None,
+    subreddit: Optional[str] = None,
+    updated_after: Optional[datetime] = None,
+    updated_before: Optional[datetime] = None,
+    fields: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+    deps = Depends(auth)
+):
+    # Only the listed columns; meta_json is never loaded here
+    query = db.query(
+        ProjectModel.id,
+        ProjectModel.title,
+        ProjectModel.subreddit,
+        ProjectModel.status,
+        ProjectModel.current_stage,
+        ProjectModel.duration,
+        ProjectModel.thumbnail,
+        ProjectModel.updated_at,
+        ProjectModel.created_at
+    )
+    if status: query = query.filter(ProjectModel.status == status)
+    if stage: query = query.filter(ProjectModel.current_stage == stage)
+    if subreddit: query = query.filter(ProjectModel.subreddit == subreddit)
+    if updated_after: query = query.filter(ProjectModel.updated_at >= updated_after)
+    if updated_before: query = query.filter(ProjectModel.updated_at < updated_before)
+    # Paged on created_at: updated_at moves while the pipeline runs, which
+    # would make rows skip or repeat between pages
+    rows, next_cursor = paginate(query, (ProjectModel.created_at, ProjectModel.id), limit, cursor)
+    return list_response(request, serialize(rows, parse_fields(fields, list(PROJECT_FIELDS)), PROJECT_FIELDS), next_cursor)
 
 @app.get("/projects/{project_id}")
 def get_project(project_id: str, db: Session = Depends(get_db), deps = Depends(auth)):
@@ -500,10 +585,8 @@ def update_project_meta(project_id: str, new_meta: Dict[str, Any], db: Session =
     if "author" in new_meta: project.author = new_meta["author"]
     if "status" in new_meta: project.status = new_meta["status"]
     if "currentStage" in new_meta: project.current_stage = new_meta["currentStage"]
-    existing_meta = _parse_meta_json(project.meta_json)
-    existing_meta.update(new_meta)
-    project.meta_json = json.dumps(existing_meta)
     db.commit()
+    update_meta(project_id, new_meta, PROJECTS_ROOT / project_id)
     return {"status": "ok"}
 
 @app.post("/projects/{project_id}/preview")
@@ -542,6 +625,7 @@ def delete_project(project_id: str, complete: bool = False, db: Session = Depend
         
         db.delete(project)
         db.commit()
+        invalidate_meta(project_id)
         return {"status": "deleted", "complete": True}
     else:
         # Cancel: mark as cancelled, keep folder
@@ -554,7 +638,7 @@ def delete_project(project_id: str, complete: bool = False, db: Session = Depend
         return {"status": "cancelled", "complete": False}
 
 @app.post("/projects/{project_id}/run-next-stage")
-async def run_stage(project_id: str, background_tasks: BackgroundTasks, db: Session = Depends(get_db), deps = Depends(auth)):
+async def run_stage(project_id: str, db: Session = Depends(get_db), deps = Depends(auth)):
     project = db.query(ProjectModel).filter(ProjectModel.id == project_id).first()
     if not project: raise HTTPException(status_code=404, detail="Project not found")
     
@@ -569,11 +653,11 @@ async def run_stage(project_id: str, background_tasks: BackgroundTasks, db: Sess
     project.status = "Processing"
     db.commit()
     
-    background_tasks.add_task(execute_stage, project_id, next_stage)
+    schedule_stage(project_id, next_stage, PRIORITY_HIGH)
     return {"status": "started", "stage": next_stage}
 
 @app.post("/projects/{project_id}/export")
-async def export_final(project_id: str, background_tasks: BackgroundTasks, db: Session = Depends(get_db), deps = Depends(auth)):
+async def export_final(project_id: str, db: Session = Depends(get_db), deps = Depends(auth)):
     project = db.query(ProjectModel).filter(ProjectModel.id == project_id).first()
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
@@ -614,11 +698,11 @@ async def export_final(project_id: str, background_tasks: BackgroundTasks, db: S
 
     update_meta(project_id, {"status": "Processing", "currentStage": "Master Composition"}, PROJECTS_ROOT / project_id)
     await broadcaster.broadcast("status_update", {"id": project_id, "status": "Processing", "currentStage": "Master Composition"})
-    background_tasks.add_task(execute_stage, project_id, "Master Composition")
+    schedule_stage(project_id, "Master Composition", PRIORITY_HIGH)
     return {"status": "started", "stage": "Master Composition"}
 
 @app.post("/projects/{project_id}/retry-stage")
-async def retry_stage(project_id: str, background_tasks: BackgroundTasks, db: Session = Depends(get_db), deps = Depends(auth)):
+async def retry_stage(project_id: str, db: Session = Depends(get_db), deps = Depends(auth)):
     project = db.query(ProjectModel).filter(ProjectModel.id == project_id).first()
     if not project: raise HTTPException(status_code=404, detail="Project not found")
     
@@ -638,7 +722,7 @@ async def retry_stage(project_id: str, background_tasks: BackgroundTasks, db: Se
     project.status = "Processing"
     db.commit()
     
-    background_tasks.add_task(execute_stage, project_id, next_stage)
+    schedule_stage(project_id, next_stage, PRIORITY_HIGH)
     return {"status": "retrying", "stage": next_stage}
 
 @app.post("/projects/{project_id}/run-automatically")
@@ -663,7 +747,7 @@ async def run_automatically(project_id: str, background_tasks: BackgroundTasks,
     update_meta(project_id, {"status": "Processing"}, PROJECTS_ROOT / project_id)
 
     await broadcaster.broadcast("status_update", {"id": project_id, "status": "Processing", "currentStage": project.current_stage})
-    background_tasks.add_task(execute_remaining_stages, project_id)
+    background_tasks.add_task(execute_remaining_stages, project_id, PRIORITY_HIGH)
     return {"status": "started"}
 
 @app.post("/projects/{project_id}/cleanup")
@@ -717,13 +801,19 @@ def cleanup_project(project_id: str, deps = Depends(auth)):
         "deleted_files": deleted_files
     }
 
-def sync_assets_to_db():
+def sync_assets_to_db() -> Tuple[List[Path], List[Path]]:
+    """
+    Syncs asset files into the DB and returns the background clips that
+    should get pre-normalized proxies and the media files to probe.
+    """
     print("Syncing assets to database...")
     db = SessionLocal()
+    proxy_sources: List[Path] = []
+    probe_sources: List[Path] = []
     try:
         if not ASSETS_ROOT.exists():
             ASSETS_ROOT.mkdir(parents=True, exist_ok=True)
-            return
+            return proxy_sources, probe_sources
             
         default_categories = ["backgrounds", "intros", "endings", "music", "sfx", "templates", "uncategorized"]
         for cat in default_categories:
@@ -768,12 +858,17 @@ def sync_assets_to_db():
                     url_value = f"/assets_static/{clean_path}"
                     if existing.url != url_value:
                         existing.url = url_value
+                if is_probeable(f_path):
+                    probe_sources.append(f_path)
+                if wants_proxy(f_path, category):
+                    proxy_sources.append(f_path)
         db.commit()
         print("Asset sync complete.")
     except Exception as e:
         print(f"Asset sync error: {e}")
     finally:
         db.close()
+    return proxy_sources, probe_sources
 
 class AssetCategoryRequest(BaseModel):
     id: str
@@ -812,21 +907,39 @@ class TemplatePreviewRequest(BaseModel):
     field_values: Optional[Dict[str, str]] = None
     preview_aspect: Optional[str] = "16:9"
 
+ASSET_FIELDS = {
+    "name": lambda a: a.name,
+    "path": lambda a: a.id,
+    "categories": lambda a: json.loads(a.categories or "[]"),
+    "size": lambda a: int(a.size or 0),
+    "created_at": lambda a: a.created_at.isoformat() if a.created_at else None,
+    "type": lambda a: a.file_type,
+    "url": lambda a: a.url
+}
+
 @app.get("/assets")
-def list_assets(db: Session = Depends(get_db), deps = Depends(auth)):
-    results = db.query(AssetModel).all()
-    assets = []
-    for p in results:
-        assets.append({
-            "name": p.name,
-            "path": p.id,
-            "categories": json.loads(p.categories or "[]"),
-            "size": int(p.size or 0),
-            "created_at": p.created_at.isoformat(),
-            "type": p.file_type,
-            "url": p.url
-        })
-    return assets
+def list_assets(
+    request: Request,
+    category: Optional[str] = None,
+    file_type: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    fields: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+    deps = Depends(auth)
+):
+    query = db.query(AssetModel)
+    if category:
+        query = query.filter(text(
+            "EXISTS (SELECT 1 FROM json_each(assets.categories) WHERE json_each.value = :category)"
+        ).bindparams(category=category))
+    if file_type: query = query.filter(AssetModel.file_type == file_type)
+    if created_after: query = query.filter(AssetModel.created_at >= created_after)
+    if created_before: query = query.filter(AssetModel.created_at < created_before)
+    rows, next_cursor = paginate(query, (AssetModel.created_at, AssetModel.id), limit, cursor)
+    return list_response(request, serialize(rows, parse_fields(fields, list(ASSET_FIELDS)), ASSET_FIELDS), next_cursor)
 
 @app.get("/asset-categories")
 def list_asset_categories(db: Session = Depends(get_db), deps = Depends(auth)):
@@ -846,16 +959,30 @@ def create_asset_category(body: AssetCategoryRequest, db: Session = Depends(get_
     db.commit()
     return {"status": "created", "id": clean}
 
+TEMPLATE_FIELDS = {
+    "id": lambda t: t.id,
+    "name": lambda t: t.name,
+    "image_path": lambda t: t.image_path,
+    "fields": lambda t: json.loads(t.fields_json or "[]"),
+    "created_at": lambda t: t.created_at.isoformat() if t.created_at else None
+}
+
 @app.get("/templates")
-def list_templates(db: Session = Depends(get_db), deps = Depends(auth)):
-    results = db.query(TemplateModel).order_by(TemplateModel.created_at.desc()).all()
-    return [{
-        "id": t.id,
-        "name": t.name,
-        "image_path": t.image_path,
-        "fields": json.loads(t.fields_json or "[]"),
-        "created_at": t.created_at.isoformat()
-    } for t in results]
+def list_templates(
+    request: Request,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    fields: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+    deps = Depends(auth)
+):
+    query = db.query(TemplateModel)
+    if created_after: query = query.filter(TemplateModel.created_at >= created_after)
+    if created_before: query = query.filter(TemplateModel.created_at < created_before)
+    rows, next_cursor = paginate(query, (TemplateModel.created_at, TemplateModel.id), limit, cursor)
+    return list_response(request, serialize(rows, parse_fields(fields, list(TEMPLATE_FIELDS)), TEMPLATE_FIELDS), next_cursor)
 
 @app.post("/templates")
 def create_template(body: TemplateCreateRequest, db: Session = Depends(get_db), deps = Depends(auth)):
@@ -975,6 +1102,10 @@ async def upload_asset(
             db.add(new_asset)
         
         db.commit()
+        if is_probeable(file_path):
+            await probe_media(file_path)
+        if wants_proxy(file_path, category):
+            schedule_proxy_builds([file_path])
         
         return {
             "status": "ok", 
@@ -1026,21 +1157,41 @@ def delete_workflow(workflow_id: str, db: Session = Depends(get_db), deps = Depe
     return {"status": "deleted"}
 
 # --- Job Endpoints ---
+JOB_FIELDS = {
+    "id": lambda j: j.id,
+    "workflowId": lambda j: j.workflow_id,
+    "projectId": lambda j: j.project_id,
+    "status": lambda j: j.status,
+    "progress": lambda j: j.progress,
+    "parameters": lambda j: json.loads(j.parameters_json) if j.parameters_json else {},
+    "schedule_interval": lambda j: j.schedule_interval or "once",
+    "schedule_time": lambda j: j.schedule_time,
+    "last_run": lambda j: j.last_run.isoformat() if j.last_run else None,
+    "createdAt": lambda j: j.created_at.isoformat() if j.created_at else None
+}
+
 @app.get("/jobs")
-def list_jobs(db: Session = Depends(get_db), deps = Depends(auth)):
-    results = db.query(JobModel).order_by(JobModel.created_at.desc()).all()
-    return [{
-        "id": j.id,
-        "workflowId": j.workflow_id,
-        "projectId": j.project_id,
-        "status": j.status,
-        "progress": j.progress,
-        "parameters": json.loads(j.parameters_json) if j.parameters_json else {},
-        "schedule_interval": j.schedule_interval or "once",
-        "schedule_time": j.schedule_time,
-        "last_run": j.last_run.isoformat() if j.last_run else None,
-        "createdAt": j.created_at.isoformat()
-    } for j in results]
+def list_jobs(
+    request: Request,
+    status: Optional[str] = None,
+    workflow_id: Optional[str] = None,
+    project_id: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    fields: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+    deps = Depends(auth)
+):
+    query = db.query(JobModel)
+    if status: query = query.filter(JobModel.status == status)
+    if workflow_id: query = query.filter(JobModel.workflow_id == workflow_id)
+    if project_id: query = query.filter(JobModel.project_id == project_id)
+    if created_after: query = query.filter(JobModel.created_at >= created_after)
+    if created_before: query = query.filter(JobModel.created_at < created_before)
+    rows, next_cursor = paginate(query, (JobModel.created_at, JobModel.id), limit, cursor)
+    return list_response(request, serialize(rows, parse_fields(fields, list(JOB_FIELDS)), JOB_FIELDS), next_cursor)
 
 async def execute_job_task(job_id: str):
     print(f">>> JOB: Starting execution for {job_id}")
@@ -1070,13 +1221,14 @@ async def execute_job_task(job_id: str):
         }
         
         harvester = HarvesterService(db)
-        harvested_projects = harvester.harvest(config)
+        harvested_projects = await harvester.harvest(config)
         job.progress = 50
         db.commit()
 
         asset_folder = params.get("asset_folder", "backgrounds")
         output_format = params.get("output_format", "mp4")
         caption_mode = params.get("caption_mode", "line")
+        subtitle_source = params.get("subtitle_source", "tts")
         aspect_ratio = params.get("aspect_ratio", "horizontal")
         output_resolution = params.get("output_resolution", "4k_30")
         bgm_enabled = params.get("bgm_enabled", True)
@@ -1135,6 +1287,7 @@ async def execute_job_task(job_id: str):
                 "asset_folder": asset_folder,
                 "output_format": output_format,
                 "caption_mode": caption_mode,
+                "subtitle_source": subtitle_source,
                 "aspect_ratio": aspect_ratio,
                 "output_resolution": output_resolution,
                 "bgm_enabled": bgm_enabled,
@@ -1169,6 +1322,9 @@ async def execute_job_task(job_id: str):
                 except Exception:
                     pass
         
+        if params.get("translation_mode") == "batch" and harvested_projects:
+            schedule_translation_batch(harvested_projects)
+
         # 2. Trigger processing for each project
         # In a real scenario, we might want to start them one by one or in parallel
         # For now, we just ensure they are created and "Success" (Scrapped)
@@ -1265,11 +1421,12 @@ async def run_job(job_id: str, db: Session = Depends(get_db), deps = Depends(aut
     if job.status == "Running":
         raise HTTPException(status_code=409, detail="Job already running")
 
-    job.status = "Pending"
+    if job.status == "Queued":
+        raise HTTPException(status_code=409, detail="Job already queued")
+
     job.progress = 0
+    _queue_job(job, PRIORITY_HIGH)
     db.commit()
-
-    asyncio.create_task(execute_job_task(job_id))
     return {"status": "started"}
 
 class UpdateCategoriesRequest(BaseModel):
@@ -1328,7 +1485,12 @@ async def create_project_shorts(project_id: str, body: ShortsRequest, db: Sessio
 
     count = body.count or 3
     segment_length = body.segment_length or 60.0
-    asyncio.create_task(_generate_shorts_task(project_id, count, segment_length))
+    scheduler.schedule(
+        "cpu",
+        lambda: _generate_shorts_task(project_id, count, segment_length),
+        f"{project_id}:shorts",
+        PRIORITY_HIGH
+    )
     return {"status": "started", "count": count, "segment_length": segment_length}
 
 @app.get("/projects/{project_id}/files")
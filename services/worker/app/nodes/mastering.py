@@ -4,12 +4,20 @@ import os
 import random
 import re
 import json
+import shutil
+import time
 from pathlib import Path
-from typing import Dict, Any, Optional, List, Tuple
+from typing import Dict, Any, Awaitable, Callable, Optional, List, Tuple
 
 from .base import BaseNode
+from ..broadcaster import broadcaster
 from ..services.meta_store import load_meta, update_meta
 from ..database import SessionLocal, AssetModel
+from ..services.render_graph import RenderGraph
+from ..services.media_probe import get_media_duration
+from ..services.proxy_cache import get_proxy, scale_crop_filter
+from ..services.tts_cache import synthesize_phrase
+from ..services.artifact_cache import artifact_key, file_digest_async, get_artifact, restore_artifact, store_artifact
 
 DATA_ROOT = Path(os.environ.get("DATA_ROOT", "/data")).resolve()
 ASSETS_ROOT = DATA_ROOT / "assets"
@@ -17,8 +25,28 @@ ASSETS_ROOT = DATA_ROOT / "assets"
 VIDEO_EXTS = {".mp4", ".mov", ".mkv", ".webm", ".avi"}
 TRANSITION_DURATION = 0.5
 DEFAULT_INTRO_OUTRO_SECONDS = 3.0
+RENDER_FPS = 30
+RENDER_PIX_FMT = "yuv420p"
+# Max ffmpeg processes one mastering run may have going at once, and the
+# encoder threads each of them may use (0 lets ffmpeg decide).
+MASTERING_PARALLEL_BUILDS = max(1, int(os.environ.get("MASTERING_PARALLEL_BUILDS", "3")))
+MASTERING_FFMPEG_THREADS = int(os.environ.get("MASTERING_FFMPEG_THREADS", "0"))
+VIDEO_ENCODE_ARGS = [
+    "-c:v", "libx264",
+    "-preset", "veryfast",
+    "-crf", "23",
+    "-pix_fmt", RENDER_PIX_FMT,
+    "-video_track_timescale", "15360"
+]
 
 class MasteringNode(BaseNode):
+    def __init__(self):
+        super().__init__()
+        # Encoding profile of every intermediate part rendered by this node,
+        # keyed by path. Concats of parts sharing a profile are stream-copied.
+        self._part_profiles: Dict[str, Dict[str, Any]] = {}
+        self._ffmpeg_slots = asyncio.Semaphore(MASTERING_PARALLEL_BUILDS)
+
     async def execute(self, project_path: Path, context: Dict[str, Any]) -> bool:
         audio_path = project_path / "audio" / "source" / "full_audio.mp3"
         subtitle_path = project_path / "subtitles.srt"
@@ -50,7 +78,7 @@ class MasteringNode(BaseNode):
             intro_config = meta.get("intro_config") or {}
             outro_config = meta.get("outro_config") or {}
 
-        duration = await self._get_audio_duration(audio_path)
+        duration = await get_media_duration(audio_path)
         if not duration or duration <= 0:
             await self.log(project_path.name, "Mastering failed: Unable to detect audio duration", "error")
             return False
@@ -62,41 +90,231 @@ class MasteringNode(BaseNode):
         temp_dir.mkdir(parents=True, exist_ok=True)
 
         target_w, target_h = self._target_resolution(output_format)
-        main_bg = temp_dir / "main_background.mp4"
-        main_subbed = temp_dir / "final_video_subs.mp4"
 
-        await self.log(project_path.name, "Building background track for final export...")
-        bg_ok = await self._build_background_video(
-            project_path.name,
-            main_bg,
+        # Background planning and the intro/outro TTS calls share no inputs
+        bg_segments, intro, outro = await asyncio.gather(
+            self._plan_background(
+                project_path.name,
+                duration,
+                asset_folder,
+                background_mode,
+                background_video,
+                segment_minutes,
+                selection_strategy,
+                transition_type
+            ),
+            self._prepare_intro_outro(project_path, intro_config, "intro"),
+            self._prepare_intro_outro(project_path, outro_config, "outro")
+        )
+        if not bg_segments:
+            await self.log(project_path.name, "Mastering failed: Unable to build background track", "error")
+            return False
+        proxied = self._attach_proxies(bg_segments, target_w, target_h)
+        await self.log(project_path.name, f"Background proxies: {proxied}/{len(bg_segments)} segments", "info")
+
+        keys = await self._artifact_keys(
+            bg_segments,
+            intro,
+            outro,
+            audio_path,
+            subtitle_path,
             duration,
             target_w,
             target_h,
-            asset_folder,
-            background_mode,
-            background_video,
-            segment_minutes,
-            selection_strategy,
             transition_type
         )
-        if not bg_ok:
-            await self.log(project_path.name, "Mastering failed: Unable to build background track", "error")
-            return False
+        if restore_artifact(keys["final"], output_path.suffix, output_path):
+            await self.log(project_path.name, f"Inputs unchanged, reusing cached final video {keys['final'][:12]}", "info")
+        else:
+            output_path.unlink(missing_ok=True)
+            cached_bg = get_artifact(keys["background"], ".mp4")
+            render_segments = bg_segments
+            if cached_bg:
+                # The background track is already built: feed it as one segment
+                await self.log(project_path.name, f"Reusing cached background track {keys['background'][:12]}", "info")
+                render_segments = [{"path": cached_bg, "start": 0.0, "duration": duration, "loop": False, "proxy": True}]
+
+            # Intro/outro segments come from the shared artifact cache, so an
+            # identical intro is encoded once across projects
+            await asyncio.gather(*[
+                self._attach_segment(project_path, spec, target_w, target_h, keys[spec["label"]])
+                for spec in (intro, outro) if spec
+            ])
 
-        intro_path, intro_dur = await self._build_intro_outro_segment(
-            project_path,
-            intro_config,
-            "intro",
-            target_w,
-            target_h
+            await self.log(project_path.name, "Rendering final composition in a single pass...")
+            # A fresh background track is written alongside for later re-exports
+            bg_track = None if cached_bg else temp_dir / "main_background.mp4"
+            rendered = await self._render_single_pass(
+                project_path.name,
+                render_segments,
+                intro,
+                outro,
+                audio_path,
+                subtitle_path,
+                duration,
+                target_w,
+                target_h,
+                transition_type,
+                temp_dir,
+                output_path,
+                bg_track
+            )
+            if rendered and bg_track:
+                store_artifact(keys["background"], bg_track)
+            if not rendered:
+                await self.log(project_path.name, "Single-pass render failed, falling back to multi-step render...", "error")
+                output_path.unlink(missing_ok=True)
+                rendered = await self._render_multi_step(
+                    project_path,
+                    bg_segments,
+                    intro,
+                    outro,
+                    audio_path,
+                    subtitle_path,
+                    duration,
+                    target_w,
+                    target_h,
+                    transition_type,
+                    temp_dir,
+                    output_path,
+                    keys
+                )
+                if not rendered:
+                    return False
+            store_artifact(keys["final"], output_path)
+
+        if output_path.exists() and output_path.stat().st_size > 0:
+            _, _, total_duration = self._compose_timeline(
+                intro["duration"] if intro else 0.0,
+                duration,
+                outro["duration"] if outro else 0.0,
+                transition_type
+            )
+            update_meta(project_path.name, {
+                "final_video": str(output_path.name),
+                "final_duration": total_duration
+            }, project_path)
+            await self.log(project_path.name, "Final video saved successfully", "success")
+            return True
+
+        await self.log(project_path.name, "Mastering failed: Output video missing", "error")
+        return False
+
+    async def _render_single_pass(
+        self,
+        project_id: str,
+        bg_segments: List[Dict[str, Any]],
+        intro: Optional[Dict[str, Any]],
+        outro: Optional[Dict[str, Any]],
+        audio_path: Path,
+        subtitle_path: Path,
+        duration: float,
+        target_w: int,
+        target_h: int,
+        transition_type: str,
+        temp_dir: Path,
+        output_path: Path,
+        background_path: Optional[Path] = None
+    ) -> bool:
+        graph = RenderGraph()
+        transition = self._xfade_transition(transition_type)
+        scale = self._scale_filter(target_w, target_h)
+
+        bg_parts: List[Tuple[str, float]] = []
+        for segment in bg_segments:
+            idx = graph.add_input(segment["path"], self._segment_input_args(segment))
+            bg_parts.append((graph.add_filter(f"[{idx}:v]{self._normalize_filter(scale)}"), segment["duration"]))
+        main_label = graph.join(bg_parts, transition, TRANSITION_DURATION)
+        extra_outputs = []
+        if background_path:
+            background_path.unlink(missing_ok=True)
+            bg_label = f"{main_label}_track"
+            main_label = graph.add_filter(f"[{main_label}]split=2[{bg_label}]")
+            extra_outputs.append(([bg_label], ["-t", f"{duration:.2f}", "-an", *VIDEO_ENCODE_ARGS], background_path))
+
+        parts: List[Tuple[str, float]] = []
+        if intro:
+            parts.append((self._add_intro_outro_to_graph(graph, intro, scale), intro["duration"]))
+        parts.append((main_label, duration))
+        if outro:
+            parts.append((self._add_intro_outro_to_graph(graph, outro, scale), outro["duration"]))
+        video_label = graph.join(parts, transition, TRANSITION_DURATION)
+
+        main_offset, outro_offset, total_duration = self._compose_timeline(
+            intro["duration"] if intro else 0.0,
+            duration,
+            outro["duration"] if outro else 0.0,
+            transition_type
         )
-        outro_path, outro_dur = await self._build_intro_outro_segment(
-            project_path,
-            outro_config,
-            "outro",
-            target_w,
-            target_h
+        effective_subs = self._offset_subtitles(subtitle_path, temp_dir, main_offset)
+        video_label = graph.add_filter(f"[{video_label}]subtitles='{self._escape_subtitles_path(effective_subs)}'")
+
+        audio_label = self._add_audio_mix(
+            graph,
+            audio_path,
+            intro.get("audio") if intro else None,
+            outro.get("audio") if outro else None,
+            main_offset,
+            duration,
+            outro_offset,
+            total_duration
+        )
+
+        cmd = graph.command(
+            [video_label, audio_label],
+            [
+                "-t", f"{total_duration:.2f}",
+                *VIDEO_ENCODE_ARGS,
+                "-c:a", "aac",
+                "-b:a", "192k"
+            ],
+            output_path,
+            extra_outputs
         )
+        return await self._run_ffmpeg(cmd, project_id, "single-pass render", total_duration)
+
+    async def _render_multi_step(
+        self,
+        project_path: Path,
+        bg_segments: List[Dict[str, Any]],
+        intro: Optional[Dict[str, Any]],
+        outro: Optional[Dict[str, Any]],
+        audio_path: Path,
+        subtitle_path: Path,
+        duration: float,
+        target_w: int,
+        target_h: int,
+        transition_type: str,
+        temp_dir: Path,
+        output_path: Path,
+        keys: Dict[str, str]
+    ) -> bool:
+        main_bg = temp_dir / "main_background.mp4"
+        main_subbed = temp_dir / "final_video_subs.mp4"
+
+        await self.log(project_path.name, "Building background, intro and outro tracks...")
+        bg_ok, (intro_path, intro_dur), (outro_path, outro_dur) = await asyncio.gather(
+            self._timed_build(project_path.name, "background", self._cached_build(
+                project_path.name,
+                "background",
+                keys["background"],
+                main_bg,
+                lambda: self._build_background_video(
+                    project_path.name,
+                    bg_segments,
+                    main_bg,
+                    target_w,
+                    target_h,
+                    transition_type
+                )
+            )),
+            self._timed_build(project_path.name, "intro", self._build_intro_outro_segment(project_path, intro, target_w, target_h, keys.get("intro"))),
+            self._timed_build(project_path.name, "outro", self._build_intro_outro_segment(project_path, outro, target_w, target_h, keys.get("outro")))
+        )
+        if not bg_ok:
+            await self.log(project_path.name, "Mastering failed: Unable to build background track", "error")
+            return False
+        self._record_profile(main_bg, target_w, target_h)
 
         segments: List[Path] = []
         durations: List[float] = []
@@ -118,36 +336,42 @@ class MasteringNode(BaseNode):
             await self.log(project_path.name, "Mastering failed: Unable to concatenate segments", "error")
             return False
 
-        subtitle_offset = intro_dur
-        if transition_type != "cut" and intro_dur > 0 and len(segments) > 1:
-            subtitle_offset = max(0.0, intro_dur - TRANSITION_DURATION)
+        subtitle_offset, outro_offset, total_duration = self._compose_timeline(
+            intro_dur,
+            duration,
+            outro_dur,
+            transition_type
+        )
 
         await self.log(project_path.name, "Burning subtitles onto final sequence...")
-        sub_ok = await self._apply_subtitles(concat_video, subtitle_path, target_w, target_h, main_subbed, subtitle_offset)
+        sub_ok = await self._cached_build(
+            project_path.name,
+            "subtitles",
+            keys["subtitles"],
+            main_subbed,
+            lambda: self._apply_subtitles(concat_video, subtitle_path, target_w, target_h, main_subbed, subtitle_offset)
+        )
         if not sub_ok:
             await self.log(project_path.name, "Mastering failed: Unable to render subtitles", "error")
             return False
 
-        total_duration = sum(durations)
-        if transition_type != "cut" and len(segments) > 1:
-            total_duration -= TRANSITION_DURATION * (len(segments) - 1)
-
         await self.log(project_path.name, "Building final audio track...")
-        intro_voice = project_path / "video" / "parts" / "intro_voice.mp3"
-        outro_voice = project_path / "video" / "parts" / "outro_voice.mp3"
         final_audio = temp_dir / "final_audio.m4a"
-        outro_offset = subtitle_offset + duration
-        if transition_type != "cut" and outro_dur > 0 and len(segments) > 1:
-            outro_offset = max(subtitle_offset, subtitle_offset + duration - TRANSITION_DURATION)
-        audio_ok = await self._build_final_audio(
-            audio_path,
-            intro_voice if intro_voice.exists() else None,
-            outro_voice if outro_voice.exists() else None,
-            subtitle_offset,
-            duration,
-            outro_offset,
-            total_duration,
-            final_audio
+        audio_ok = await self._cached_build(
+            project_path.name,
+            "audio",
+            keys["audio"],
+            final_audio,
+            lambda: self._build_final_audio(
+                audio_path,
+                intro.get("audio") if intro_path else None,
+                outro.get("audio") if outro_path else None,
+                subtitle_offset,
+                duration,
+                outro_offset,
+                total_duration,
+                final_audio
+            )
         )
         if not audio_ok:
             await self.log(project_path.name, "Mastering failed: Unable to build final audio track", "error")
@@ -158,32 +382,146 @@ class MasteringNode(BaseNode):
         if not mux_ok:
             await self.log(project_path.name, "Mastering failed: Unable to mux audio", "error")
             return False
+        return True
 
-        if output_path.exists() and output_path.stat().st_size > 0:
-            update_meta(project_path.name, {
-                "final_video": str(output_path.name),
-                "final_duration": total_duration
-            }, project_path)
-            await self.log(project_path.name, "Final video saved successfully", "success")
-            return True
-
-        await self.log(project_path.name, "Mastering failed: Output video missing", "error")
-        return False
-
-    async def _build_background_video(
+    async def _cached_build(
         self,
         project_id: str,
+        label: str,
+        key: str,
         output_path: Path,
+        build: Callable[[], Awaitable[bool]]
+    ) -> bool:
+        """
+        Restores output_path from the artifact cache when key is known,
+        otherwise builds it and caches the result. Cached files are hard
+        linked, so the output is unlinked before ffmpeg writes to it.
+        """
+        if restore_artifact(key, output_path.suffix, output_path):
+            await self.log(project_id, f"[{label}] inputs unchanged, reusing cached artifact {key[:12]}", "info")
+            return True
+        output_path.unlink(missing_ok=True)
+        ok = await build()
+        if ok:
+            store_artifact(key, output_path)
+        return ok
+
+    async def _artifact_keys(
+        self,
+        bg_segments: List[Dict[str, Any]],
+        intro: Optional[Dict[str, Any]],
+        outro: Optional[Dict[str, Any]],
+        audio_path: Path,
+        subtitle_path: Path,
         duration: float,
         target_w: int,
         target_h: int,
+        transition_type: str
+    ) -> Dict[str, str]:
+        """
+        Content hashes of every mastering artifact: source file digests
+        plus the settings each step reads. Proxies are keyed by their
+        source since they render to the same frames.
+        """
+        profile = {"width": target_w, "height": target_h, "fps": RENDER_FPS, "encode": VIDEO_ENCODE_ARGS}
+        background_inputs = {
+            **profile,
+            "transition": transition_type,
+            "segments": [
+                {
+                    "source": await file_digest_async(segment.get("source") or segment["path"]),
+                    "start": round(segment["start"], 2),
+                    "duration": round(segment["duration"], 2),
+                    "loop": segment["loop"]
+                }
+                for segment in bg_segments
+            ]
+        }
+        keys = {"background": artifact_key("background", background_inputs)}
+
+        async def spec_inputs(spec: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+            if not spec:
+                return None
+            return {
+                **profile,
+                "kind": spec["kind"],
+                "duration": round(spec["duration"], 2),
+                "video": await file_digest_async(spec.get("video")),
+                "image": await file_digest_async(spec.get("image")),
+                "audio": await file_digest_async(spec.get("audio"))
+            }
+
+        intro_inputs = await spec_inputs(intro)
+        outro_inputs = await spec_inputs(outro)
+        if intro_inputs:
+            keys["intro"] = artifact_key("segment", intro_inputs)
+        if outro_inputs:
+            keys["outro"] = artifact_key("segment", outro_inputs)
+
+        sequence = [keys.get("intro"), keys["background"], keys.get("outro"), transition_type]
+        keys["subtitles"] = artifact_key("subtitles", {
+            **profile,
+            "sequence": sequence,
+            "subtitles": await file_digest_async(subtitle_path)
+        })
+        keys["audio"] = artifact_key("audio", {
+            "main": await file_digest_async(audio_path),
+            "duration": round(duration, 2),
+            "intro": intro_inputs,
+            "outro": outro_inputs,
+            "transition": transition_type
+        })
+        keys["final"] = artifact_key("final", {
+            "subtitles": keys["subtitles"],
+            "audio": keys["audio"]
+        })
+        return keys
+
+    async def _timed_build(self, project_id: str, label: str, build: Awaitable[Any]) -> Any:
+        started = time.monotonic()
+        await self.log(project_id, f"[{label}] build started", "info")
+        result = await build
+        await self.log(project_id, f"[{label}] build finished in {time.monotonic() - started:.1f}s", "info")
+        return result
+
+    def _compose_timeline(
+        self,
+        intro_dur: float,
+        duration: float,
+        outro_dur: float,
+        transition_type: str
+    ) -> Tuple[float, float, float]:
+        """
+        Returns (main_offset, outro_offset, total_duration) for an
+        intro/main/outro sequence, accounting for xfade overlaps.
+        """
+        count = 1 + (1 if intro_dur > 0 else 0) + (1 if outro_dur > 0 else 0)
+        overlapping = transition_type != "cut" and count > 1
+
+        main_offset = intro_dur
+        if overlapping and intro_dur > 0:
+            main_offset = max(0.0, intro_dur - TRANSITION_DURATION)
+
+        outro_offset = main_offset + duration
+        if overlapping and outro_dur > 0:
+            outro_offset = max(main_offset, main_offset + duration - TRANSITION_DURATION)
+
+        total_duration = intro_dur + duration + outro_dur
+        if overlapping:
+            total_duration -= TRANSITION_DURATION * (count - 1)
+        return main_offset, outro_offset, total_duration
+
+    async def _plan_background(
+        self,
+        project_id: str,
+        duration: float,
         asset_folder: str,
         mode: str,
         background_video: str,
         segment_minutes: float,
         selection_strategy: str,
         transition_type: str
-    ) -> bool:
+    ) -> List[Dict[str, Any]]:
         await self.log(
             project_id,
             f"Background config: mode={mode} folder={asset_folder} single={background_video or '-'} "
@@ -196,12 +534,12 @@ class MasteringNode(BaseNode):
                 await self.log(project_id, f"Background video not found: {background_video}", "error")
             else:
                 await self.log(project_id, f"Using single background video: {background_video}", "info")
-                return await self._build_looped_video(src, duration, target_w, target_h, output_path, project_id)
+                return [{"path": src, "start": 0.0, "duration": duration, "loop": True}]
 
         candidates = self._collect_candidates(asset_folder)
         if not candidates:
             await self.log(project_id, f"No background videos found in {asset_folder}", "error")
-            return False
+            return []
         await self.log(project_id, f"Background candidates: {len(candidates)}", "info")
 
         segment_len = max(10.0, float(segment_minutes or 2) * 60.0)
@@ -210,7 +548,10 @@ class MasteringNode(BaseNode):
             f"Background target duration={duration:.1f}s segment_len={segment_len:.1f}s",
             "info"
         )
-        segments = await self._plan_segments(candidates, duration, segment_len, selection_strategy, transition_type)
+        # Seeded per project so re-exports pick the same clips and the cached
+        # background track stays valid
+        rng = random.Random(project_id)
+        segments = await self._plan_segments(candidates, duration, segment_len, selection_strategy, transition_type, rng)
         await self.log(
             project_id,
             "Segments: " + ", ".join([f"{s['path'].name}@{s['duration']:.1f}s" for s in segments]),
@@ -224,7 +565,36 @@ class MasteringNode(BaseNode):
             ]),
             "info"
         )
+        return segments
+
+    def _attach_proxies(self, segments: List[Dict[str, Any]], target_w: int, target_h: int) -> int:
+        """
+        Swaps segment sources for their pre-normalized proxies when one is
+        cached for the target profile. Returns how many segments use a proxy.
+        """
+        count = 0
+        for segment in segments:
+            proxy = get_proxy(segment["path"], target_w, target_h)
+            if proxy:
+                segment["source"] = segment["path"]
+                segment["path"] = proxy
+                segment["proxy"] = True
+                count += 1
+        return count
 
+    async def _build_background_video(
+        self,
+        project_id: str,
+        segments: List[Dict[str, Any]],
+        output_path: Path,
+        target_w: int,
+        target_h: int,
+        transition_type: str
+    ) -> bool:
+        if len(segments) == 1 and segments[0]["start"] <= 0 and not segments[0].get("proxy"):
+            return await self._build_looped_video(
+                segments[0]["path"], segments[0]["duration"], target_w, target_h, output_path, project_id
+            )
         if transition_type == "cut":
             return await self._build_segments_cut(segments, target_w, target_h, output_path, project_id)
         xfade_ok = await self._build_segments_xfade(segments, target_w, target_h, output_path, transition_type, project_id)
@@ -276,30 +646,34 @@ class MasteringNode(BaseNode):
         duration: float,
         segment_len: float,
         strategy: str,
-        transition_type: str
+        transition_type: str,
+        rng: random.Random
     ) -> List[Dict[str, Any]]:
         count = max(1, int(math.ceil(duration / segment_len)))
         segments: List[Dict[str, Any]] = []
-        shuffle = candidates[:]
+        shuffle = sorted(candidates, key=lambda p: (p.name.lower(), str(p)))
         if strategy == "random":
-            random.shuffle(shuffle)
-        else:
-            shuffle.sort(key=lambda p: p.name.lower())
+            rng.shuffle(shuffle)
         transition_bonus = 0.0
         if transition_type != "cut" and count > 1:
             transition_bonus = TRANSITION_DURATION * (count - 1)
 
+        src_durations: Dict[Path, Optional[float]] = {}
+        for src in shuffle[:count]:
+            if src not in src_durations:
+                src_durations[src] = await get_media_duration(src)
+
         for idx in range(count):
             src = shuffle[idx % len(shuffle)]
             seg_duration = segment_len
             if idx == count - 1:
                 seg_duration = max(3.0, duration - segment_len * (count - 1) + transition_bonus)
-            src_duration = await self._get_media_duration(src)
+            src_duration = src_durations.get(src)
             loop = False
             start = 0.0
             if src_duration and src_duration > seg_duration:
                 if strategy == "random":
-                    start = random.uniform(0.0, max(0.0, src_duration - seg_duration))
+                    start = rng.uniform(0.0, max(0.0, src_duration - seg_duration))
                 else:
                     start = 0.0
             else:
@@ -321,7 +695,7 @@ class MasteringNode(BaseNode):
         output_path: Path,
         project_id: Optional[str] = None
     ) -> bool:
-        vf = self._scale_filter(target_w, target_h)
+        vf = self._encode_filter(self._scale_filter(target_w, target_h))
         cmd = [
             "ffmpeg",
             "-y",
@@ -330,12 +704,13 @@ class MasteringNode(BaseNode):
             "-t", f"{duration:.2f}",
             "-vf", vf,
             "-an",
-            "-c:v", "libx264",
-            "-preset", "veryfast",
-            "-crf", "23",
+            *VIDEO_ENCODE_ARGS,
             str(output_path)
         ]
-        return await self._run_ffmpeg(cmd, project_id, "looped background")
+        ok = await self._run_ffmpeg(cmd, project_id, "looped video", duration)
+        if ok:
+            self._record_profile(output_path, target_w, target_h)
+        return ok
 
     async def _build_segments_cut(
         self,
@@ -346,36 +721,31 @@ class MasteringNode(BaseNode):
         project_id: Optional[str] = None
     ) -> bool:
         temp_files: List[Path] = []
-        vf = self._scale_filter(target_w, target_h)
+        vf = self._encode_filter(self._scale_filter(target_w, target_h))
+
+        async def build_segment(idx: int, segment: Dict[str, Any], temp_path: Path) -> bool:
+            cmd = ["ffmpeg", "-y", *self._segment_input_args(segment), "-i", str(segment["path"])]
+            if segment.get("proxy"):
+                # Proxies already match the target profile: trim only
+                cmd += ["-an", "-c:v", "copy", str(temp_path)]
+            else:
+                cmd += ["-vf", vf, "-an", *VIDEO_ENCODE_ARGS, str(temp_path)]
+            ok = await self._run_ffmpeg(cmd, project_id, f"bg segment {idx + 1}", segment["duration"])
+            if ok:
+                # A stream-copied proxy keeps the proxy encode, not ours
+                self._record_profile(temp_path, target_w, target_h, bool(segment.get("proxy")))
+            return ok
+
+        builds = []
         for idx, segment in enumerate(segments):
             temp_path = output_path.parent / f"bg_seg_{idx:02d}.mp4"
             temp_files.append(temp_path)
-            cmd = ["ffmpeg", "-y"]
-            if segment["loop"]:
-                cmd += ["-stream_loop", "-1"]
-            if segment["start"] > 0:
-                cmd += ["-ss", f"{segment['start']:.2f}"]
-            cmd += ["-t", f"{segment['duration']:.2f}", "-i", str(segment["path"])]
-            cmd += ["-vf", vf, "-an", "-c:v", "libx264", "-preset", "veryfast", "-crf", "23", str(temp_path)]
-            ok = await self._run_ffmpeg(cmd, project_id, f"bg segment {idx + 1}")
-            if not ok:
-                return False
+            builds.append(build_segment(idx, segment, temp_path))
+        if not all(await asyncio.gather(*builds)):
+            return False
 
         concat_list = output_path.parent / "bg_concat.txt"
-        concat_list.write_text("".join([f"file '{p.as_posix()}'\n" for p in temp_files]), encoding="utf-8")
-        cmd = [
-            "ffmpeg",
-            "-y",
-            "-f", "concat",
-            "-safe", "0",
-            "-i", str(concat_list),
-            "-an",
-            "-c:v", "libx264",
-            "-preset", "veryfast",
-            "-crf", "23",
-            str(output_path)
-        ]
-        return await self._run_ffmpeg(cmd, project_id, "concat background")
+        return await self._concat_parts(temp_files, concat_list, output_path, project_id, "concat background")
 
     async def _build_segments_xfade(
         self,
@@ -389,22 +759,16 @@ class MasteringNode(BaseNode):
         if len(segments) == 1:
             return await self._build_segments_cut(segments, target_w, target_h, output_path, project_id)
 
-        transition = "fade"
-        if transition_type == "blur_fade":
-            transition = "fadeblack"
+        transition = self._xfade_transition(transition_type)
 
         vf_scale = self._scale_filter(target_w, target_h)
         cmd = ["ffmpeg", "-y"]
         for segment in segments:
-            if segment["loop"]:
-                cmd += ["-stream_loop", "-1"]
-            if segment["start"] > 0:
-                cmd += ["-ss", f"{segment['start']:.2f}"]
-            cmd += ["-t", f"{segment['duration']:.2f}", "-i", str(segment["path"])]
+            cmd += [*self._segment_input_args(segment), "-i", str(segment["path"])]
 
         filter_parts = []
         for idx in range(len(segments)):
-            filter_parts.append(f"[{idx}:v]{vf_scale},fps=30,format=yuv420p,settb=1/1000[v{idx}]")
+            filter_parts.append(f"[{idx}:v]{self._normalize_filter(vf_scale)}[v{idx}]")
 
         offset = segments[0]["duration"] - TRANSITION_DURATION
         chain = "v0"
@@ -421,12 +785,14 @@ class MasteringNode(BaseNode):
             "-filter_complex", filter_complex,
             "-map", f"[{chain}]",
             "-an",
-            "-c:v", "libx264",
-            "-preset", "veryfast",
-            "-crf", "23",
+            *VIDEO_ENCODE_ARGS,
             str(output_path)
         ]
-        return await self._run_ffmpeg(cmd, project_id, "xfade background")
+        total = sum(segment["duration"] for segment in segments) - TRANSITION_DURATION * (len(segments) - 1)
+        ok = await self._run_ffmpeg(cmd, project_id, "xfade background", total)
+        if ok:
+            self._record_profile(output_path, target_w, target_h)
+        return ok
 
     async def _apply_subtitles(
         self,
@@ -437,11 +803,7 @@ class MasteringNode(BaseNode):
         output_path: Path,
         offset: float
     ) -> bool:
-        effective_subs = subtitle_path
-        if offset > 0:
-            shifted = output_path.parent / "subtitles_shifted.srt"
-            self._shift_srt(subtitle_path, shifted, offset)
-            effective_subs = shifted
+        effective_subs = self._offset_subtitles(subtitle_path, output_path.parent, offset)
         subtitle_filter = self._escape_subtitles_path(effective_subs)
         vf = f"{self._scale_filter(target_w, target_h)},subtitles='{subtitle_filter}'"
         cmd = [
@@ -450,31 +812,29 @@ class MasteringNode(BaseNode):
             "-i", str(input_video),
             "-vf", vf,
             "-an",
-            "-c:v", "libx264",
-            "-preset", "veryfast",
-            "-crf", "23",
+            *VIDEO_ENCODE_ARGS,
             str(output_path)
         ]
         return await self._run_ffmpeg(cmd)
 
-    async def _build_intro_outro_segment(
+    async def _prepare_intro_outro(
         self,
         project_path: Path,
         config: Dict[str, Any],
-        label: str,
-        target_w: int,
-        target_h: int
-    ) -> Tuple[Optional[Path], float]:
+        label: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Resolves an intro/outro config into a render spec (sources, duration
+        and narration audio) shared by the single-pass and multi-step renders.
+        """
         if not config:
-            return None, 0.0
+            return None
         duration = float(config.get("duration") or DEFAULT_INTRO_OUTRO_SECONDS)
         mode = config.get("mode", "compose")
         await self.log(project_path.name, f"{label.title()} config: mode={mode} duration={duration}s video={config.get('video') or '-'}", "info")
-        output_path = project_path / "video" / "parts" / f"{label}_segment.mp4"
         voice_mode = config.get("voice", "same")
         text = str(config.get("text") or "")
         audio_path: Optional[Path] = None
-        audio_duration = 0.0
 
         if text.strip():
             voice = None
@@ -484,73 +844,128 @@ class MasteringNode(BaseNode):
                 voice = meta.get("global_voice_style") if meta else None
             if not voice:
                 voice = "es-ES-AlvaroNeural"
-            audio_path = project_path / "video" / "parts" / f"{label}_voice.mp3"
-            audio_ok = await self._generate_tts(text, voice, audio_path)
-            if audio_ok:
-                audio_duration = (await self._get_media_duration(audio_path)) or 0.0
+            voice_path = project_path / "video" / "parts" / f"{label}_voice.mp3"
+            audio_duration = await self._generate_tts(text, voice, voice_path)
+            if audio_duration is not None:
+                audio_path = voice_path
                 if audio_duration > duration:
                     duration = audio_duration
 
+        spec: Dict[str, Any] = {"label": label, "duration": duration, "audio": audio_path}
         if mode == "video":
             video_path = config.get("video")
             if not video_path:
-                return None, 0.0
+                return None
             src = ASSETS_ROOT / video_path
             if not src.exists():
-                return None, 0.0
-            ok = await self._build_looped_video(src, duration, target_w, target_h, output_path)
-            if ok and audio_path:
-                ok = await self._mux_segment_audio(output_path, audio_path, duration)
-            return (output_path if ok else None), (duration if ok else 0.0)
+                return None
+            spec.update({"kind": "looped", "video": src})
+            return spec
 
         preview_path = project_path / "video" / "parts" / f"{label}_preview.png"
         overlay_path = project_path / "video" / "parts" / f"{label}_overlay.png"
         if not preview_path.exists() and not overlay_path.exists():
+            return None
+        bg = ASSETS_ROOT / config.get("video") if config.get("video") else None
+        if bg and bg.exists():
+            if overlay_path.exists():
+                spec.update({"kind": "overlay", "video": bg, "image": overlay_path})
+            else:
+                spec.update({"kind": "looped", "video": bg})
+        elif preview_path.exists():
+            spec.update({"kind": "still", "image": preview_path})
+        else:
+            return None
+        return spec
+
+    async def _build_intro_outro_segment(
+        self,
+        project_path: Path,
+        spec: Optional[Dict[str, Any]],
+        target_w: int,
+        target_h: int,
+        key: Optional[str] = None
+    ) -> Tuple[Optional[Path], float]:
+        if not spec:
             return None, 0.0
-        vf = self._scale_filter(target_w, target_h)
-        if config.get("video"):
-            bg = ASSETS_ROOT / config.get("video")
-            if bg.exists():
-                if overlay_path.exists():
-                    ok = await self._build_overlay_video(bg, overlay_path, duration, target_w, target_h, output_path)
-                else:
-                    ok = await self._build_looped_video(bg, duration, target_w, target_h, output_path)
-            elif preview_path.exists():
-                ok = await self._build_still_video(preview_path, duration, vf, output_path)
+        duration = spec["duration"]
+        output_path = project_path / "video" / "parts" / f"{spec['label']}_segment.mp4"
+        project_id = project_path.name
+
+        async def build() -> bool:
+            if spec["kind"] == "overlay":
+                ok = await self._build_overlay_video(spec["video"], spec["image"], duration, target_w, target_h, output_path, project_id)
+            elif spec["kind"] == "looped":
+                ok = await self._build_looped_video(spec["video"], duration, target_w, target_h, output_path, project_id)
             else:
-                ok = False
+                ok = await self._build_still_video(spec["image"], duration, target_w, target_h, output_path, project_id)
+            if ok and spec.get("audio"):
+                ok = await self._mux_segment_audio(output_path, spec["audio"], duration)
+            return ok
+
+        if key:
+            ok = await self._cached_build(project_id, spec["label"], key, output_path, build)
         else:
-            ok = await self._build_still_video(preview_path, duration, vf, output_path)
-        if ok and audio_path:
-            ok = await self._mux_segment_audio(output_path, audio_path, duration)
+            ok = await build()
+        if ok:
+            self._record_profile(output_path, target_w, target_h)
         return (output_path if ok else None), (duration if ok else 0.0)
 
+    async def _attach_segment(self, project_path: Path, spec: Dict[str, Any], target_w: int, target_h: int, key: str):
+        segment_path, _ = await self._build_intro_outro_segment(project_path, spec, target_w, target_h, key)
+        if segment_path:
+            spec["segment"] = segment_path
+
+    def _add_intro_outro_to_graph(self, graph: RenderGraph, spec: Dict[str, Any], scale: str) -> str:
+        duration_args = ["-t", f"{spec['duration']:.2f}"]
+        if spec.get("segment"):
+            idx = graph.add_input(spec["segment"], duration_args)
+            return graph.add_filter(f"[{idx}:v]{self._normalize_filter(scale)}")
+        if spec["kind"] == "overlay":
+            bg_idx = graph.add_input(spec["video"], ["-stream_loop", "-1", *duration_args])
+            ov_idx = graph.add_input(spec["image"], ["-loop", "1", *duration_args])
+            bg_label = graph.add_filter(f"[{bg_idx}:v]{scale}")
+            ov_label = graph.add_filter(f"[{ov_idx}:v]{scale}")
+            return graph.add_filter(f"[{bg_label}][{ov_label}]{self._normalize_filter('overlay=0:0:format=auto')}")
+        if spec["kind"] == "looped":
+            idx = graph.add_input(spec["video"], ["-stream_loop", "-1", *duration_args])
+        else:
+            idx = graph.add_input(spec["image"], ["-loop", "1", *duration_args])
+        return graph.add_filter(f"[{idx}:v]{self._normalize_filter(scale)}")
+
     async def _concat_segments(self, segments: List[Path], output_path: Path) -> bool:
-        if len(segments) == 1:
-            return await self._run_ffmpeg([
-                "ffmpeg", "-y",
-                "-i", str(segments[0]),
-                "-c:v", "libx264",
-                "-preset", "veryfast",
-                "-crf", "23",
-                "-an",
-                str(output_path)
-            ])
         concat_list = output_path.parent / "final_concat.txt"
-        concat_list.write_text("".join([f"file '{p.as_posix()}'\n" for p in segments]), encoding="utf-8")
-        cmd = [
-            "ffmpeg",
-            "-y",
-            "-f", "concat",
-            "-safe", "0",
-            "-i", str(concat_list),
-            "-c:v", "libx264",
-            "-preset", "veryfast",
-            "-crf", "23",
-            "-an",
-            str(output_path)
-        ]
-        return await self._run_ffmpeg(cmd)
+        return await self._concat_parts(segments, concat_list, output_path)
+
+    async def _concat_parts(
+        self,
+        parts: List[Path],
+        concat_list: Path,
+        output_path: Path,
+        project_id: Optional[str] = None,
+        context: str = "concat"
+    ) -> bool:
+        """
+        Concatenates rendered parts with the concat demuxer. When every part
+        was rendered with the same encoding profile the streams are copied,
+        otherwise the joined sequence is re-encoded.
+        """
+        profiles = [self._part_profiles.get(str(part)) for part in parts]
+        stream_copy = all(profiles) and all(profile == profiles[0] for profile in profiles)
+
+        if len(parts) == 1:
+            cmd = ["ffmpeg", "-y", "-i", str(parts[0])]
+        else:
+            concat_list.write_text("".join([f"file '{p.as_posix()}'\n" for p in parts]), encoding="utf-8")
+            cmd = ["ffmpeg", "-y", "-f", "concat", "-safe", "0", "-i", str(concat_list)]
+        cmd += ["-an"]
+        cmd += ["-c:v", "copy"] if stream_copy else VIDEO_ENCODE_ARGS
+        cmd.append(str(output_path))
+
+        ok = await self._run_ffmpeg(cmd, project_id, f"{context} ({'copy' if stream_copy else 're-encode'})")
+        if ok and stream_copy:
+            self._part_profiles[str(output_path)] = profiles[0]
+        return ok
 
     async def _concat_segments_xfade(
         self,
@@ -562,9 +977,7 @@ class MasteringNode(BaseNode):
         if len(segments) == 1:
             return await self._concat_segments(segments, output_path)
 
-        transition = "fade"
-        if transition_type == "blur_fade":
-            transition = "fadeblack"
+        transition = self._xfade_transition(transition_type)
 
         cmd = ["ffmpeg", "-y"]
         for segment in segments:
@@ -589,9 +1002,7 @@ class MasteringNode(BaseNode):
             "-filter_complex", filter_complex,
             "-map", f"[{chain}]",
             "-an",
-            "-c:v", "libx264",
-            "-preset", "veryfast",
-            "-crf", "23",
+            *VIDEO_ENCODE_ARGS,
             str(output_path)
         ]
         return await self._run_ffmpeg(cmd)
@@ -612,46 +1023,6 @@ class MasteringNode(BaseNode):
         ]
         return await self._run_ffmpeg(cmd)
 
-    async def _get_audio_duration(self, audio_path: Path) -> Optional[float]:
-        cmd = [
-            "ffprobe", "-v", "error",
-            "-show_entries", "format=duration",
-            "-of", "default=noprint_wrappers=1:nokey=1",
-            str(audio_path)
-        ]
-        try:
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            stdout, _ = await process.communicate()
-            if process.returncode == 0:
-                return float(stdout.decode().strip())
-        except: 
-            return None
-        return None
-
-    async def _get_media_duration(self, path: Path) -> Optional[float]:
-        cmd = [
-            "ffprobe", "-v", "error",
-            "-show_entries", "format=duration",
-            "-of", "default=noprint_wrappers=1:nokey=1",
-            str(path)
-        ]
-        try:
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            stdout, _ = await process.communicate()
-            if process.returncode == 0:
-                return float(stdout.decode().strip())
-        except:
-            return None
-        return None
-
     def _target_resolution(self, output_format: str) -> tuple:
         if output_format == "4k_vertical":
             return (2160, 3840)
@@ -662,9 +1033,46 @@ class MasteringNode(BaseNode):
         return (1080, 1920)
 
     def _scale_filter(self, target_w: int, target_h: int) -> str:
-        if target_w >= target_h:
-            return f"scale={target_w}:-2,crop={target_w}:{target_h}:(in_w-out_w)/2:(in_h-out_h)/2"
-        return f"scale=-2:{target_h},crop={target_w}:{target_h}:(in_w-out_w)/2:(in_h-out_h)/2"
+        return scale_crop_filter(target_w, target_h)
+
+    def _encode_filter(self, vf: str) -> str:
+        return f"{vf},setsar=1,fps={RENDER_FPS},format={RENDER_PIX_FMT}"
+
+    def _normalize_filter(self, vf: str) -> str:
+        return f"{self._encode_filter(vf)},settb=1/1000"
+
+    def _record_profile(self, path: Path, target_w: int, target_h: int, proxy: bool = False):
+        self._part_profiles[str(path)] = {
+            "codec": "h264",
+            "width": target_w,
+            "height": target_h,
+            "fps": RENDER_FPS,
+            "pix_fmt": RENDER_PIX_FMT,
+            "proxy": proxy
+        }
+
+    def _xfade_transition(self, transition_type: str) -> Optional[str]:
+        if transition_type == "cut":
+            return None
+        if transition_type == "blur_fade":
+            return "fadeblack"
+        return "fade"
+
+    def _segment_input_args(self, segment: Dict[str, Any]) -> List[str]:
+        args: List[str] = []
+        if segment["loop"]:
+            args += ["-stream_loop", "-1"]
+        if segment["start"] > 0:
+            args += ["-ss", f"{segment['start']:.2f}"]
+        args += ["-t", f"{segment['duration']:.2f}"]
+        return args
+
+    def _offset_subtitles(self, subtitle_path: Path, temp_dir: Path, offset: float) -> Path:
+        if offset <= 0:
+            return subtitle_path
+        shifted = temp_dir / "subtitles_shifted.srt"
+        self._shift_srt(subtitle_path, shifted, offset)
+        return shifted
 
     def _escape_subtitles_path(self, subtitle_path: Path) -> str:
         value = str(subtitle_path)
@@ -685,21 +1093,31 @@ class MasteringNode(BaseNode):
             return values.get(key, "")
         return re.sub(r"{{\s*([\w.-]+)\s*}}", repl, text)
 
-    async def _build_still_video(self, image_path: Path, duration: float, vf: str, output_path: Path) -> bool:
+    async def _build_still_video(
+        self,
+        image_path: Path,
+        duration: float,
+        target_w: int,
+        target_h: int,
+        output_path: Path,
+        project_id: Optional[str] = None
+    ) -> bool:
+        vf = self._encode_filter(self._scale_filter(target_w, target_h))
         cmd = [
             "ffmpeg",
             "-y",
             "-loop", "1",
             "-i", str(image_path),
             "-t", f"{duration:.2f}",
-            "-vf", f"{vf},format=yuv420p",
+            "-vf", vf,
             "-an",
-            "-c:v", "libx264",
-            "-preset", "veryfast",
-            "-crf", "23",
+            *VIDEO_ENCODE_ARGS,
             str(output_path)
         ]
-        return await self._run_ffmpeg(cmd)
+        ok = await self._run_ffmpeg(cmd, project_id, "still video", duration)
+        if ok:
+            self._record_profile(output_path, target_w, target_h)
+        return ok
 
     async def _build_overlay_video(
         self,
@@ -708,7 +1126,8 @@ class MasteringNode(BaseNode):
         duration: float,
         target_w: int,
         target_h: int,
-        output_path: Path
+        output_path: Path,
+        project_id: Optional[str] = None
     ) -> bool:
         vf = self._scale_filter(target_w, target_h)
         cmd = [
@@ -719,14 +1138,15 @@ class MasteringNode(BaseNode):
             "-loop", "1",
             "-i", str(overlay),
             "-t", f"{duration:.2f}",
-            "-filter_complex", f"[0:v]{vf}[bg];[1:v]{vf}[ov];[bg][ov]overlay=0:0:format=auto,format=yuv420p",
+            "-filter_complex", f"[0:v]{vf}[bg];[1:v]{vf}[ov];[bg][ov]{self._encode_filter('overlay=0:0:format=auto')}",
             "-an",
-            "-c:v", "libx264",
-            "-preset", "veryfast",
-            "-crf", "23",
+            *VIDEO_ENCODE_ARGS,
             str(output_path)
         ]
-        return await self._run_ffmpeg(cmd)
+        ok = await self._run_ffmpeg(cmd, project_id, "overlay video", duration)
+        if ok:
+            self._record_profile(output_path, target_w, target_h)
+        return ok
 
     def _shift_srt(self, source: Path, target: Path, offset: float):
         try:
@@ -761,25 +1181,25 @@ class MasteringNode(BaseNode):
         except:
             return value
 
-    async def _generate_tts(self, text: str, voice: str, output_path: Path) -> bool:
-        cmd = [
-            "edge-tts",
-            "--voice", voice,
-            "--text", text,
-            "--write-media", str(output_path)
-        ]
+    async def _generate_tts(self, text: str, voice: str, output_path: Path) -> Optional[float]:
+        """
+        Links the cached narration of (voice, text) into output_path,
+        synthesizing it on a miss. Returns its duration.
+        """
+        cached = await synthesize_phrase(text, voice)
+        if not cached:
+            return None
+        audio, duration = cached
         try:
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            await process.communicate()
-            if process.returncode != 0:
-                return False
-        except:
-            return False
-        return output_path.exists()
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            output_path.unlink(missing_ok=True)
+            try:
+                os.link(audio, output_path)
+            except OSError:
+                shutil.copy2(audio, output_path)
+        except Exception:
+            return None
+        return duration
 
     async def _mux_segment_audio(self, video_path: Path, audio_path: Path, duration: float) -> bool:
         temp_path = video_path.parent / f"{video_path.stem}_aud.mp4"
@@ -813,47 +1233,111 @@ class MasteringNode(BaseNode):
         total_duration: float,
         output_path: Path
     ) -> bool:
-        inputs: List[str] = []
-        filter_parts: List[str] = []
+        graph = RenderGraph()
+        audio_label = self._add_audio_mix(
+            graph,
+            main_audio,
+            intro_audio,
+            outro_audio,
+            main_offset,
+            main_duration,
+            outro_offset,
+            total_duration
+        )
+        cmd = graph.command([audio_label], ["-c:a", "aac", "-b:a", "192k"], output_path)
+        return await self._run_ffmpeg(cmd)
+
+    def _add_audio_mix(
+        self,
+        graph: RenderGraph,
+        main_audio: Path,
+        intro_audio: Optional[Path],
+        outro_audio: Optional[Path],
+        main_offset: float,
+        main_duration: float,
+        outro_offset: float,
+        total_duration: float
+    ) -> str:
         mix_inputs: List[str] = []
-        idx = 0
 
-        inputs += ["-i", str(main_audio)]
-        filter_parts.append(f"[{idx}:a]atrim=0:{main_duration:.2f},asetpts=PTS-STARTPTS,adelay={int(main_offset*1000)}|{int(main_offset*1000)}[maina]")
-        mix_inputs.append("[maina]")
-        idx += 1
+        idx = graph.add_input(main_audio)
+        delay = int(main_offset * 1000)
+        mix_inputs.append(graph.add_filter(
+            f"[{idx}:a]atrim=0:{main_duration:.2f},asetpts=PTS-STARTPTS,adelay={delay}|{delay}"
+        ))
 
         if intro_audio:
-            inputs += ["-i", str(intro_audio)]
-            filter_parts.append(f"[{idx}:a]asetpts=PTS-STARTPTS[inta]")
-            mix_inputs.append("[inta]")
-            idx += 1
+            idx = graph.add_input(intro_audio)
+            mix_inputs.append(graph.add_filter(f"[{idx}:a]asetpts=PTS-STARTPTS"))
 
         if outro_audio:
-            inputs += ["-i", str(outro_audio)]
-            filter_parts.append(f"[{idx}:a]asetpts=PTS-STARTPTS,adelay={int(outro_offset*1000)}|{int(outro_offset*1000)}[outa]")
-            mix_inputs.append("[outa]")
-            idx += 1
-
-        filter_parts.append("".join(mix_inputs) + f"amix=inputs={len(mix_inputs)}:duration=longest:dropout_transition=0,atrim=0:{total_duration:.2f}[aout]")
-        filter_complex = ";".join(filter_parts)
+            idx = graph.add_input(outro_audio)
+            delay = int(outro_offset * 1000)
+            mix_inputs.append(graph.add_filter(f"[{idx}:a]asetpts=PTS-STARTPTS,adelay={delay}|{delay}"))
 
-        cmd = ["ffmpeg", "-y", *inputs, "-filter_complex", filter_complex, "-map", "[aout]", "-c:a", "aac", "-b:a", "192k", str(output_path)]
-        return await self._run_ffmpeg(cmd)
+        return graph.add_filter(
+            "".join(f"[{label}]" for label in mix_inputs)
+            + f"amix=inputs={len(mix_inputs)}:duration=longest:dropout_transition=0,atrim=0:{total_duration:.2f}"
+        )
 
-    async def _run_ffmpeg(self, cmd: List[str], project_id: Optional[str] = None, context: str = "ffmpeg") -> bool:
-        try:
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            _, stderr = await process.communicate()
-            if process.returncode != 0:
-                if project_id:
-                    err_msg = stderr.decode(errors="ignore")[-600:]
-                    await self.log(project_id, f"{context} failed: {err_msg}", "error")
+    async def _run_ffmpeg(
+        self,
+        cmd: List[str],
+        project_id: Optional[str] = None,
+        context: str = "ffmpeg",
+        expected_duration: Optional[float] = None
+    ) -> bool:
+        """
+        Runs one ffmpeg command inside this node's build slots. When a
+        project and expected duration are given, progress is broadcast as
+        "progress" events while it runs.
+        """
+        if MASTERING_FFMPEG_THREADS > 0:
+            cmd = [*cmd[:-1], "-threads", str(MASTERING_FFMPEG_THREADS), cmd[-1]]
+        track_progress = bool(project_id and expected_duration and expected_duration > 0)
+        if track_progress:
+            cmd = [cmd[0], "-progress", "pipe:1", "-nostats", *cmd[1:]]
+        async with self._ffmpeg_slots:
+            try:
+                process = await asyncio.create_subprocess_exec(
+                    *cmd,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE
+                )
+                if track_progress:
+                    stderr_task = asyncio.create_task(process.stderr.read())
+                    await self._pump_progress(process.stdout, project_id, context, expected_duration)
+                    stderr = await stderr_task
+                    await process.wait()
+                else:
+                    _, stderr = await process.communicate()
+                if process.returncode != 0:
+                    if project_id:
+                        err_msg = stderr.decode(errors="ignore")[-600:]
+                        await self.log(project_id, f"{context} failed: {err_msg}", "error")
+                    return False
+            except:
                 return False
-        except:
-            return False
         return True
+
+    async def _pump_progress(self, stream: asyncio.StreamReader, project_id: str, context: str, expected_duration: float):
+        reported = -1
+        while True:
+            line = await stream.readline()
+            if not line:
+                break
+            key, _, value = line.decode(errors="ignore").strip().partition("=")
+            if key not in ("out_time_us", "out_time_ms"):
+                continue
+            try:
+                seconds = int(value) / 1_000_000
+            except ValueError:
+                continue
+            percent = min(100, int(seconds / expected_duration * 100))
+            if percent // 10 > reported:
+                reported = percent // 10
+                await broadcaster.broadcast("progress", {
+                    "project_id": project_id,
+                    "task": context,
+                    "percent": percent
+                })
@@ -1,13 +1,25 @@
 import asyncio
 import os
+import re
+import shutil
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
 from .base import BaseNode
 from ..services.meta_store import load_meta
+from ..services.media_probe import get_media_duration
+from ..utils.cues import parse_cues
+from .tts import TTS_TIMINGS_NAME
+
+# Chunked transcription: narration longer than ~1.5 chunks is cut at
+# silences near every WHISPER_CHUNK_SECONDS (0 disables it) and the chunks
+# run on WHISPER_WORKERS whisper processes sharing the cores.
+WHISPER_CHUNK_SECONDS = float(os.environ.get("WHISPER_CHUNK_SECONDS", "120"))
+WHISPER_WORKERS = max(1, int(os.environ.get("WHISPER_WORKERS", str(min(4, os.cpu_count() or 1)))))
+SILENCE_NOISE = os.environ.get("WHISPER_SILENCE_NOISE", "-35dB")
+SILENCE_MIN_SECONDS = 0.3
 
 class SubtitlesNode(BaseNode):
     async def execute(self, project_path: Path, context: Dict[str, Any]) -> bool:
-        await self.log(project_path.name, "Generating subtitles using local Whisper...")
         audio_path = project_path / "audio" / "source" / "full_audio.mp3"
         dst_path = project_path / "subtitles.srt"
         
@@ -16,42 +28,26 @@ class SubtitlesNode(BaseNode):
             return False
             
         try:
-            model_path = os.environ.get("WHISPER_MODEL_PATH", "/opt/whisper.cpp/models/ggml-small.bin")
-            if not Path(model_path).exists():
-                await self.log(project_path.name, f"Whisper model not found: {model_path}", "error")
-                return False
-
-            output_base = project_path / "subtitles"
-            cmd = [
-                "whisper",
-                "-m", model_path,
-                "-l", "es",
-                "-osrt",
-                "-of", str(output_base),
-                str(audio_path)
-            ]
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            _, stderr = await process.communicate()
-            if process.returncode != 0:
-                err_msg = stderr.decode(errors="ignore")[-600:]
-                await self.log(project_path.name, f"Whisper failed: {err_msg}", "error")
-                return False
-
-            generated_srt = output_base.with_suffix(".srt")
-            if not generated_srt.exists():
-                await self.log(project_path.name, "Whisper failed: SRT not generated", "error")
-                return False
-
-            response = generated_srt.read_text(encoding="utf-8", errors="replace")
-            
             caption_mode = "line"
+            subtitle_source = "tts"
             meta = load_meta(project_path.name, project_path)
             if meta:
                 caption_mode = meta.get("caption_mode", caption_mode)
+                subtitle_source = meta.get("subtitle_source", subtitle_source)
+
+            response = None
+            if str(subtitle_source).lower() == "tts":
+                response = self._load_tts_timings(audio_path)
+                if response:
+                    await self.log(project_path.name, "Building subtitles from speech timings...")
+                else:
+                    await self.log(project_path.name, "No speech timings for this audio, falling back to Whisper", "info")
+
+            if not response:
+                await self.log(project_path.name, "Generating subtitles using local Whisper...")
+                response = await self._run_whisper(project_path, audio_path)
+            if response is None:
+                return False
 
             if str(caption_mode).lower() in ["word", "word_by_word", "word-by-word", "wordbyword"]:
                 entries = self._parse_srt_entries(response)
@@ -66,6 +62,193 @@ class SubtitlesNode(BaseNode):
             await self.log(project_path.name, f"Subtitles Error: {e}", "error")
             return False
 
+    async def _run_whisper(self, project_path: Path, audio_path: Path) -> Optional[str]:
+        model_path = os.environ.get("WHISPER_MODEL_PATH", "/opt/whisper.cpp/models/ggml-small.bin")
+        if not Path(model_path).exists():
+            await self.log(project_path.name, f"Whisper model not found: {model_path}", "error")
+            return None
+
+        duration = await get_media_duration(audio_path)
+        if WHISPER_CHUNK_SECONDS > 0 and duration and duration > WHISPER_CHUNK_SECONDS * 1.5:
+            return await self._transcribe_chunked(project_path, audio_path, model_path, duration)
+        return await self._transcribe(project_path.name, model_path, audio_path, project_path / "subtitles")
+
+    def _load_tts_timings(self, audio_path: Path) -> Optional[str]:
+        """
+        Returns the edge-tts cue timings of the narration as SRT text, or
+        None when they are missing or older than the audio. Both the SRT
+        (edge-tts 7) and WebVTT (older releases) outputs are accepted.
+        """
+        timings_path = audio_path.parent / TTS_TIMINGS_NAME
+        try:
+            if timings_path.stat().st_mtime < audio_path.stat().st_mtime - 1:
+                return None
+            raw = timings_path.read_text(encoding="utf-8", errors="replace")
+        except OSError:
+            return None
+        entries = parse_cues(raw)
+        if not entries:
+            return None
+        return self._format_entries(entries)
+
+    async def _transcribe(
+        self,
+        project_id: str,
+        model_path: str,
+        audio_path: Path,
+        output_base: Path,
+        threads: Optional[int] = None
+    ) -> Optional[str]:
+        cmd = [
+            "whisper",
+            "-m", model_path,
+            "-l", "es",
+            "-osrt",
+            "-of", str(output_base)
+        ]
+        if threads:
+            cmd += ["-t", str(threads)]
+        cmd.append(str(audio_path))
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        _, stderr = await process.communicate()
+        if process.returncode != 0:
+            err_msg = stderr.decode(errors="ignore")[-600:]
+            await self.log(project_id, f"Whisper failed: {err_msg}", "error")
+            return None
+
+        generated_srt = output_base.with_suffix(".srt")
+        if not generated_srt.exists():
+            await self.log(project_id, "Whisper failed: SRT not generated", "error")
+            return None
+        return generated_srt.read_text(encoding="utf-8", errors="replace")
+
+    async def _transcribe_chunked(
+        self,
+        project_path: Path,
+        audio_path: Path,
+        model_path: str,
+        duration: float,
+        chunk_seconds: float = WHISPER_CHUNK_SECONDS,
+        workers: int = WHISPER_WORKERS
+    ) -> Optional[str]:
+        """
+        Splits the narration at silences, transcribes the chunks with at
+        most `workers` whisper processes and stitches their SRT entries back
+        on the full timeline. Returns the merged SRT text.
+        """
+        project_id = project_path.name
+        silences = await self._detect_silences(audio_path)
+        chunks = self._plan_chunks(duration, silences, chunk_seconds)
+        workers = max(1, min(workers, len(chunks)))
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        await self.log(project_id, f"Transcribing {len(chunks)} chunks with {workers} workers x {threads} threads", "info")
+
+        chunk_dir = project_path / "audio" / "chunks"
+        shutil.rmtree(chunk_dir, ignore_errors=True)
+        chunk_dir.mkdir(parents=True, exist_ok=True)
+        slots = asyncio.Semaphore(workers)
+
+        async def transcribe_chunk(idx: int, start: float, end: float) -> Optional[List[Dict[str, Any]]]:
+            async with slots:
+                chunk_path = chunk_dir / f"chunk_{idx:03d}.wav"
+                if not await self._extract_chunk(audio_path, start, end, chunk_path):
+                    await self.log(project_id, f"Whisper failed: unable to cut chunk {idx + 1}", "error")
+                    return None
+                srt = await self._transcribe(project_id, model_path, chunk_path, chunk_dir / f"chunk_{idx:03d}", threads)
+            if srt is None:
+                return None
+            entries = self._parse_srt_entries(srt)
+            for entry in entries:
+                entry["start"] = min(entry["start"] + start, end)
+                entry["end"] = min(entry["end"] + start, end)
+            return entries
+
+        try:
+            results = await asyncio.gather(*[
+                transcribe_chunk(idx, start, end) for idx, (start, end) in enumerate(chunks)
+            ])
+        finally:
+            shutil.rmtree(chunk_dir, ignore_errors=True)
+        if any(result is None for result in results):
+            return None
+        merged = [entry for result in results for entry in result if entry["end"] > entry["start"]]
+        if not merged:
+            await self.log(project_id, "Whisper failed: no speech detected", "error")
+            return None
+        return self._format_entries(merged)
+
+    async def _detect_silences(self, audio_path: Path) -> List[Tuple[float, float]]:
+        cmd = [
+            "ffmpeg",
+            "-hide_banner",
+            "-i", str(audio_path),
+            "-af", f"silencedetect=noise={SILENCE_NOISE}:d={SILENCE_MIN_SECONDS}",
+            "-f", "null",
+            "-"
+        ]
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+            _, stderr = await process.communicate()
+        except Exception:
+            return []
+        output = stderr.decode(errors="ignore")
+        starts = [float(v) for v in re.findall(r"silence_start: (-?[\d.]+)", output)]
+        ends = [float(v) for v in re.findall(r"silence_end: ([\d.]+)", output)]
+        return list(zip(starts, ends))
+
+    def _plan_chunks(
+        self,
+        duration: float,
+        silences: List[Tuple[float, float]],
+        chunk_seconds: float
+    ) -> List[Tuple[float, float]]:
+        """
+        Cuts near every multiple of chunk_seconds, snapping to the middle
+        of the closest silence within a quarter chunk. Falls back to a hard
+        cut when no silence is close enough.
+        """
+        midpoints = [(start + end) / 2 for start, end in silences]
+        window = chunk_seconds / 4
+        cuts: List[float] = []
+        last = 0.0
+        target = chunk_seconds
+        while target < duration - window:
+            nearby = [m for m in midpoints if abs(m - target) <= window and m > last]
+            cut = min(nearby, key=lambda m: abs(m - target)) if nearby else target
+            cuts.append(cut)
+            last = cut
+            target = cut + chunk_seconds
+        bounds = [0.0, *cuts, duration]
+        return [(bounds[i], bounds[i + 1]) for i in range(len(bounds) - 1)]
+
+    async def _extract_chunk(self, audio_path: Path, start: float, end: float, output_path: Path) -> bool:
+        cmd = [
+            "ffmpeg",
+            "-y",
+            "-ss", f"{start:.3f}",
+            "-t", f"{end - start:.3f}",
+            "-i", str(audio_path),
+            "-ar", "16000",
+            "-ac", "1",
+            "-c:a", "pcm_s16le",
+            str(output_path)
+        ]
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        await process.communicate()
+        return process.returncode == 0 and output_path.exists()
+
     def _parse_srt_entries(self, srt_text: str):
         blocks = [b for b in srt_text.strip().split("\n\n") if b.strip()]
         entries = []
@@ -1,16 +1,10 @@
 import os
 import base64
-import httpx
 from pathlib import Path
 from typing import Dict, Any
 from .base import BaseNode
 from ..services.meta_store import load_meta, update_meta
-
-try:
-    from openai import OpenAI, AsyncOpenAI
-except ImportError:
-    OpenAI = None
-    AsyncOpenAI = None
+from ..services.clients import AsyncOpenAI, clients, estimate_tokens
 
 class ThumbnailNode(BaseNode):
     async def execute(self, project_path: Path, context: Dict[str, Any]) -> bool:
@@ -31,7 +25,7 @@ class ThumbnailNode(BaseNode):
                 await self.log(project_path.name, "OpenAI library not installed", "error")
                 return False
 
-            client = AsyncOpenAI(api_key=api_key)
+            client = clients.openai()
             meta = load_meta(project_path.name, project_path)
             if not meta:
                 await self.log(project_path.name, "Thumbnail failed: Missing metadata", "error")
@@ -101,26 +95,31 @@ sin gore explícito
 Story Title: {story_title}
 Story Body: {story_text}"""
 
-            prompt_resp = await client.chat.completions.create(
-                model="gpt-5-mini",
-                messages=[
-                    {"role": "system", "content": designer_system_prompt},
-                    {"role": "user", "content": designer_user_msg}
-                ]
+            prompt_resp = await clients.call_openai(
+                lambda: client.chat.completions.create(
+                    model="gpt-5-mini",
+                    messages=[
+                        {"role": "system", "content": designer_system_prompt},
+                        {"role": "user", "content": designer_user_msg}
+                    ]
+                ),
+                estimate_tokens(designer_system_prompt + designer_user_msg)
             )
             visual_prompt = prompt_resp.choices[0].message.content.strip()
             
             # Phase 2: Generate Image
             await self.log(project_path.name, "Generating thumbnail with gpt-image-1...")
             
-            result = await client.images.generate(
-                model="gpt-image-1",
-                prompt=visual_prompt,
-                size="1536x1024",
-                quality="high",
-                extra_body={
-                    "output_format": "png"
-                }
+            result = await clients.call_openai(
+                lambda: client.images.generate(
+                    model="gpt-image-1",
+                    prompt=visual_prompt,
+                    size="1536x1024",
+                    quality="high",
+                    extra_body={
+                        "output_format": "png"
+                    }
+                )
             )
             
             if result.data:
@@ -128,10 +127,9 @@ Story Body: {story_text}"""
                 if getattr(data, "b64_json", None):
                     image_bytes = base64.b64decode(data.b64_json)
                 elif getattr(data, "url", None):
-                    async with httpx.AsyncClient(timeout=30.0) as http:
-                        resp = await http.get(data.url)
-                        resp.raise_for_status()
-                        image_bytes = resp.content
+                    resp = await clients.request("GET", data.url, timeout=30.0)
+                    resp.raise_for_status()
+                    image_bytes = resp.content
                 else:
                     image_bytes = None
                 
@@ -1,45 +1,36 @@
+import asyncio
 import os
 import json
+import re
+import shutil
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from .base import BaseNode
+from .tts import TTSNode
 from ..services.meta_store import load_meta, update_meta
+from ..services.clients import AsyncOpenAI, clients, estimate_tokens
+from ..services.translation_cache import get_cached_translation, source_hash, store_translation
 
-# Using OpenAI for Translation
-try:
-    from openai import OpenAI, AsyncOpenAI
-except ImportError:
-    OpenAI = None
-    AsyncOpenAI = None
+TRANSLATION_MODEL = os.environ.get("OPENAI_TRANSLATION_MODEL", "gpt-5-mini")
+# Bump whenever build_translation_request changes so cached translations
+# made with the old prompt are no longer served.
+TRANSLATION_PROMPT_VERSION = "1"
+# Stories longer than TRANSLATION_CHUNK_CHARS are translated as
+# paragraph-aligned parts, TRANSLATION_PARALLEL_CHUNKS at a time, and each
+# finished part is kept under text/translation_parts until the whole story
+# is assembled.
+TRANSLATION_CHUNK_CHARS = int(os.environ.get("TRANSLATION_CHUNK_CHARS", "4000"))
+TRANSLATION_PARALLEL_CHUNKS = max(1, int(os.environ.get("TRANSLATION_PARALLEL_CHUNKS", "3")))
+TRANSLATION_TTS_PREWARM = os.environ.get("TRANSLATION_TTS_PREWARM", "1") == "1"
+PARTS_DIR_NAME = "translation_parts"
 
-class TranslationNode(BaseNode):
-    async def execute(self, project_path: Path, context: Dict[str, Any]) -> bool:
-        src_path = project_path / "text" / "story.txt"
-        dst_path = project_path / "text" / "story_translated.txt"
-        
-        if not src_path.exists():
-            await self.log(project_path.name, "Missing files for translation", "error")
-            return False
-            
-        try:
-            meta = load_meta(project_path.name, project_path)
-            if not meta:
-                await self.log(project_path.name, "Missing project metadata", "error")
-                return False
-            original_text = src_path.read_text(encoding="utf-8")
-            original_title = meta.get("title", "")
-            
-            api_key = os.environ.get("OPENAI_API_KEY")
-            if not api_key: 
-                await self.log(project_path.name, "Missing OPENAI_API_KEY", "error")
-                return False
-            if not AsyncOpenAI: 
-                await self.log(project_path.name, "OpenAI library not installed", "error")
-                return False
 
-            client = AsyncOpenAI(api_key=api_key)
-            
-            prompt = f"""Devuelve SOLO JSON válido con esta forma exacta:
+def build_translation_request(original_title: str, original_text: str) -> Dict[str, Any]:
+    """
+    Chat completion body for one story, shared by the realtime node and the
+    batch translator.
+    """
+    prompt = f"""Devuelve SOLO JSON válido con esta forma exacta:
 {{
   "narrator_gender": "male" | "female" | "unknown",
   "translation_es": "...",
@@ -57,28 +48,261 @@ Story Title: {original_title}
 Story Body:
 {original_text}
 """
-            await self.log(project_path.name, "Sending request to OpenAI for translation...")
-            
-            response = await client.chat.completions.create(
-                model="gpt-5-mini",
-                messages=[
-                    {"role": "system", "content": "You are a professional translator and narrator assistant."},
-                    {"role": "user", "content": prompt}
-                ],
-                response_format={ "type": "json_object" }
-            )
-            
-            result_json = response.choices[0].message.content
-            data = json.loads(result_json)
-            
-            dst_path.write_text(data["translation_es"], encoding="utf-8")
-            update_meta(project_path.name, {
-                "narrator_gender": data.get("narrator_gender", "unknown"),
-                "title_es": data.get("title_es", original_title)
-            }, project_path)
-            
+    return {
+        "model": TRANSLATION_MODEL,
+        "messages": [
+            {"role": "system", "content": "You are a professional translator and narrator assistant."},
+            {"role": "user", "content": prompt}
+        ],
+        "response_format": {"type": "json_object"}
+    }
+
+
+def build_chunk_request(original_title: str, chunk: str, index: int, total: int) -> Dict[str, Any]:
+    """
+    Chat completion body for a later part of a long story. The reply is the
+    plain translated text so it can be written out as it streams in.
+    """
+    prompt = f"""Traduce al español este fragmento ({index + 1} de {total}) de una historia narrada.
+
+Instrucciones estrictas:
+1) Traduce al español natural, fluido y neutro. Optimiza para TTS.
+2) Optimización: Frases claras, respirables, ritmo natural.
+3) Estilo: Español estándar, sin emojis.
+4) Conserva los párrafos, separados por una línea en blanco.
+Salida: SOLO el texto traducido, sin comentarios.
+
+Story Title: {original_title}
+Story Body:
+{chunk}
+"""
+    return {
+        "model": TRANSLATION_MODEL,
+        "messages": [
+            {"role": "system", "content": "You are a professional translator and narrator assistant."},
+            {"role": "user", "content": prompt}
+        ]
+    }
+
+
+def split_story(text: str, max_chars: int = TRANSLATION_CHUNK_CHARS) -> List[str]:
+    """
+    Groups whole paragraphs into parts of at most max_chars; a single longer
+    paragraph becomes a part of its own.
+    """
+    parts: List[str] = []
+    current = ""
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if current and len(current) + len(paragraph) + 2 > max_chars:
+            parts.append(current)
+            current = paragraph
+        else:
+            current = f"{current}\n\n{paragraph}" if current else paragraph
+    if current:
+        parts.append(current)
+    return parts
+
+
+def request_tokens(body: Dict[str, Any]) -> int:
+    # Prompt plus a translated story of about the same size
+    return 2 * sum(estimate_tokens(m["content"]) for m in body["messages"])
+
+
+class TranslationNode(BaseNode):
+    async def execute(self, project_path: Path, context: Dict[str, Any]) -> bool:
+        src_path = project_path / "text" / "story.txt"
+
+        if not src_path.exists():
+            await self.log(project_path.name, "Missing files for translation", "error")
+            return False
+
+        try:
+            meta = load_meta(project_path.name, project_path)
+            if not meta:
+                await self.log(project_path.name, "Missing project metadata", "error")
+                return False
+            original_text = src_path.read_text(encoding="utf-8")
+            original_title = meta.get("title", "")
+
+            # Result already fetched by the batch translator, or cached
+            data = context.get("translation")
+            if data is None:
+                data = get_cached_translation(TRANSLATION_MODEL, TRANSLATION_PROMPT_VERSION, original_text, original_title)
+                if data is not None:
+                    await self.log(project_path.name, "Using cached translation of this story", "info")
+            else:
+                store_translation(TRANSLATION_MODEL, TRANSLATION_PROMPT_VERSION, original_text, original_title, data)
+            if data is None:
+                if not os.environ.get("OPENAI_API_KEY"):
+                    await self.log(project_path.name, "Missing OPENAI_API_KEY", "error")
+                    return False
+                if not AsyncOpenAI:
+                    await self.log(project_path.name, "OpenAI library not installed", "error")
+                    return False
+
+                client = clients.openai()
+                parts = split_story(original_text)
+                if len(parts) > 1:
+                    data = await self._translate_parts(project_path, client, original_title, original_text, parts)
+                else:
+                    body = build_translation_request(original_title, original_text)
+                    await self.log(project_path.name, "Sending request to OpenAI for translation...")
+
+                    response = await clients.call_openai(
+                        lambda: client.chat.completions.create(**body),
+                        request_tokens(body)
+                    )
+                    data = json.loads(response.choices[0].message.content)
+                store_translation(TRANSLATION_MODEL, TRANSLATION_PROMPT_VERSION, original_text, original_title, data)
+
+            self.apply_translation(project_path, data, original_title)
             await self.log(project_path.name, "Translation completed successfully", "success")
             return True
         except Exception as e:
             await self.log(project_path.name, f"Translation Error: {e}", "error")
             return False
+
+    async def _translate_parts(
+        self,
+        project_path: Path,
+        client,
+        original_title: str,
+        original_text: str,
+        parts: List[str]
+    ) -> Dict[str, Any]:
+        """
+        Translates a long story part by part, streaming each reply. Finished
+        parts survive a failed run, so a retry only requests the missing ones.
+        The first part uses the full JSON prompt to also get the narrator
+        gender and title. Finished parts are pre-synthesized into the TTS
+        chunk cache while the rest are still translating.
+        """
+        project_id = project_path.name
+        parts_dir = project_path / "text" / PARTS_DIR_NAME
+        manifest = {
+            "source": source_hash(original_text),
+            "title": original_title,
+            "model": TRANSLATION_MODEL,
+            "prompt_version": TRANSLATION_PROMPT_VERSION,
+            "parts": len(parts)
+        }
+        manifest_path = parts_dir / "manifest.json"
+        try:
+            previous = json.loads(manifest_path.read_text(encoding="utf-8"))
+        except Exception:
+            previous = None
+        if previous != manifest:
+            shutil.rmtree(parts_dir, ignore_errors=True)
+            parts_dir.mkdir(parents=True, exist_ok=True)
+            manifest_path.write_text(json.dumps(manifest), encoding="utf-8")
+
+        part_paths = [parts_dir / f"part_{idx:03d}.txt" for idx in range(len(parts))]
+        header_path = parts_dir / "header.json"
+        done = sum(1 for path in part_paths if path.exists())
+        await self.log(project_id, f"Translating {len(parts)} parts ({done} already done)...")
+
+        slots = asyncio.Semaphore(TRANSLATION_PARALLEL_CHUNKS)
+        warmer = TTSNode() if TRANSLATION_TTS_PREWARM else None
+        warming: List[asyncio.Task] = []
+        warmed: set = set()
+
+        def header() -> Optional[Dict[str, Any]]:
+            try:
+                return json.loads(header_path.read_text(encoding="utf-8"))
+            except Exception:
+                return None
+
+        def prewarm_finished():
+            # Needs the narrator gender from the first part to pick the voice
+            info = header()
+            if warmer is None or info is None:
+                return
+            for idx, path in enumerate(part_paths):
+                if idx not in warmed and path.exists():
+                    warmed.add(idx)
+                    text = path.read_text(encoding="utf-8")
+                    warming.append(asyncio.create_task(warmer.prewarm(text, info.get("narrator_gender", "male"))))
+
+        async def translate(idx: int):
+            path = part_paths[idx]
+            if path.exists():
+                return
+            first = idx == 0
+            if first:
+                body = build_translation_request(original_title, parts[idx])
+            else:
+                body = build_chunk_request(original_title, parts[idx], idx, len(parts))
+            async with slots:
+                content = await self._stream_completion(client, body, path.with_suffix(".partial"))
+            if first:
+                data = json.loads(content)
+                content = data["translation_es"].strip()
+                header_path.write_text(json.dumps({
+                    "narrator_gender": data.get("narrator_gender", "unknown"),
+                    "title_es": data.get("title_es", original_title)
+                }, ensure_ascii=False), encoding="utf-8")
+            temp_path = path.with_suffix(".tmp")
+            temp_path.write_text(content, encoding="utf-8")
+            temp_path.replace(path)
+            path.with_suffix(".partial").unlink(missing_ok=True)
+            await self.log(project_id, f"Translated part {idx + 1}/{len(parts)}")
+            prewarm_finished()
+
+        prewarm_finished()
+        tasks = [asyncio.create_task(translate(idx)) for idx in range(len(parts))]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            # One part failed (or we were cancelled): stop the others instead
+            # of leaving them streaming into files nobody will read
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            for partial in parts_dir.glob("*.partial"):
+                partial.unlink(missing_ok=True)
+            raise
+        finally:
+            if warming:
+                results = await asyncio.gather(*warming, return_exceptions=True)
+                warmed_chunks = sum(r for r in results if isinstance(r, int))
+                if warmed_chunks:
+                    await self.log(project_id, f"Pre-synthesized {warmed_chunks} TTS chunks from finished parts")
+
+        info = header() or {}
+        data = {
+            "translation_es": "\n\n".join(path.read_text(encoding="utf-8") for path in part_paths),
+            "narrator_gender": info.get("narrator_gender", "unknown"),
+            "title_es": info.get("title_es", original_title)
+        }
+        shutil.rmtree(parts_dir, ignore_errors=True)
+        return data
+
+    async def _stream_completion(self, client, body: Dict[str, Any], partial_path: Path) -> str:
+        """
+        Streams one chat completion, appending the reply to partial_path as
+        it arrives. Returns the full reply.
+        """
+        stream = await clients.call_openai(
+            lambda: client.chat.completions.create(**body, stream=True),
+            request_tokens(body)
+        )
+        pieces: List[str] = []
+        with open(partial_path, "w", encoding="utf-8") as handle:
+            async for event in stream:
+                delta = event.choices[0].delta.content if event.choices else None
+                if delta:
+                    pieces.append(delta)
+                    handle.write(delta)
+                    handle.flush()
+        return "".join(pieces)
+
+    def apply_translation(self, project_path: Path, data: Dict[str, Any], original_title: str):
+        dst_path = project_path / "text" / "story_translated.txt"
+        dst_path.write_text(data["translation_es"], encoding="utf-8")
+        update_meta(project_path.name, {
+            "narrator_gender": data.get("narrator_gender", "unknown"),
+            "title_es": data.get("title_es", original_title)
+        }, project_path)
@@ -1,15 +1,31 @@
 import asyncio
+import os
 import random
+import re
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 from .base import BaseNode
 from ..services.meta_store import load_meta, update_meta
+from ..services.media_probe import get_media_duration
+from ..services.tts_cache import chunk_paths, get_chunk, record_chunk
+from ..services import tts_engine
+from ..utils.cues import format_srt, parse_cues
 
-# Using edge-tts for Speech (Free)
-try:
-    import edge_tts
-except ImportError:
-    edge_tts = None
+# Cue timings edge-tts writes next to the narration; SubtitlesNode builds
+# subtitles.srt from them instead of running Whisper.
+TTS_TIMINGS_NAME = "tts_timings.srt"
+# Paragraphs longer than TTS_CHUNK_CHARS are split on sentences; chunks are
+# synthesized TTS_PARALLEL_CHUNKS at a time.
+TTS_CHUNK_CHARS = int(os.environ.get("TTS_CHUNK_CHARS", "1500"))
+TTS_PARALLEL_CHUNKS = max(1, int(os.environ.get("TTS_PARALLEL_CHUNKS", "4")))
+TTS_CHUNK_RETRIES = 4
+TTS_CHUNK_TIMEOUT = 120
+MALE_VOICES = ["es-ES-AlvaroNeural", "es-MX-JorgeNeural", "es-AR-TomasNeural"]
+FEMALE_VOICES = ["es-ES-ElviraNeural", "es-MX-DaliaNeural", "es-AR-ElenaNeural"]
+
+
+def voice_pool_for(gender: str) -> List[str]:
+    return FEMALE_VOICES if gender == "female" else MALE_VOICES
 
 class TTSNode(BaseNode):
     async def execute(self, project_path: Path, context: Dict[str, Any]) -> bool:
@@ -17,103 +33,199 @@ class TTSNode(BaseNode):
         txt_path = project_path / "text" / "story_translated.txt"
         if not txt_path.exists():
             txt_path = project_path / "text" / "story.txt"
-        
+
         if not txt_path.exists():
             await self.log(project_path.name, "TTS failed: No text file found", "error")
             return False
-        
+
         out_dir = (project_path / "audio" / "source").resolve()
         out_dir.mkdir(parents=True, exist_ok=True)
         combined_audio = out_dir / "full_audio.mp3"
-        
-        await self.log(project_path.name, f"Generating TTS from {txt_path.name}...")
-        
+        timings_path = out_dir / TTS_TIMINGS_NAME
+        timings_path.unlink(missing_ok=True)
+
+        chunks = self._split_text(txt_path.read_text(encoding="utf-8", errors="replace"))
+        if not chunks:
+            await self.log(project_path.name, "TTS failed: Text file is empty", "error")
+            return False
+
+        await self.log(project_path.name, f"Generating TTS from {txt_path.name} in {len(chunks)} chunks...")
+
         # Voice selection
-        male_voices = ["es-ES-AlvaroNeural", "es-MX-JorgeNeural", "es-AR-TomasNeural"]
-        female_voices = ["es-ES-ElviraNeural", "es-MX-DaliaNeural", "es-AR-ElenaNeural"]
-        
         gender = "male"
         meta = load_meta(project_path.name, project_path)
         if meta:
             gender = meta.get("narrator_gender", "male")
-        
-        voice_pool = female_voices if gender == "female" else male_voices
-        
-        max_retries = 5
-        success = False
-        
-        for attempt in range(max_retries):
-            # Rotate through different voices
-            current_voice = voice_pool[attempt % len(voice_pool)]
-            
-            await self.log(project_path.name, f"TTS Attempt {attempt+1}/{max_retries} with voice: {current_voice}")
-            
-            cmd = [
-                "edge-tts", 
-                "--voice", current_voice, 
-                "--file", str(txt_path), 
-                "--write-media", str(combined_audio)
-            ]
-            
-            try:
-                process = await asyncio.create_subprocess_exec(
-                    *cmd,
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE
-                )
-                
-                # Wait with timeout
-                stdout, stderr = await asyncio.wait_for(
-                    process.communicate(), 
-                    timeout=300  # 5 minutes max
-                )
-                
-                if process.returncode == 0 and combined_audio.exists() and combined_audio.stat().st_size > 0:
-                    await self.log(project_path.name, f"TTS Success with {current_voice}", "success")
-                    success = True
-                    
-                    # Get audio duration using ffprobe
-                    await self._save_duration(project_path, combined_audio)
-                    break
+
+        voice_pool = voice_pool_for(gender)
+
+        # Repeated paragraphs are synthesized once
+        unique = list(dict.fromkeys(chunks))
+        slots = asyncio.Semaphore(TTS_PARALLEL_CHUNKS)
+        synthesized = await asyncio.gather(*[
+            self._synthesize_chunk(project_path.name, idx, len(unique), text, voice_pool, slots)
+            for idx, text in enumerate(unique)
+        ])
+        by_text = dict(zip(unique, synthesized))
+        results = [by_text[text] for text in chunks]
+        if any(result is None for result in results):
+            await self.log(project_path.name, "TTS failed after all attempts", "error")
+            return False
+
+        if not await self._join_chunks(results, combined_audio, timings_path):
+            await self.log(project_path.name, "TTS failed: Unable to join chunk audio", "error")
+            return False
+
+        await self.log(project_path.name, f"TTS Success with {len(chunks)} chunks", "success")
+        await self._save_duration(project_path, combined_audio)
+        return True
+
+    def _split_text(self, text: str, max_chars: int = TTS_CHUNK_CHARS) -> List[str]:
+        """
+        One chunk per paragraph, so edits only invalidate the paragraphs
+        they touch. Long paragraphs are grouped by whole sentences.
+        """
+        chunks: List[str] = []
+        for paragraph in re.split(r"\n\s*\n", text):
+            paragraph = " ".join(paragraph.split())
+            if not paragraph:
+                continue
+            if len(paragraph) <= max_chars:
+                chunks.append(paragraph)
+                continue
+            current = ""
+            for sentence in re.split(r"(?<=[.!?…])\s+", paragraph):
+                candidate = f"{current} {sentence}".strip()
+                if current and len(candidate) > max_chars:
+                    chunks.append(current)
+                    current = sentence
                 else:
-                    err_msg = stderr.decode()
-                    await self.log(project_path.name, f"TTS Attempt {attempt+1} failed: {err_msg[:200]}", "error")
-                    
-            except asyncio.TimeoutError:
-                await self.log(project_path.name, f"TTS Attempt {attempt+1} timed out", "error")
-            except Exception as e:
-                await self.log(project_path.name, f"TTS Attempt {attempt+1} exception: {e}", "error")
-            
+                    current = candidate
+            if current:
+                chunks.append(current)
+        return chunks
+
+    async def prewarm(self, text: str, gender: str) -> int:
+        """
+        Synthesizes the chunks of a partial text with the primary voice into
+        the chunk cache, so the Speech stage finds them already done. Used by
+        TranslationNode while later parts are still being translated.
+        Returns the number of chunks synthesized.
+        """
+        voice = voice_pool_for(gender)[0]
+        missing = [chunk for chunk in dict.fromkeys(self._split_text(text)) if not get_chunk(voice, chunk)]
+
+        async def warm(chunk: str) -> bool:
+            audio_path, timings_path = chunk_paths(voice, chunk)
+            if await self._run_edge_tts(voice, chunk, audio_path, timings_path) is not None:
+                return False
+            await record_chunk(voice, chunk)
+            return True
+
+        results = await asyncio.gather(*[warm(chunk) for chunk in missing])
+        return sum(results)
+
+    async def _synthesize_chunk(
+        self,
+        project_id: str,
+        idx: int,
+        total: int,
+        text: str,
+        voice_pool: List[str],
+        slots: asyncio.Semaphore
+    ) -> Optional[Tuple[Path, Path]]:
+        for attempt in range(TTS_CHUNK_RETRIES):
+            # Two tries per voice before falling back to the next one
+            voice = voice_pool[(attempt // 2) % len(voice_pool)]
+            cached = get_chunk(voice, text)
+            if cached:
+                return cached
+
+            audio_path, timings_path = chunk_paths(voice, text)
+            async with slots:
+                error = await self._run_edge_tts(voice, text, audio_path, timings_path)
+            if error is None:
+                await record_chunk(voice, text)
+                return audio_path, timings_path
+            await self.log(project_id, f"TTS chunk {idx + 1}/{total} attempt {attempt + 1} with {voice} failed: {error[:200]}", "error")
+
             # Exponential backoff
-            if attempt < max_retries - 1:
-                delay = 3 * (2 ** attempt) + random.uniform(0, 2)
+            if attempt < TTS_CHUNK_RETRIES - 1:
+                delay = 2 * (2 ** attempt) + random.uniform(0, 2)
                 await asyncio.sleep(delay)
-        
-        if not success:
-            await self.log(project_path.name, "TTS failed after all attempts", "error")
-        
-        return success
+        return None
 
-    async def _save_duration(self, project_path: Path, audio_path: Path):
+    async def _run_edge_tts(self, voice: str, text: str, audio_path: Path, timings_path: Path) -> Optional[str]:
+        """
+        Synthesizes one chunk into the chunk cache. Returns None on success
+        or the error message.
+        """
+        audio_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_audio = audio_path.with_suffix(".tmp.mp3")
+        temp_timings = timings_path.with_suffix(".tmp.srt")
         try:
-            duration_cmd = [
-                "ffprobe", "-v", "error",
-                "-show_entries", "format=duration",
-                "-of", "default=noprint_wrappers=1:nokey=1",
-                str(audio_path)
-            ]
-            duration_process = await asyncio.create_subprocess_exec(
-                *duration_cmd,
+            await tts_engine.synthesize(text, voice, temp_audio, temp_timings, TTS_CHUNK_TIMEOUT)
+            temp_timings.replace(timings_path)
+            temp_audio.replace(audio_path)
+            return None
+        except Exception as e:
+            return str(e)
+        finally:
+            temp_audio.unlink(missing_ok=True)
+            temp_timings.unlink(missing_ok=True)
+
+    async def _join_chunks(self, chunks: List[Tuple[Path, Path]], combined_audio: Path, timings_path: Path) -> bool:
+        """
+        Stream-copies the chunk mp3s into the narration (all chunks share
+        edge-tts' output format) and merges their cue timings.
+        """
+        entries = []
+        offset = 0.0
+        for audio_path, chunk_timings in chunks:
+            for entry in parse_cues(chunk_timings.read_text(encoding="utf-8", errors="replace")):
+                entry["start"] += offset
+                entry["end"] += offset
+                entries.append(entry)
+            offset += (await get_media_duration(audio_path)) or 0.0
+
+        concat_list = combined_audio.with_name("tts_concat.txt")
+        concat_list.write_text("".join(f"file '{audio.as_posix()}'\n" for audio, _ in chunks), encoding="utf-8")
+        temp_audio = combined_audio.with_suffix(".tmp.mp3")
+        cmd = [
+            "ffmpeg",
+            "-y",
+            "-f", "concat",
+            "-safe", "0",
+            "-i", str(concat_list),
+            "-c", "copy",
+            str(temp_audio)
+        ]
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE
             )
-            duration_stdout, _ = await duration_process.communicate()
-            
-            if duration_process.returncode == 0:
-                duration_seconds = float(duration_stdout.decode().strip())
-                minutes = int(duration_seconds // 60)
-                seconds = int(duration_seconds % 60)
-                duration_str = f"{minutes:02d}:{seconds:02d}"
-                
-                update_meta(project_path.name, {"duration": duration_str}, project_path)
-        except: pass
+            await process.communicate()
+            if process.returncode != 0 or not temp_audio.exists():
+                return False
+            temp_audio.replace(combined_audio)
+        except Exception:
+            return False
+        finally:
+            concat_list.unlink(missing_ok=True)
+            temp_audio.unlink(missing_ok=True)
+
+        if entries:
+            timings_path.write_text(format_srt(entries), encoding="utf-8")
+        return True
+
+    async def _save_duration(self, project_path: Path, audio_path: Path):
+        duration_seconds = await get_media_duration(audio_path)
+        if duration_seconds is None:
+            return
+        minutes = int(duration_seconds // 60)
+        seconds = int(duration_seconds % 60)
+        duration_str = f"{minutes:02d}:{seconds:02d}"
+
+        update_meta(project_path.name, {"duration": duration_str}, project_path)
@@ -0,0 +1,209 @@
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from ..database import FileDigestModel, SessionLocal
+
+DATA_ROOT = Path(os.environ.get("DATA_ROOT", "/data")).resolve()
+ARTIFACT_ROOT = DATA_ROOT / "cache" / "artifacts"
+ARTIFACT_MAX_BYTES = int(float(os.environ.get("ARTIFACT_CACHE_MAX_GB", "20")) * 1024 ** 3)
+DIGEST_CHUNK = 1024 * 1024
+
+# Content digests keyed by path, valid while (size, mtime) is unchanged.
+# An in-process LRU in front of the file_digests table, so restarts don't
+# re-read every source.
+DIGEST_CACHE_SIZE = int(os.environ.get("DIGEST_CACHE_SIZE", "4096"))
+_DIGESTS: "OrderedDict[str, Tuple[int, float, str]]" = OrderedDict()
+_digests_lock = threading.Lock()
+
+
+def _remember_digest(path: str, entry: Tuple[int, float, str]) -> None:
+    with _digests_lock:
+        _DIGESTS[path] = entry
+        _DIGESTS.move_to_end(path)
+        while len(_DIGESTS) > DIGEST_CACHE_SIZE:
+            _DIGESTS.popitem(last=False)
+
+
+def _lookup_digest(path: str, size: int, mtime: float) -> Optional[str]:
+    with _digests_lock:
+        cached = _DIGESTS.get(path)
+        if cached is not None:
+            _DIGESTS.move_to_end(path)
+    if cached and cached[0] == size and cached[1] == mtime:
+        return cached[2]
+
+    db = SessionLocal()
+    try:
+        row = db.query(FileDigestModel).filter(FileDigestModel.id == path).first()
+        if not row or row.size != size or row.mtime != mtime:
+            return None
+        value = row.digest
+    except Exception:
+        return None
+    finally:
+        db.close()
+    _remember_digest(path, (size, mtime, value))
+    return value
+
+
+def _store_digest(path: str, size: int, mtime: float, value: str) -> None:
+    _remember_digest(path, (size, mtime, value))
+    db = SessionLocal()
+    try:
+        row = db.query(FileDigestModel).filter(FileDigestModel.id == path).first()
+        if not row:
+            row = FileDigestModel(id=path)
+            db.add(row)
+        row.size = size
+        row.mtime = mtime
+        row.digest = value
+        row.hashed_at = datetime.utcnow()
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"Digest cache write failed for {path}: {e}")
+    finally:
+        db.close()
+
+
+def file_digest(path: Path) -> Optional[str]:
+    """
+    Returns the sha256 of a file's content. Digests are memoized per
+    (path, size, mtime) so unchanged sources are read only once.
+    """
+    try:
+        resolved = path.resolve()
+        stat = resolved.stat()
+    except OSError:
+        return None
+    cached = _lookup_digest(str(resolved), stat.st_size, stat.st_mtime)
+    if cached:
+        return cached
+    digest = hashlib.sha256()
+    try:
+        with open(resolved, "rb") as f:
+            for chunk in iter(lambda: f.read(DIGEST_CHUNK), b""):
+                digest.update(chunk)
+    except OSError:
+        return None
+    value = digest.hexdigest()
+    _store_digest(str(resolved), stat.st_size, stat.st_mtime, value)
+    return value
+
+
+async def file_digest_async(path: Optional[Path]) -> Optional[str]:
+    if not path:
+        return None
+    return await asyncio.to_thread(file_digest, path)
+
+
+def artifact_key(kind: str, inputs: Dict[str, Any]) -> str:
+    """
+    Hashes an artifact kind plus its inputs (file digests, parameters and
+    meta values) into the cache key of the artifact.
+    """
+    payload = json.dumps({"kind": kind, "inputs": inputs}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def artifact_path(key: str, suffix: str) -> Path:
+    return ARTIFACT_ROOT / key[:2] / f"{key}{suffix}"
+
+
+def get_artifact(key: str, suffix: str) -> Optional[Path]:
+    path = artifact_path(key, suffix)
+    if not path.exists():
+        return None
+    try:
+        os.utime(path, None)
+    except OSError:
+        pass
+    return path
+
+
+def _link_or_copy(src: Path, dst: Path):
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def restore_artifact(key: str, suffix: str, target: Path) -> bool:
+    """
+    Places a cached artifact at target (hard link, or copy across devices).
+    Returns False on a cache miss.
+    """
+    cached = get_artifact(key, suffix)
+    if not cached:
+        return False
+    try:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.unlink(missing_ok=True)
+        _link_or_copy(cached, target)
+    except Exception as e:
+        print(f"Artifact restore failed for {target.name}: {e}")
+        return False
+    return True
+
+
+def store_artifact(key: str, source: Path) -> Optional[Path]:
+    """
+    Adds a freshly built file to the cache under key. The source stays in
+    place; callers must unlink (never overwrite) it before rebuilding.
+    """
+    if not source.exists():
+        return None
+    path = artifact_path(key, source.suffix)
+    if path.exists():
+        return path
+    temp_path = path.with_name(f"{path.name}.tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path.unlink(missing_ok=True)
+        _link_or_copy(source, temp_path)
+        temp_path.replace(path)
+    except Exception as e:
+        print(f"Artifact store failed for {source.name}: {e}")
+        temp_path.unlink(missing_ok=True)
+        return None
+    evict_artifacts()
+    return path
+
+
+def evict_artifacts(max_bytes: int = ARTIFACT_MAX_BYTES) -> int:
+    """
+    Deletes least recently used artifacts until the cache fits in max_bytes.
+    Returns the number of files removed.
+    """
+    if not ARTIFACT_ROOT.exists():
+        return 0
+    entries = []
+    total = 0
+    for path in ARTIFACT_ROOT.rglob("*"):
+        if not path.is_file() or path.name.endswith(".tmp"):
+            continue
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+        total += stat.st_size
+    removed = 0
+    for _, size, path in sorted(entries, key=lambda e: e[0]):
+        if total <= max_bytes:
+            break
+        try:
+            path.unlink()
+            total -= size
+            removed += 1
+        except OSError:
+            continue
+    return removed
@@ -0,0 +1,205 @@
+import asyncio
+import os
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+import httpx
+
+try:
+    from openai import AsyncOpenAI
+except ImportError:
+    AsyncOpenAI = None
+
+# Account limits shared by every OpenAI call made by this worker
+OPENAI_RPM = float(os.environ.get("OPENAI_RPM", "60"))
+OPENAI_TPM = float(os.environ.get("OPENAI_TPM", "200000"))
+HTTP_MAX_CONNECTIONS = int(os.environ.get("HTTP_MAX_CONNECTIONS", "20"))
+HTTP_MAX_KEEPALIVE = int(os.environ.get("HTTP_MAX_KEEPALIVE", "10"))
+HTTP_TIMEOUT = float(os.environ.get("HTTP_TIMEOUT_SECONDS", "60"))
+RATE_LIMIT_RETRIES = int(os.environ.get("RATE_LIMIT_RETRIES", "5"))
+RATE_LIMIT_BACKOFF = 2.0
+
+T = TypeVar("T")
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at rate_per_minute, holding at most
+    capacity tokens (one minute's worth by default).
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = max(rate_per_minute, 1e-6) / 60.0
+        self.capacity = capacity or max(rate_per_minute, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.waits = 0
+        self.waited_seconds = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1.0) -> float:
+        """Takes amount tokens, returning how long the caller was throttled."""
+        # Requests larger than the bucket wait for a full bucket instead of forever
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    break
+                delay = (amount - self.tokens) / self.rate
+                await asyncio.sleep(delay)
+                waited += delay
+        if waited:
+            self.waits += 1
+            self.waited_seconds += waited
+        return waited
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    status = getattr(error, "status_code", None)
+    if status is None and isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+    return status
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    response = getattr(error, "response", None)
+    try:
+        return float(response.headers.get("retry-after"))
+    except Exception:
+        return None
+
+
+class ClientRegistry:
+    """
+    App-wide HTTP and OpenAI clients with keep-alive pools, shared rate
+    limits and 429 retries. Started and stopped by the app lifespan; used
+    lazily (e.g. from scripts) it creates the clients on first use.
+    """
+
+    def __init__(self):
+        self._http: Optional[httpx.AsyncClient] = None
+        self._openai: Dict[Tuple[str, Optional[str]], Any] = {}
+        self.request_limiter = TokenBucket(OPENAI_RPM)
+        self.token_limiter = TokenBucket(OPENAI_TPM)
+        self.in_flight = 0
+        self.stats = {"requests": 0, "rate_limited": 0, "retries": 0, "failed": 0}
+
+    async def start(self):
+        self.http()
+
+    async def stop(self):
+        for client in list(self._openai.values()):
+            try:
+                await client.close()
+            except Exception:
+                pass
+        self._openai.clear()
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    def http(self) -> httpx.AsyncClient:
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(
+                timeout=HTTP_TIMEOUT,
+                limits=httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS, max_keepalive_connections=HTTP_MAX_KEEPALIVE),
+                follow_redirects=True
+            )
+        return self._http
+
+    def openai(self, api_key: Optional[str] = None) -> Optional["AsyncOpenAI"]:
+        """
+        Shared AsyncOpenAI client for the key and base URL (OPENAI_BASE_URL,
+        e.g. the local mock server), or None when either is unavailable.
+        SDK retries are disabled; call_openai handles 429s.
+        """
+        api_key = api_key or os.environ.get("OPENAI_API_KEY")
+        if not api_key or AsyncOpenAI is None:
+            return None
+        base_url = os.environ.get("OPENAI_BASE_URL") or None
+        key = (api_key, base_url)
+        client = self._openai.get(key)
+        if client is None:
+            client = AsyncOpenAI(
+                api_key=api_key,
+                base_url=base_url,
+                max_retries=0,
+                http_client=httpx.AsyncClient(
+                    timeout=HTTP_TIMEOUT * 10,
+                    limits=httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS, max_keepalive_connections=HTTP_MAX_KEEPALIVE)
+                )
+            )
+            self._openai[key] = client
+        return client
+
+    async def throttle(self, tokens: int = 0):
+        """Waits for one request slot and `tokens` tokens of budget."""
+        await self.request_limiter.acquire(1)
+        if tokens:
+            await self.token_limiter.acquire(tokens)
+
+    async def call_openai(self, call: Callable[[], Awaitable[T]], tokens: int = 0) -> T:
+        """
+        Runs one OpenAI API call inside the rate limits, retrying 429s with
+        exponential backoff plus jitter (or the server's Retry-After).
+        """
+        return await self._with_retries(call, tokens, throttled=True)
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Plain HTTP request on the shared pool, retrying 429s."""
+        async def send() -> httpx.Response:
+            response = await self.http().request(method, url, **kwargs)
+            if response.status_code == 429:
+                response.raise_for_status()
+            return response
+        return await self._with_retries(send, 0, throttled=False)
+
+    async def _with_retries(self, call: Callable[[], Awaitable[T]], tokens: int, throttled: bool) -> T:
+        attempt = 0
+        while True:
+            if throttled:
+                await self.throttle(tokens)
+            self.in_flight += 1
+            self.stats["requests"] += 1
+            try:
+                return await call()
+            except Exception as e:
+                if _status_code(e) != 429 or attempt >= RATE_LIMIT_RETRIES:
+                    self.stats["failed"] += 1
+                    raise
+                self.stats["rate_limited"] += 1
+                delay = _retry_after(e) or RATE_LIMIT_BACKOFF * (2 ** attempt)
+            finally:
+                self.in_flight -= 1
+            attempt += 1
+            self.stats["retries"] += 1
+            await asyncio.sleep(delay + random.uniform(0, delay / 2))
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self.in_flight,
+            **self.stats,
+            "throttled": {
+                "requests": {"waits": self.request_limiter.waits, "seconds": round(self.request_limiter.waited_seconds, 2)},
+                "tokens": {"waits": self.token_limiter.waits, "seconds": round(self.token_limiter.waited_seconds, 2)}
+            },
+            "limits": {"rpm": OPENAI_RPM, "tpm": OPENAI_TPM},
+            "openai_clients": len(self._openai),
+            "http_open": self._http is not None and not self._http.is_closed
+        }
+
+
+clients = ClientRegistry()
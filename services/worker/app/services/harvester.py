@@ -1,21 +1,31 @@
+import asyncio
 import feedparser
+import httpx
 import json
 from bs4 import BeautifulSoup
 from datetime import datetime
 from pathlib import Path
+from typing import Any, Dict, List, Optional
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
-from ..database import ProjectModel, get_db
+from ..database import FeedStateModel, ProjectModel, get_db
 from ..utils.text_cleaner import clean_reddit_text
+from .clients import clients
 import os
 
 PROJECTS_ROOT = Path(os.environ.get("DATA_ROOT", "/data")).resolve() / "projects"
+HARVEST_CONCURRENCY = max(1, int(os.environ.get("HARVEST_CONCURRENCY", "8")))
+HARVEST_TIMEOUT = float(os.environ.get("HARVEST_TIMEOUT_SECONDS", "30"))
+HARVEST_USER_AGENT = os.environ.get("HARVEST_USER_AGENT", "frameforge-harvester/1.0")
+# Stays under SQLite's bound-parameter limit on older builds
+HARVEST_ID_BATCH = 500
 
 class HarvesterService:
     def __init__(self, db: Session):
         self.db = db
 
-    def harvest(self, config: dict) -> list:
-        return harvest_from_reddit(self.db, config)
+    async def harvest(self, config: dict) -> list:
+        return await harvest_from_reddit(self.db, config)
 
 def ensure_project_dirs(project_id: str) -> Path:
     p = PROJECTS_ROOT / project_id
@@ -25,7 +35,93 @@ def ensure_project_dirs(project_id: str) -> Path:
     (p / "text").mkdir(parents=True, exist_ok=True)
     return p
 
-def harvest_from_reddit(db: Session, config: dict) -> list:
+def feed_url(sub: str, sort: str, timeframe: str, limit: int) -> str:
+    if sort in ["new", "hot", "rising"]:
+        return f"https://www.reddit.com/r/{sub}/{sort}/.rss?limit={limit}"
+    return f"https://www.reddit.com/r/{sub}/top/.rss?t={timeframe}&limit={limit}"
+
+async def fetch_feed(db: Session, url: str, slots: asyncio.Semaphore) -> Optional[httpx.Response]:
+    """
+    Conditional GET on the shared HTTP pool using the ETag/Last-Modified
+    stored for the feed. Returns None when the feed is unchanged (304).
+    """
+    state = db.query(FeedStateModel).filter(FeedStateModel.id == url).first()
+    headers = {"User-Agent": HARVEST_USER_AGENT}
+    if state and state.etag:
+        headers["If-None-Match"] = state.etag
+    if state and state.last_modified:
+        headers["If-Modified-Since"] = state.last_modified
+
+    async with slots:
+        resp = await clients.request("GET", url, headers=headers, timeout=HARVEST_TIMEOUT)
+    if resp.status_code == 304:
+        return None
+    resp.raise_for_status()
+    return resp
+
+def save_feed_state(db: Session, url: str, resp: httpx.Response):
+    state = db.query(FeedStateModel).filter(FeedStateModel.id == url).first()
+    if not state:
+        state = FeedStateModel(id=url)
+        db.add(state)
+    state.etag = resp.headers.get("etag")
+    state.last_modified = resp.headers.get("last-modified")
+    state.checked_at = datetime.utcnow()
+
+def _entry_author(entry) -> Optional[str]:
+    author = None
+    if hasattr(entry, "author"):
+        author = entry.author
+    elif isinstance(entry, dict):
+        author = entry.get("author")
+    if not author and isinstance(entry, dict):
+        author_detail = entry.get("author_detail") or {}
+        author = author_detail.get("name")
+    if not author and isinstance(entry, dict):
+        author = entry.get("dc_creator")
+    return author
+
+def parse_feed(content: bytes, sub: str, min_chars: int, max_chars: int) -> List[Dict[str, Any]]:
+    """
+    Parses one feed into candidate stories. CPU-bound (feedparser and
+    BeautifulSoup), so it runs in a worker thread.
+    """
+    candidates = []
+    feed = feedparser.parse(content)
+    for entry in feed.entries:
+        content_html = entry.get("summary")
+        if not content_html: continue
+
+        soup = BeautifulSoup(content_html, "html.parser")
+        raw_text = soup.get_text(separator="\n").strip()
+        text = clean_reddit_text(raw_text)
+
+        if len(text) < min_chars or len(text) > max_chars:
+            continue
+
+        raw_id = entry.id.split("_")[-1] if "_" in entry.id else entry.id
+        candidates.append({
+            "id": f"reddit_{sub}_{raw_id}",
+            "title": entry.title,
+            "author": _entry_author(entry),
+            "subreddit": sub,
+            "link": entry.link,
+            "published": entry.published if hasattr(entry, 'published') else datetime.now().isoformat(),
+            "text": text
+        })
+    return candidates
+
+async def harvest_feed(db: Session, sub: str, url: str, min_chars: int, max_chars: int, slots: asyncio.Semaphore) -> List[Dict[str, Any]]:
+    resp = await fetch_feed(db, url, slots)
+    if resp is None:
+        print(f"r/{sub} unchanged since last harvest")
+        return []
+    candidates = await asyncio.to_thread(parse_feed, resp.content, sub, min_chars, max_chars)
+    # Only remember the validators once the feed was read successfully
+    save_feed_state(db, url, resp)
+    return candidates
+
+async def harvest_from_reddit(db: Session, config: dict) -> list:
     subreddits = config.get("SUBREDDITS", ["scarystories", "nosleep", "shortstories"])
     limit = config.get("REDDIT_LIMIT", 25)
     min_chars = config.get("MIN_CHARS", 600)
@@ -34,80 +130,92 @@ def harvest_from_reddit(db: Session, config: dict) -> list:
     timeframe = (config.get("REDDIT_TIMEFRAME") or "day").lower()
     if timeframe not in ["hour", "day", "week", "month", "year", "all"]:
         timeframe = "day"
-    
-    harvested = []
-    
-    for sub in subreddits:
-        if sort == "top":
-            url = f"https://www.reddit.com/r/{sub}/top/.rss?t={timeframe}&limit={limit}"
-        elif sort in ["new", "hot", "rising"]:
-            url = f"https://www.reddit.com/r/{sub}/{sort}/.rss?limit={limit}"
-        else:
-            url = f"https://www.reddit.com/r/{sub}/top/.rss?t={timeframe}&limit={limit}"
-        try:
-            feed = feedparser.parse(url)
-            for entry in feed.entries:
-                content_html = entry.summary
-                if not content_html: continue
-                
-                soup = BeautifulSoup(content_html, "html.parser")
-                raw_text = soup.get_text(separator="\n").strip()
-                text = clean_reddit_text(raw_text)
-                
-                if len(text) < min_chars or len(text) > max_chars:
-                    continue
-                
-                raw_id = entry.id.split("_")[-1] if "_" in entry.id else entry.id
-                project_id = f"reddit_{sub}_{raw_id}"
-                
-                # Check DB
-                existing = db.query(ProjectModel).filter(ProjectModel.id == project_id).first()
-                if existing:
-                    continue
-
-                p_dir = ensure_project_dirs(project_id)
-                
-                author = None
-                if hasattr(entry, "author"):
-                    author = entry.author
-                elif isinstance(entry, dict):
-                    author = entry.get("author")
-                if not author and isinstance(entry, dict):
-                    author_detail = entry.get("author_detail") or {}
-                    author = author_detail.get("name")
-                if not author and isinstance(entry, dict):
-                    author = entry.get("dc_creator")
-
-                meta = {
-                    "id": project_id,
-                    "title": entry.title,
-                    "author": author,
-                    "subreddit": sub,
-                    "link": entry.link,
-                    "published": entry.published if hasattr(entry, 'published') else datetime.now().isoformat(),
-                    "textLen": len(text),
-                    "status": "Success",
-                    "currentStage": "Text Scrapped"
-                }
-                
-                (p_dir / "meta.json").write_text(json.dumps(meta, indent=4))
-                (p_dir / "text/story.txt").write_text(text)
-                
-                # Save to DB
-                new_project = ProjectModel(
-                    id=project_id,
-                    title=entry.title,
-                    author=author,
-                    subreddit=sub,
-                    status="Success",
-                    current_stage="Text Scrapped",
-                    updated_at=datetime.utcnow(),
-                    meta_json=json.dumps(meta)
-                )
-                db.add(new_project)
-                harvested.append(project_id)
-        except Exception as e:
-            print(f"Error harvesting r/{sub}: {e}")
-            
+
+    slots = asyncio.Semaphore(HARVEST_CONCURRENCY)
+    results = await asyncio.gather(*[
+        harvest_feed(db, sub, feed_url(sub, sort, timeframe, limit), min_chars, max_chars, slots)
+        for sub in subreddits
+    ], return_exceptions=True)
+
+    candidates = []
+    for sub, feed_candidates in zip(subreddits, results):
+        if isinstance(feed_candidates, Exception):
+            print(f"Error harvesting r/{sub}: {feed_candidates}")
+            continue
+        candidates.extend(feed_candidates)
+
+    harvested = await store_candidates(db, candidates)
     db.commit()
     return harvested
+
+def existing_project_ids(db: Session, project_ids: List[str]) -> set:
+    """One IN (...) query per HARVEST_ID_BATCH ids instead of one lookup per entry."""
+    existing = set()
+    for start in range(0, len(project_ids), HARVEST_ID_BATCH):
+        batch = project_ids[start:start + HARVEST_ID_BATCH]
+        existing.update(row[0] for row in db.query(ProjectModel.id).filter(ProjectModel.id.in_(batch)))
+    return existing
+
+def write_project_files(project_id: str, meta: dict, text: str):
+    p_dir = ensure_project_dirs(project_id)
+    (p_dir / "meta.json").write_text(json.dumps(meta, indent=4))
+    (p_dir / "text/story.txt").write_text(text)
+
+async def store_candidates(db: Session, candidates: List[Dict[str, Any]]) -> list:
+    """
+    Creates projects for the candidates not seen before: the rows go in as
+    a single bulk INSERT OR IGNORE, left uncommitted for the caller, and
+    files are written from worker threads only for the rows that were
+    actually inserted, so a concurrent harvest of the same post can't fail
+    the batch or overwrite the other run's files.
+    """
+    # The same post can show up in several feeds
+    unique = {}
+    for candidate in candidates:
+        unique.setdefault(candidate["id"], candidate)
+    existing = existing_project_ids(db, list(unique))
+    new = [c for pid, c in unique.items() if pid not in existing]
+    if not new:
+        return []
+
+    now = datetime.utcnow()
+    rows = []
+    metas = {}
+    for candidate in new:
+        project_id = candidate["id"]
+        meta = {
+            "id": project_id,
+            "title": candidate["title"],
+            "author": candidate["author"],
+            "subreddit": candidate["subreddit"],
+            "link": candidate["link"],
+            "published": candidate["published"],
+            "textLen": len(candidate["text"]),
+            "status": "Success",
+            "currentStage": "Text Scrapped"
+        }
+        metas[project_id] = meta
+        rows.append({
+            "id": project_id,
+            "title": candidate["title"],
+            "author": candidate["author"],
+            "subreddit": candidate["subreddit"],
+            "status": "Success",
+            "current_stage": "Text Scrapped",
+            "updated_at": now,
+            "created_at": now,
+            "meta_json": json.dumps(meta)
+        })
+
+    stmt = (
+        sqlite_insert(ProjectModel.__table__)
+        .on_conflict_do_nothing(index_elements=["id"])
+        .returning(ProjectModel.__table__.c.id)
+    )
+    inserted = {row[0] for row in db.execute(stmt, rows)}
+    harvested = [row["id"] for row in rows if row["id"] in inserted]
+    await asyncio.gather(*[
+        asyncio.to_thread(write_project_files, project_id, metas[project_id], unique[project_id]["text"])
+        for project_id in harvested
+    ])
+    return harvested
@@ -0,0 +1,94 @@
+import base64
+import hashlib
+import json
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Request
+from fastapi.responses import Response
+from sqlalchemy import and_, or_
+
+# Page size used when a cursor is passed without a limit
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> List[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return json.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def parse_fields(fields: Optional[str], available: Sequence[str]) -> List[str]:
+    """Comma-separated field names to return; all of them when omitted."""
+    if not fields:
+        return list(available)
+    wanted = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in wanted if f not in available]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return wanted
+
+
+def paginate(query, order: Tuple[Any, Any], limit: Optional[int], cursor: Optional[str]) -> Tuple[list, Optional[str]]:
+    """
+    Keyset pagination, newest first, on (sort column, id). Returns the rows
+    and the cursor of the next page (None on the last one). Without limit
+    or cursor every row is returned, as the unpaginated endpoints did.
+    """
+    sort_col, id_col = order
+    query = query.order_by(sort_col.desc(), id_col.desc())
+    if cursor:
+        values = decode_cursor(cursor)
+        if len(values) != 2:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        last_sort, last_id = values
+        if last_sort is not None:
+            last_sort = datetime.fromisoformat(last_sort)
+            # NULL sort values come last in DESC order, after every dated row
+            query = query.filter(or_(
+                sort_col < last_sort,
+                and_(sort_col == last_sort, id_col < last_id),
+                sort_col.is_(None)
+            ))
+        else:
+            query = query.filter(and_(sort_col.is_(None), id_col < last_id))
+    if limit is None and cursor is None:
+        return query.all(), None
+    limit = min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor([getattr(last, sort_col.key), getattr(last, id_col.key)])
+
+
+def serialize(rows: list, fields: List[str], getters: Dict[str, Callable[[Any], Any]]) -> List[Dict[str, Any]]:
+    return [{name: getters[name](row) for name in fields} for row in rows]
+
+
+def list_response(request: Request, items: List[Dict[str, Any]], next_cursor: Optional[str]) -> Response:
+    """
+    JSON array response with an ETag over its content and the query that
+    produced it (fields, filters, page), answering 304 when the client
+    already has it. The next page cursor is in X-Next-Cursor.
+    """
+    body = json.dumps(items, separators=(",", ":")).encode("utf-8")
+    digest = hashlib.sha1(body)
+    digest.update(b"\0" + request.url.query.encode("utf-8"))
+    digest.update(b"\0" + (next_cursor or "").encode("ascii"))
+    etag = f'W/"{digest.hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    if etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
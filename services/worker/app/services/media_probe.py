@@ -0,0 +1,210 @@
+import asyncio
+import json
+import os
+import subprocess
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from ..database import SessionLocal, MediaProbeModel
+
+PROBE_EXTS = {
+    ".mp4", ".mov", ".mkv", ".webm", ".avi",
+    ".mp3", ".wav", ".m4a", ".ogg", ".aac", ".flac"
+}
+PROBE_FIELDS = (
+    "duration", "width", "height", "fps",
+    "video_codec", "audio_codec", "audio_channels", "audio_sample_rate"
+)
+
+# In-process LRU in front of the media_probes table, keyed by path.
+# Each entry remembers the (size, mtime) it was probed at.
+PROBE_CACHE_SIZE = int(os.environ.get("PROBE_CACHE_SIZE", "2048"))
+PROBE_CACHE: "OrderedDict[str, Tuple[int, float, Dict[str, Any]]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _cache_get(path: str) -> Optional[Tuple[int, float, Dict[str, Any]]]:
+    with _cache_lock:
+        cached = PROBE_CACHE.get(path)
+        if cached is not None:
+            PROBE_CACHE.move_to_end(path)
+        return cached
+
+
+def _cache_put(path: str, entry: Tuple[int, float, Dict[str, Any]]) -> None:
+    with _cache_lock:
+        PROBE_CACHE[path] = entry
+        PROBE_CACHE.move_to_end(path)
+        while len(PROBE_CACHE) > PROBE_CACHE_SIZE:
+            PROBE_CACHE.popitem(last=False)
+
+
+def _probe_cmd(path: Path) -> list:
+    return [
+        "ffprobe", "-v", "error",
+        "-show_entries",
+        "format=duration:stream=codec_type,codec_name,width,height,avg_frame_rate,r_frame_rate,channels,sample_rate",
+        "-of", "json",
+        str(path)
+    ]
+
+
+def _parse_rate(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        if "/" in value:
+            num, den = value.split("/", 1)
+            if float(den) == 0:
+                return None
+            return float(num) / float(den)
+        return float(value)
+    except Exception:
+        return None
+
+
+def _parse_probe_output(raw: str) -> Dict[str, Any]:
+    data = json.loads(raw or "{}")
+    info: Dict[str, Any] = {field: None for field in PROBE_FIELDS}
+    try:
+        info["duration"] = float((data.get("format") or {}).get("duration"))
+    except (TypeError, ValueError):
+        info["duration"] = None
+    for stream in data.get("streams") or []:
+        codec_type = stream.get("codec_type")
+        if codec_type == "video" and info["video_codec"] is None:
+            info["video_codec"] = stream.get("codec_name")
+            info["width"] = stream.get("width")
+            info["height"] = stream.get("height")
+            info["fps"] = _parse_rate(stream.get("avg_frame_rate")) or _parse_rate(stream.get("r_frame_rate"))
+        elif codec_type == "audio" and info["audio_codec"] is None:
+            info["audio_codec"] = stream.get("codec_name")
+            info["audio_channels"] = stream.get("channels")
+            try:
+                info["audio_sample_rate"] = int(stream.get("sample_rate"))
+            except (TypeError, ValueError):
+                info["audio_sample_rate"] = None
+    return info
+
+
+def _file_key(path: Path) -> Optional[Tuple[str, int, float]]:
+    try:
+        resolved = path.resolve()
+        stat = resolved.stat()
+    except OSError:
+        return None
+    return str(resolved), stat.st_size, stat.st_mtime
+
+
+def _lookup(key: Tuple[str, int, float]) -> Optional[Dict[str, Any]]:
+    path, size, mtime = key
+    cached = _cache_get(path)
+    if cached and cached[0] == size and cached[1] == mtime:
+        return cached[2]
+
+    db = SessionLocal()
+    try:
+        row = db.query(MediaProbeModel).filter(MediaProbeModel.id == path).first()
+        if not row or row.size != size or row.mtime != mtime:
+            return None
+        info = {field: getattr(row, field) for field in PROBE_FIELDS}
+    except Exception:
+        return None
+    finally:
+        db.close()
+    _cache_put(path, (size, mtime, info))
+    return info
+
+
+def _store(key: Tuple[str, int, float], info: Dict[str, Any]) -> None:
+    path, size, mtime = key
+    _cache_put(path, (size, mtime, info))
+    db = SessionLocal()
+    try:
+        row = db.query(MediaProbeModel).filter(MediaProbeModel.id == path).first()
+        if not row:
+            row = MediaProbeModel(id=path)
+            db.add(row)
+        row.size = size
+        row.mtime = mtime
+        row.probed_at = datetime.utcnow()
+        for field in PROBE_FIELDS:
+            setattr(row, field, info.get(field))
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"Media probe cache write failed for {path}: {e}")
+    finally:
+        db.close()
+
+
+async def probe_media(path: Path) -> Optional[Dict[str, Any]]:
+    """
+    Returns duration, resolution, fps, codec and audio info for a media
+    file, running ffprobe only when (path, size, mtime) is not cached yet.
+    """
+    key = _file_key(path)
+    if not key:
+        return None
+    info = _lookup(key)
+    if info is not None:
+        return info
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *_probe_cmd(path),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        stdout, _ = await process.communicate()
+        if process.returncode != 0:
+            return None
+        info = _parse_probe_output(stdout.decode(errors="ignore"))
+    except Exception:
+        return None
+    _store(key, info)
+    return info
+
+
+def probe_media_sync(path: Path) -> Optional[Dict[str, Any]]:
+    key = _file_key(path)
+    if not key:
+        return None
+    info = _lookup(key)
+    if info is not None:
+        return info
+    try:
+        result = subprocess.run(_probe_cmd(path), stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        if result.returncode != 0:
+            return None
+        info = _parse_probe_output(result.stdout.decode(errors="ignore"))
+    except Exception:
+        return None
+    _store(key, info)
+    return info
+
+
+def prewarm_probes(paths: Iterable[Path]) -> int:
+    """
+    Probes files not cached yet, one ffprobe at a time. Blocking; the app
+    runs it in a worker thread after startup. Returns the files probed.
+    """
+    probed = 0
+    for path in paths:
+        key = _file_key(path)
+        if key and _lookup(key) is None and probe_media_sync(path) is not None:
+            probed += 1
+    return probed
+
+
+async def get_media_duration(path: Path) -> Optional[float]:
+    info = await probe_media(path)
+    if not info:
+        return None
+    return info.get("duration")
+
+
+def is_probeable(path: Path) -> bool:
+    return path.suffix.lower() in PROBE_EXTS
@@ -1,8 +1,66 @@
+import copy
+import datetime
 import json
+import os
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
 
-from ..database import SessionLocal, ProjectModel
+from sqlalchemy import DateTime, bindparam, text
+
+from ..database import META_COLUMNS, SessionLocal, ProjectModel, meta_column_value, meta_column_values
+
+# Recently used project metas are kept in memory. SQLite is patched on every
+# change; meta.json only gets an appended journal line, and is rewritten
+# from SQLite (truncating the journal) at most every META_COMPACT_SECONDS.
+META_CACHE_SIZE = int(os.environ.get("META_CACHE_SIZE", "256"))
+META_COMPACT_SECONDS = float(os.environ.get("META_COMPACT_SECONDS", "30"))
+META_JOURNAL_NAME = "meta.journal"
+
+# A key path is a dotted string ("intro_config.text") or a sequence of keys
+KeyPath = Union[str, Sequence[str]]
+
+_lock = threading.RLock()
+_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_versions: Dict[str, int] = {}
+_pending: Dict[str, Path] = {}
+_compact_timer: Optional[threading.Timer] = None
+
+
+def _keys(path: KeyPath) -> List[str]:
+    keys = path.split(".") if isinstance(path, str) else [str(key) for key in path]
+    if not keys or not all(keys):
+        raise ValueError(f"Invalid meta key path: {path!r}")
+    return keys
+
+
+def _json_path(keys: List[str]) -> str:
+    return "$" + "".join('."' + key.replace('"', '\\"') + '"' for key in keys)
+
+
+def apply_patch(meta: Dict[str, Any], set_paths: Dict[KeyPath, Any], delete_paths: Iterable[KeyPath] = ()) -> Dict[str, Any]:
+    """
+    Applies a patch in place with SQLite's json_set/json_remove semantics:
+    missing parents are created, paths through non-objects are ignored.
+    """
+    for path, value in set_paths.items():
+        keys = _keys(path)
+        node = meta
+        for key in keys[:-1]:
+            node = node.setdefault(key, {})
+            if not isinstance(node, dict):
+                break
+        else:
+            node[keys[-1]] = copy.deepcopy(value)
+    for path in delete_paths:
+        keys = _keys(path)
+        node = meta
+        for key in keys[:-1]:
+            node = node.get(key) if isinstance(node, dict) else None
+        if isinstance(node, dict):
+            node.pop(keys[-1], None)
+    return meta
 
 
 def _load_meta_from_db(project_id: str) -> Dict[str, Any]:
@@ -26,41 +84,232 @@ def _save_meta_to_db(project_id: str, meta: Dict[str, Any]) -> None:
         if not project:
             return
         project.meta_json = json.dumps(meta)
+        for column, value in meta_column_values(meta).items():
+            setattr(project, column, value)
+        db.commit()
+    finally:
+        db.close()
+
+
+def _patch_meta_in_db(project_id: str, set_paths: Dict[KeyPath, Any], delete_paths: List[KeyPath]) -> Optional[Dict[str, Any]]:
+    """
+    Applies the patch with one UPDATE, so concurrent writers touching other
+    keys don't overwrite each other. Returns the patched meta, or None when
+    the row has no meta in the database yet.
+    """
+    expr = "meta_json"
+    params: Dict[str, Any] = {"id": project_id}
+    if set_paths:
+        args = []
+        for idx, (path, value) in enumerate(set_paths.items()):
+            params[f"p{idx}"] = _json_path(_keys(path))
+            params[f"v{idx}"] = json.dumps(value)
+            args.append(f":p{idx}, json(:v{idx})")
+        expr = f"json_set({expr}, {', '.join(args)})"
+    if delete_paths:
+        args = []
+        for idx, path in enumerate(delete_paths):
+            params[f"d{idx}"] = _json_path(_keys(path))
+            args.append(f":d{idx}")
+        expr = f"json_remove({expr}, {', '.join(args)})"
+
+    # Top-level changes to promoted fields also update their columns
+    assignments = [f"meta_json = {expr}", "updated_at = :updated_at"]
+    params["updated_at"] = datetime.datetime.utcnow()
+    columns: Dict[str, Any] = {}
+    for path in delete_paths:
+        keys = _keys(path)
+        if len(keys) == 1 and keys[0] in META_COLUMNS:
+            columns[META_COLUMNS[keys[0]]] = None
+    for path, value in set_paths.items():
+        keys = _keys(path)
+        if len(keys) == 1 and keys[0] in META_COLUMNS:
+            columns[META_COLUMNS[keys[0]]] = meta_column_value(value)
+    for column, value in columns.items():
+        params[f"c_{column}"] = value
+        assignments.append(f"{column} = :c_{column}")
+
+    db = SessionLocal()
+    try:
+        result = db.execute(
+            text(f"UPDATE projects SET {', '.join(assignments)} WHERE id = :id AND json_valid(meta_json)")
+            .bindparams(bindparam("updated_at", type_=DateTime)),
+            params
+        )
+        if result.rowcount == 0:
+            db.rollback()
+            return None
+        row = db.execute(text("SELECT meta_json FROM projects WHERE id = :id"), {"id": project_id}).first()
         db.commit()
+        return json.loads(row[0])
     finally:
         db.close()
 
 
+def _remember(project_id: str, meta: Dict[str, Any], bump: bool) -> None:
+    with _lock:
+        _cache[project_id] = meta
+        _cache.move_to_end(project_id)
+        if bump or project_id not in _versions:
+            _versions[project_id] = _versions.get(project_id, 0) + 1
+        while len(_cache) > META_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def _cached(project_id: str) -> Optional[Dict[str, Any]]:
+    with _lock:
+        meta = _cache.get(project_id)
+        if meta is None:
+            return None
+        _cache.move_to_end(project_id)
+        return copy.deepcopy(meta)
+
+
+def meta_version(project_id: str) -> int:
+    """Bumped on every change made through this module; 0 when never seen."""
+    with _lock:
+        return _versions.get(project_id, 0)
+
+
+def invalidate_meta(project_id: Optional[str] = None) -> None:
+    """
+    Drops cached metas after the projects table was changed directly (or
+    the project deleted). No project_id clears the whole cache. Journals
+    waiting for compaction stay queued: their entries are already in the
+    database and meta.json must still be rewritten from it.
+    """
+    with _lock:
+        if project_id is None:
+            _cache.clear()
+            for pid in _versions:
+                _versions[pid] += 1
+            return
+        _cache.pop(project_id, None)
+        _versions[project_id] = _versions.get(project_id, 0) + 1
+
+
+def read_meta_file(project_path: Path) -> Dict[str, Any]:
+    """meta.json with any journal entries not yet compacted into it."""
+    meta_path = project_path / "meta.json"
+    meta = json.loads(meta_path.read_text(encoding="utf-8")) if meta_path.exists() else {}
+    journal_path = project_path / META_JOURNAL_NAME
+    if journal_path.exists():
+        for line in journal_path.read_text(encoding="utf-8").splitlines():
+            try:
+                entry = json.loads(line)
+            except Exception:
+                # A torn last line from a crash mid-append
+                continue
+            if "replace" in entry:
+                meta = entry["replace"]
+            else:
+                apply_patch(meta, {tuple(k): v for k, v in entry.get("set", [])}, [tuple(k) for k in entry.get("delete", [])])
+    return meta
+
+
 def load_meta(project_id: str, project_path: Optional[Path] = None) -> Dict[str, Any]:
+    meta = _cached(project_id)
+    if meta is not None:
+        return meta
     meta = _load_meta_from_db(project_id)
     if meta:
+        _remember(project_id, copy.deepcopy(meta), bump=False)
         return meta
     if project_path is None:
         return {}
-    meta_path = project_path / "meta.json"
-    if not meta_path.exists():
-        return {}
     try:
-        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        meta = read_meta_file(project_path)
+        if not meta:
+            return {}
         _save_meta_to_db(project_id, meta)
+        _remember(project_id, copy.deepcopy(meta), bump=False)
         return meta
     except Exception:
         return {}
 
 
 def save_meta(project_id: str, meta: Dict[str, Any], project_path: Optional[Path] = None) -> None:
+    """Replaces the whole meta. Prefer patch_meta/update_meta for changes."""
     _save_meta_to_db(project_id, meta)
-    if project_path is None:
-        return
-    meta_path = project_path / "meta.json"
-    try:
-        meta_path.write_text(json.dumps(meta, indent=4), encoding="utf-8")
-    except Exception:
-        pass
+    _remember(project_id, copy.deepcopy(meta), bump=True)
+    if project_path is not None:
+        _journal(project_id, project_path, {"replace": meta})
 
 
-def update_meta(project_id: str, updates: Dict[str, Any], project_path: Optional[Path] = None) -> Dict[str, Any]:
-    meta = load_meta(project_id, project_path)
-    meta.update(updates)
-    save_meta(project_id, meta, project_path)
+def patch_meta(
+    project_id: str,
+    set_paths: Optional[Dict[KeyPath, Any]] = None,
+    delete_paths: Iterable[KeyPath] = (),
+    project_path: Optional[Path] = None
+) -> Dict[str, Any]:
+    """
+    Sets and deletes individual key paths of the meta without rewriting the
+    rest of it. Returns the updated meta.
+    """
+    set_paths = set_paths or {}
+    delete_paths = list(delete_paths)
+    if not set_paths and not delete_paths:
+        return load_meta(project_id, project_path)
+
+    meta = _patch_meta_in_db(project_id, set_paths, delete_paths)
+    if meta is None:
+        # No meta in the database yet (or no row): patch what we have
+        meta = apply_patch(load_meta(project_id, project_path), set_paths, delete_paths)
+        save_meta(project_id, meta, project_path)
+        return meta
+
+    _remember(project_id, copy.deepcopy(meta), bump=True)
+    if project_path is not None:
+        _journal(project_id, project_path, {
+            "set": [[_keys(path), value] for path, value in set_paths.items()],
+            "delete": [_keys(path) for path in delete_paths]
+        })
     return meta
+
+
+def update_meta(project_id: str, updates: Dict[str, Any], project_path: Optional[Path] = None) -> Dict[str, Any]:
+    """Sets top-level keys."""
+    return patch_meta(project_id, {(key,): value for key, value in updates.items()}, (), project_path)
+
+
+def _journal(project_id: str, project_path: Path, entry: Dict[str, Any]) -> None:
+    global _compact_timer
+    with _lock:
+        try:
+            with open(project_path / META_JOURNAL_NAME, "a", encoding="utf-8") as handle:
+                handle.write(json.dumps(entry) + "\n")
+        except Exception:
+            return
+        _pending[project_id] = project_path
+        if _compact_timer is None:
+            _compact_timer = threading.Timer(META_COMPACT_SECONDS, compact_meta_journals)
+            _compact_timer.daemon = True
+            _compact_timer.start()
+
+
+def compact_meta_journals() -> int:
+    """
+    Rewrites meta.json from the database for every project with journal
+    entries and truncates the journal. Called periodically and on shutdown.
+    Returns the number of projects compacted.
+    """
+    global _compact_timer
+    with _lock:
+        pending = list(_pending.items())
+        _pending.clear()
+        _compact_timer = None
+    compacted = 0
+    for project_id, project_path in pending:
+        meta_path = project_path / "meta.json"
+        temp_path = meta_path.with_suffix(".json.tmp")
+        # Held so no journal line lands between the snapshot and the truncate
+        with _lock:
+            try:
+                meta = _load_meta_from_db(project_id) or read_meta_file(project_path)
+                temp_path.write_text(json.dumps(meta, indent=4), encoding="utf-8")
+                temp_path.replace(meta_path)
+                (project_path / META_JOURNAL_NAME).unlink(missing_ok=True)
+                compacted += 1
+            except Exception:
+                temp_path.unlink(missing_ok=True)
+    return compacted
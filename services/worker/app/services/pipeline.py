@@ -1,12 +1,15 @@
 import asyncio
 import base64
+import itertools
 import shutil
 import re
 import os
 import random
+import time
 import httpx
 from datetime import datetime
 from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 from sqlalchemy.orm import Session
 from ..database import ProjectModel, SessionLocal
 from .meta_store import load_meta, update_meta
@@ -35,43 +38,316 @@ STAGE_SEQUENCE = [
     'Master Composition'
 ]
 
-async def execute_remaining_stages(project_id: str):
+# Artifacts (relative to the project dir) each stage consumes and produces.
+# Stage dependencies are derived from these, so stages that do not consume
+# each other's outputs can run at the same time.
+STAGE_ARTIFACTS = {
+    'Text Scrapped': {"consumes": [], "produces": ["text/story.txt"]},
+    'Text Translated': {"consumes": ["text/story.txt"], "produces": ["text/story_translated.txt"]},
+    'Speech Generated': {"consumes": ["text/story_translated.txt"], "produces": ["audio/source/full_audio.mp3", "audio/source/tts_timings.srt"]},
+    'Subtitles Created': {"consumes": ["audio/source/full_audio.mp3", "audio/source/tts_timings.srt"], "produces": ["subtitles.srt"]},
+    'Thumbnail Created': {"consumes": ["text/story_translated.txt"], "produces": ["thumbnail.png"]},
+    'Master Composition': {"consumes": ["audio/source/full_audio.mp3", "subtitles.srt"], "produces": ["video/final.mp4"]}
+}
+
+
+def _stage_dependencies(stage: str) -> List[str]:
+    consumes = STAGE_ARTIFACTS[stage]["consumes"]
+    return [
+        other for other, spec in STAGE_ARTIFACTS.items()
+        if other != stage and any(artifact in spec["produces"] for artifact in consumes)
+    ]
+
+
+STAGE_DEPENDENCIES = {stage: _stage_dependencies(stage) for stage in STAGE_ARTIFACTS}
+
+# Stages currently executing per project, used to keep the project in
+# "Processing" while sibling stages are still running.
+_ACTIVE_STAGES: Dict[str, set] = {}
+# Serializes the completedStages read-merge-write of stages finishing together
+_PROJECT_LOCKS: Dict[str, asyncio.Lock] = {}
+
+# Resource class of every stage: CPU-bound renders, network-bound API calls
+# and plain I/O work (harvesting, housekeeping).
+STAGE_RESOURCES = {
+    'Text Translated': 'network',
+    'Speech Generated': 'network',
+    'Subtitles Created': 'cpu',
+    'Thumbnail Created': 'network',
+    'Master Composition': 'cpu'
+}
+
+RESOURCE_LIMITS = {
+    'cpu': int(os.environ.get("PIPELINE_CPU_WORKERS", "2")),
+    'network': int(os.environ.get("PIPELINE_NETWORK_WORKERS", "4")),
+    'io': int(os.environ.get("PIPELINE_IO_WORKERS", "4"))
+}
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 5
+PRIORITY_LOW = 10
+
+
+class StageScheduler:
+    """
+    Bounded worker pools, one per resource class. Work is queued FIFO within
+    each priority level and run by at most RESOURCE_LIMITS[class] workers.
+    """
+
+    def __init__(self, limits: Dict[str, int]):
+        self.limits = {name: max(1, limit) for name, limit in limits.items()}
+        self._queues: Dict[str, asyncio.PriorityQueue] = {}
+        self._workers: List[asyncio.Task] = []
+        self._seq = itertools.count()
+        self._waiting: Dict[str, Dict[int, Tuple[str, int, float]]] = {name: {} for name in self.limits}
+        self._running: Dict[str, Dict[int, Tuple[str, float]]] = {name: {} for name in self.limits}
+        self._stats: Dict[str, Dict[str, float]] = {
+            name: {"completed": 0, "failed": 0, "total_wait": 0.0, "max_wait": 0.0}
+            for name in self.limits
+        }
+
+    def start(self):
+        if self._workers:
+            return
+        for name, limit in self.limits.items():
+            self._queues[name] = asyncio.PriorityQueue()
+            for _ in range(limit):
+                self._workers.append(asyncio.create_task(self._worker(name)))
+
+    async def stop(self):
+        for task in self._workers:
+            task.cancel()
+        for task in self._workers:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._workers = []
+
+    def submit(
+        self,
+        resource_class: str,
+        factory: Callable[[], Awaitable[Any]],
+        label: str,
+        priority: int = PRIORITY_NORMAL
+    ) -> asyncio.Future:
+        if resource_class not in self.limits:
+            resource_class = 'io'
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        seq = next(self._seq)
+        enqueued_at = time.monotonic()
+        self._waiting[resource_class][seq] = (label, priority, enqueued_at)
+        self._queues[resource_class].put_nowait((priority, seq, enqueued_at, label, factory, future))
+        return future
+
+    async def run(
+        self,
+        resource_class: str,
+        factory: Callable[[], Awaitable[Any]],
+        label: str,
+        priority: int = PRIORITY_NORMAL
+    ) -> Any:
+        return await self.submit(resource_class, factory, label, priority)
+
+    def schedule(
+        self,
+        resource_class: str,
+        factory: Callable[[], Awaitable[Any]],
+        label: str,
+        priority: int = PRIORITY_NORMAL
+    ) -> asyncio.Future:
+        """Fire-and-forget variant of submit; failures are only logged."""
+        future = self.submit(resource_class, factory, label, priority)
+        future.add_done_callback(_log_scheduled_failure)
+        return future
+
+    async def _worker(self, resource_class: str):
+        queue = self._queues[resource_class]
+        while True:
+            priority, seq, enqueued_at, label, factory, future = await queue.get()
+            self._waiting[resource_class].pop(seq, None)
+            if future.cancelled():
+                queue.task_done()
+                continue
+            stats = self._stats[resource_class]
+            wait = time.monotonic() - enqueued_at
+            stats["total_wait"] += wait
+            stats["max_wait"] = max(stats["max_wait"], wait)
+            self._running[resource_class][seq] = (label, time.monotonic())
+            try:
+                result = await factory()
+                stats["completed"] += 1
+                if not future.done():
+                    future.set_result(result)
+            except asyncio.CancelledError:
+                if not future.done():
+                    future.cancel()
+                raise
+            except Exception as e:
+                stats["failed"] += 1
+                if not future.done():
+                    future.set_exception(e)
+            finally:
+                self._running[resource_class].pop(seq, None)
+                queue.task_done()
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        classes = {}
+        for name, limit in self.limits.items():
+            stats = self._stats[name]
+            started = stats["completed"] + stats["failed"] + len(self._running[name])
+            waiting = sorted(self._waiting[name].values(), key=lambda item: (item[1], item[2]))
+            classes[name] = {
+                "limit": limit,
+                "running": [
+                    {"label": label, "seconds": round(now - started_at, 1)}
+                    for label, started_at in self._running[name].values()
+                ],
+                "queued": [
+                    {"label": label, "priority": priority, "wait_seconds": round(now - enqueued_at, 1)}
+                    for label, priority, enqueued_at in waiting
+                ],
+                "queue_depth": len(waiting),
+                "oldest_wait_seconds": round(max([now - item[2] for item in waiting], default=0.0), 1),
+                "avg_wait_seconds": round(stats["total_wait"] / started, 2) if started else 0.0,
+                "max_wait_seconds": round(stats["max_wait"], 2),
+                "completed": int(stats["completed"]),
+                "failed": int(stats["failed"])
+            }
+        return {"classes": classes}
+
+
+def _log_scheduled_failure(future: asyncio.Future):
+    if future.cancelled():
+        return
+    error = future.exception()
+    if error:
+        print(f"--- Scheduled work failed: {error}")
+
+
+scheduler = StageScheduler(RESOURCE_LIMITS)
+
+
+def schedule_stage(
+    project_id: str,
+    stage: str,
+    priority: int = PRIORITY_NORMAL,
+    context: Optional[Dict[str, Any]] = None
+) -> asyncio.Future:
+    return scheduler.schedule(
+        STAGE_RESOURCES.get(stage, 'io'),
+        lambda: execute_stage(project_id, stage, context),
+        f"{project_id}:{stage}",
+        priority
+    )
+
+
+async def run_stage_queued(
+    project_id: str,
+    stage: str,
+    priority: int = PRIORITY_NORMAL,
+    context: Optional[Dict[str, Any]] = None
+) -> bool:
+    return await scheduler.run(
+        STAGE_RESOURCES.get(stage, 'io'),
+        lambda: execute_stage(project_id, stage, context),
+        f"{project_id}:{stage}",
+        priority
+    )
+
+
+def _completed_stages(meta: Dict[str, Any], fallback_stage: Optional[str]) -> set:
+    """
+    Stages already done for a project. Projects created before stages were
+    tracked individually fall back to everything up to their current stage.
+    """
+    if "completedStages" in meta:
+        return set(meta.get("completedStages") or [])
+    try:
+        idx = STAGE_SEQUENCE.index(fallback_stage)
+    except ValueError:
+        idx = 0
+    return set(STAGE_SEQUENCE[:idx + 1])
+
+
+def stage_frontier(completed: set) -> str:
+    """Furthest stage in STAGE_SEQUENCE such that every stage before it is done."""
+    frontier = STAGE_SEQUENCE[0]
+    for stage in STAGE_SEQUENCE[1:]:
+        if stage not in completed:
+            break
+        frontier = stage
+    return frontier
+
+
+async def execute_remaining_stages(project_id: str, priority: int = PRIORITY_NORMAL):
+    db = SessionLocal()
+    try:
+        project = db.query(ProjectModel).filter(ProjectModel.id == project_id).first()
+        if not project:
+            return
+        completed = _completed_stages(load_meta(project_id, PROJECTS_ROOT / project_id), project.current_stage)
+    finally:
+        db.close()
+
+    pending = [
+        stage for stage in STAGE_SEQUENCE
+        if stage not in completed and stage not in ("Text Scrapped", "Master Composition")
+    ]
+    running: Dict[asyncio.Task, str] = {}
+    failed = False
+
+    while pending or running:
+        if not failed:
+            ready = [s for s in pending if all(dep in completed for dep in STAGE_DEPENDENCIES[s])]
+            for stage in ready:
+                pending.remove(stage)
+                running[asyncio.create_task(run_stage_queued(project_id, stage, priority))] = stage
+        if not running:
+            break
+        done, _ = await asyncio.wait(running.keys(), return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            stage = running.pop(task)
+            ok = False if task.exception() else bool(task.result())
+            if ok:
+                completed.add(stage)
+            else:
+                failed = True
+
+    if failed:
+        # A sibling stage may have finished after the failure and reported
+        # Success; make sure the project ends up flagged for retry.
+        _mark_project_error(project_id)
+        await broadcaster.broadcast("status_update", {"id": project_id, "status": "Error", "currentStage": stage_frontier(completed)})
+
+
+def _mark_project_error(project_id: str):
     db = SessionLocal()
     try:
         project = db.query(ProjectModel).filter(ProjectModel.id == project_id).first()
         if not project:
             return
-        current = project.current_stage
-        try:
-            idx = STAGE_SEQUENCE.index(current)
-        except:
-            idx = -1
-        stages = STAGE_SEQUENCE[idx + 1:]
-        if "Master Composition" in stages:
-            stages = stages[:stages.index("Master Composition")]
+        project.status = "Error"
+        project.updated_at = datetime.utcnow()
+        db.commit()
     finally:
         db.close()
+    update_meta(project_id, {"status": "Error"}, PROJECTS_ROOT / project_id)
 
-    for stage in stages:
-        await execute_stage(project_id, stage)
-        check_db = SessionLocal()
-        try:
-            updated = check_db.query(ProjectModel).filter(ProjectModel.id == project_id).first()
-            if not updated:
-                return
-            if updated.status == "Error":
-                break
-        finally:
-            check_db.close()
-
-async def execute_stage(project_id: str, stage: str):
+async def execute_stage(project_id: str, stage: str, context: Optional[Dict[str, Any]] = None) -> bool:
     db = SessionLocal()
+    project = None
+    success = False
+    active = _ACTIVE_STAGES.setdefault(project_id, set())
+    active.add(stage)
     try:
         project = db.query(ProjectModel).filter(ProjectModel.id == project_id).first()
-        if not project: return
+        if not project: return False
         
         p = PROJECTS_ROOT / project_id
-        previous_stage = project.current_stage
+        completed = _completed_stages(load_meta(project_id, p), project.current_stage)
         
         # Immediate feedback: show target stage and Processing status
         project.status = "Processing"
@@ -85,9 +361,6 @@ async def execute_stage(project_id: str, stage: str):
         await broadcaster.broadcast("log", {"level": "info", "message": f"Starting stage '{stage}' for project {project_id}", "project_id": project_id})
         await broadcaster.broadcast("status_update", {"id": project_id, "status": "Processing", "currentStage": stage})
         
-        success = False
-        success = False
-        
         # Node Registry
         node_map = {
             "Text Translated": TranslationNode,
@@ -100,32 +373,45 @@ async def execute_stage(project_id: str, stage: str):
         node_class = node_map.get(stage)
         if node_class:
             node = node_class()
-            success = await node.execute(p, {"project_id": project_id})
+            success = await node.execute(p, {"project_id": project_id, **(context or {})})
         else:
             print(f"--- Unknown stage: {stage}")
             await broadcaster.broadcast("log", {"level": "error", "message": f"Unknown pipeline stage: {stage}", "project_id": project_id})
             
+        # Merge with what sibling stages recorded while this one ran. No
+        # await between the read and the write, and the lock keeps finishing
+        # siblings from interleaving with it.
+        async with _PROJECT_LOCKS.setdefault(project_id, asyncio.Lock()):
+            completed |= set(load_meta(project_id, p).get("completedStages") or [])
+            if success:
+                completed.add(stage)
+                siblings_running = len(active - {stage}) > 0
+                project.status = "Processing" if siblings_running else "Success"
+            else:
+                project.status = "Error"
+                # Revert to the last fully completed stage on failure to allow retry
+                completed.discard(stage)
+            project.current_stage = stage_frontier(completed)
+            project.updated_at = datetime.utcnow()
+            db.commit()
+
+            meta = update_meta(project_id, {
+                "status": project.status,
+                "currentStage": project.current_stage,
+                "completedStages": [s for s in STAGE_SEQUENCE if s in completed]
+            }, p)
+
         if success:
-            project.status = "Success"
             print(f"--- Stage '{stage}' success")
             await broadcaster.broadcast("log", {"level": "success", "message": f"Stage '{stage}' completed successfully", "project_id": project_id})
-            duration_value = load_meta(project_id, p).get("duration")
-            payload = {"id": project_id, "status": "Success", "currentStage": stage}
-            if duration_value:
-                payload["duration"] = duration_value
+            payload = {"id": project_id, "status": project.status, "currentStage": project.current_stage}
+            if meta.get("duration"):
+                payload["duration"] = meta["duration"]
             await broadcaster.broadcast("status_update", payload)
         else:
-            project.status = "Error"
-            # Revert to previous stage on failure to allow retry
-            project.current_stage = previous_stage
             print(f"--- Stage '{stage}' failed")
             await broadcaster.broadcast("log", {"level": "error", "message": f"Stage '{stage}' failed", "project_id": project_id})
-            await broadcaster.broadcast("status_update", {"id": project_id, "status": "Error", "currentStage": previous_stage})
-        
-        project.updated_at = datetime.utcnow()
-        db.commit()
-
-        update_meta(project_id, {"status": project.status, "currentStage": project.current_stage}, p)
+            await broadcaster.broadcast("status_update", {"id": project_id, "status": "Error", "currentStage": project.current_stage})
 
     except Exception as e:
         print(f"--- Critical error in stage {stage}: {e}")
@@ -136,7 +422,11 @@ async def execute_stage(project_id: str, stage: str):
                 project.updated_at = datetime.utcnow()
                 db.commit()
             except: pass
+        success = False
     finally:
+        active.discard(stage)
+        if not active:
+            _ACTIVE_STAGES.pop(project_id, None)
+            _PROJECT_LOCKS.pop(project_id, None)
         db.close()
-
-
+    return success
@@ -0,0 +1,177 @@
+import asyncio
+import hashlib
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ..broadcaster import broadcaster
+
+DATA_ROOT = Path(os.environ.get("DATA_ROOT", "/data")).resolve()
+PROXY_ROOT = DATA_ROOT / "cache" / "proxies"
+PROXY_MAX_BYTES = int(float(os.environ.get("PROXY_CACHE_MAX_GB", "50")) * 1024 ** 3)
+PROXY_CATEGORIES = [c.strip() for c in os.environ.get("PROXY_CATEGORIES", "backgrounds").split(",") if c.strip()]
+PROXY_FPS = 30
+PROXY_GOP = PROXY_FPS  # one keyframe per second so trims can be stream-copied
+PROXY_VIDEO_EXTS = {".mp4", ".mov", ".mkv", ".webm", ".avi"}
+
+# Output profiles of MasteringNode._target_resolution
+PROXY_PROFILES: List[Tuple[int, int]] = [
+    (1080, 1920),
+    (1920, 1080),
+    (2160, 3840),
+    (3840, 2160)
+]
+
+_BUILD_LOCKS: Dict[str, asyncio.Lock] = {}
+_PENDING: set = set()
+
+
+def scale_crop_filter(target_w: int, target_h: int) -> str:
+    if target_w >= target_h:
+        return f"scale={target_w}:-2,crop={target_w}:{target_h}:(in_w-out_w)/2:(in_h-out_h)/2"
+    return f"scale=-2:{target_h},crop={target_w}:{target_h}:(in_w-out_w)/2:(in_h-out_h)/2"
+
+
+def proxy_path(src: Path, target_w: int, target_h: int) -> Optional[Path]:
+    try:
+        resolved = src.resolve()
+        stat = resolved.stat()
+    except OSError:
+        return None
+    digest = hashlib.sha1(f"{resolved}|{stat.st_size}|{stat.st_mtime}".encode("utf-8")).hexdigest()[:20]
+    return PROXY_ROOT / f"{target_w}x{target_h}" / f"{digest}.mp4"
+
+
+def get_proxy(src: Path, target_w: int, target_h: int) -> Optional[Path]:
+    """
+    Returns the ready proxy for a source clip at the given profile, marking
+    it as recently used, or None when it has not been built yet.
+    """
+    path = proxy_path(src, target_w, target_h)
+    if not path or not path.exists():
+        return None
+    try:
+        os.utime(path, None)
+    except OSError:
+        pass
+    return path
+
+
+async def ensure_proxy(src: Path, target_w: int, target_h: int) -> Optional[Path]:
+    path = proxy_path(src, target_w, target_h)
+    if not path:
+        return None
+    lock = _BUILD_LOCKS.setdefault(str(path), asyncio.Lock())
+    async with lock:
+        if path.exists():
+            return get_proxy(src, target_w, target_h)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_suffix(".tmp.mp4")
+        vf = f"{scale_crop_filter(target_w, target_h)},setsar=1,fps={PROXY_FPS},format=yuv420p"
+        cmd = [
+            "ffmpeg",
+            "-y",
+            "-i", str(src),
+            "-vf", vf,
+            "-an",
+            "-c:v", "libx264",
+            "-preset", "veryfast",
+            "-crf", "20",
+            "-pix_fmt", "yuv420p",
+            "-g", str(PROXY_GOP),
+            "-keyint_min", str(PROXY_GOP),
+            "-sc_threshold", "0",
+            "-video_track_timescale", "15360",
+            "-movflags", "+faststart",
+            str(temp_path)
+        ]
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+            _, stderr = await process.communicate()
+            if process.returncode != 0:
+                await broadcaster.broadcast("log", {
+                    "level": "error",
+                    "message": f"Proxy build failed for {src.name} ({target_w}x{target_h}): {stderr.decode(errors='ignore')[-300:]}"
+                })
+                temp_path.unlink(missing_ok=True)
+                return None
+            temp_path.replace(path)
+        except Exception as e:
+            await broadcaster.broadcast("log", {"level": "error", "message": f"Proxy build error for {src.name}: {e}"})
+            temp_path.unlink(missing_ok=True)
+            return None
+    evict_proxies()
+    return path
+
+
+def evict_proxies(max_bytes: int = PROXY_MAX_BYTES) -> int:
+    """
+    Deletes least recently used proxies until the cache fits in max_bytes.
+    Returns the number of files removed.
+    """
+    if not PROXY_ROOT.exists():
+        return 0
+    entries = []
+    total = 0
+    for path in PROXY_ROOT.rglob("*.mp4"):
+        if path.name.endswith(".tmp.mp4"):
+            continue
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+        total += stat.st_size
+    removed = 0
+    for _, size, path in sorted(entries, key=lambda e: e[0]):
+        if total <= max_bytes:
+            break
+        try:
+            path.unlink()
+            total -= size
+            removed += 1
+        except OSError:
+            continue
+    return removed
+
+
+def wants_proxy(path: Path, category: str) -> bool:
+    return category in PROXY_CATEGORIES and path.suffix.lower() in PROXY_VIDEO_EXTS
+
+
+async def build_proxy(src: Path, target_w: int, target_h: int) -> Optional[Path]:
+    try:
+        if not src.exists():
+            return None
+        return await ensure_proxy(src, target_w, target_h)
+    finally:
+        _PENDING.discard((str(src), target_w, target_h))
+
+
+def schedule_proxy_builds(sources: Iterable[Path]) -> List[asyncio.Future]:
+    """
+    Queues proxy transcodes for every output profile on the scheduler's cpu
+    pool at low priority, so they only use slots stages are not waiting
+    for. Transcodes already queued are skipped.
+    """
+    # pipeline imports the nodes, which import this module
+    from .pipeline import PRIORITY_LOW, scheduler
+
+    futures: List[asyncio.Future] = []
+    for src in sources:
+        for target_w, target_h in PROXY_PROFILES:
+            key = (str(src), target_w, target_h)
+            if key in _PENDING:
+                continue
+            _PENDING.add(key)
+            futures.append(scheduler.schedule(
+                "cpu",
+                lambda src=src, w=target_w, h=target_h: build_proxy(src, w, h),
+                f"proxy:{src.name}:{target_w}x{target_h}",
+                PRIORITY_LOW
+            ))
+    return futures
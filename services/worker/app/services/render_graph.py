@@ -0,0 +1,70 @@
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+
+class RenderGraph:
+    """
+    Collects ffmpeg inputs and filter_complex chains so a whole composition
+    can be rendered with a single encode.
+    """
+
+    def __init__(self):
+        self.inputs: List[List[str]] = []
+        self.filters: List[str] = []
+        self._label_count = 0
+
+    def add_input(self, path: Path, options: Optional[List[str]] = None) -> int:
+        self.inputs.append([*(options or []), "-i", str(path)])
+        return len(self.inputs) - 1
+
+    def add_filter(self, expression: str, label: Optional[str] = None) -> str:
+        if not label:
+            self._label_count += 1
+            label = f"n{self._label_count}"
+        self.filters.append(f"{expression}[{label}]")
+        return label
+
+    def join(self, parts: List[Tuple[str, float]], transition: Optional[str] = None, transition_duration: float = 0.0) -> str:
+        """
+        Joins video labels in order, either with hard cuts (concat filter)
+        or with an xfade chain. Returns the label of the joined stream.
+        """
+        if len(parts) == 1:
+            return parts[0][0]
+        if not transition:
+            inputs = "".join(f"[{label}]" for label, _ in parts)
+            return self.add_filter(f"{inputs}concat=n={len(parts)}:v=1:a=0")
+
+        chain = parts[0][0]
+        offset = parts[0][1] - transition_duration
+        for label, duration in parts[1:]:
+            chain = self.add_filter(
+                f"[{chain}][{label}]xfade=transition={transition}:duration={transition_duration}:offset={offset:.2f}"
+            )
+            offset += duration - transition_duration
+        return chain
+
+    def filter_complex(self) -> str:
+        return ";".join(self.filters)
+
+    def command(
+        self,
+        maps: List[str],
+        output_args: List[str],
+        output_path: Path,
+        extra_outputs: Optional[List[Tuple[List[str], List[str], Path]]] = None
+    ) -> List[str]:
+        """
+        Builds the ffmpeg command. extra_outputs are further (maps, args,
+        path) outputs written by the same run.
+        """
+        cmd = ["ffmpeg", "-y"]
+        for input_args in self.inputs:
+            cmd += input_args
+        cmd += ["-filter_complex", self.filter_complex()]
+        for output_maps, args, path in [(maps, output_args, output_path), *(extra_outputs or [])]:
+            for label in output_maps:
+                cmd += ["-map", f"[{label}]"]
+            cmd += args
+            cmd.append(str(path))
+        return cmd
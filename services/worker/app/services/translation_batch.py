@@ -0,0 +1,222 @@
+import asyncio
+import json
+import os
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import func
+
+from ..broadcaster import broadcaster
+from ..database import ProjectModel, SessionLocal
+from ..nodes.translation import TRANSLATION_MODEL, TRANSLATION_PROMPT_VERSION, build_translation_request
+from .translation_cache import get_cached_translation
+from .meta_store import load_meta, patch_meta, update_meta
+from .clients import clients
+from .pipeline import PRIORITY_LOW, schedule_stage
+
+DATA_ROOT = Path(os.environ.get("DATA_ROOT", "/data")).resolve()
+PROJECTS_ROOT = DATA_ROOT / "projects"
+BATCH_ROOT = DATA_ROOT / "cache" / "batches"
+BATCH_POLL_SECONDS = float(os.environ.get("OPENAI_BATCH_POLL_SECONDS", "30"))
+BATCH_MAX_REQUESTS = int(os.environ.get("OPENAI_BATCH_MAX_REQUESTS", "500"))
+BATCH_TERMINAL = {"completed", "failed", "expired", "cancelled"}
+BATCH_ENDPOINT = "/v1/chat/completions"
+
+_TASKS: set = set()
+
+
+def collect_pending_projects(project_ids: Optional[Iterable[str]] = None) -> List[str]:
+    """
+    Projects still waiting for translation: scraped, idle, not already in
+    a submitted batch and without a translated story. Limited to
+    project_ids when given.
+    """
+    db = SessionLocal()
+    try:
+        query = db.query(ProjectModel).filter(
+            ProjectModel.current_stage == "Text Scrapped",
+            func.json_extract(ProjectModel.meta_json, "$.translationBatch").is_(None)
+        )
+        if project_ids is not None:
+            query = query.filter(ProjectModel.id.in_(list(project_ids)))
+        candidates = [p.id for p in query.all() if p.status not in ("Processing", "Queued")]
+    finally:
+        db.close()
+    return [
+        pid for pid in candidates
+        if (PROJECTS_ROOT / pid / "text" / "story.txt").exists()
+        and not (PROJECTS_ROOT / pid / "text" / "story_translated.txt").exists()
+    ]
+
+
+async def translate_projects_batch(project_ids: Optional[Iterable[str]] = None):
+    pending = []
+    for pid in collect_pending_projects(project_ids):
+        p = PROJECTS_ROOT / pid
+        cached = get_cached_translation(
+            TRANSLATION_MODEL,
+            TRANSLATION_PROMPT_VERSION,
+            (p / "text" / "story.txt").read_text(encoding="utf-8"),
+            load_meta(pid, p).get("title", "")
+        )
+        if cached is not None:
+            schedule_stage(pid, "Text Translated", context={"translation": cached})
+        else:
+            pending.append(pid)
+    if not pending:
+        return
+    client = clients.openai()
+    if client is None:
+        print("Batch translation unavailable (missing OPENAI_API_KEY or openai), using realtime stages")
+        for pid in pending:
+            schedule_stage(pid, "Text Translated", PRIORITY_LOW)
+        return
+    for start in range(0, len(pending), BATCH_MAX_REQUESTS):
+        await _run_batch(client, pending[start:start + BATCH_MAX_REQUESTS])
+
+
+async def _run_batch(client, project_ids: List[str]):
+    lines = []
+    for pid in project_ids:
+        p = PROJECTS_ROOT / pid
+        meta = load_meta(pid, p)
+        text = (p / "text" / "story.txt").read_text(encoding="utf-8")
+        body = build_translation_request(meta.get("title", ""), text)
+        lines.append(json.dumps({"custom_id": pid, "method": "POST", "url": BATCH_ENDPOINT, "body": body}, ensure_ascii=False))
+
+    BATCH_ROOT.mkdir(parents=True, exist_ok=True)
+    input_path = BATCH_ROOT / f"translation_{uuid.uuid4().hex[:8]}.jsonl"
+    input_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    try:
+        payload = (input_path.name, input_path.read_bytes())
+        uploaded = await clients.call_openai(lambda: client.files.create(file=payload, purpose="batch"))
+        batch = await clients.call_openai(lambda: client.batches.create(
+            input_file_id=uploaded.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window="24h"
+        ))
+        print(f"Translation batch {batch.id} submitted with {len(project_ids)} projects")
+        for pid in project_ids:
+            update_meta(pid, {"translationBatch": batch.id}, PROJECTS_ROOT / pid)
+            await broadcaster.broadcast("log", {
+                "level": "info",
+                "message": f"Queued for batch translation ({batch.id})",
+                "project_id": pid
+            })
+    except Exception as e:
+        print(f"Translation batch failed: {e}")
+        await _finish_batch(project_ids, {})
+        return
+    finally:
+        input_path.unlink(missing_ok=True)
+    await _await_batch(client, batch, project_ids)
+
+
+async def _await_batch(client, batch, project_ids: List[str]):
+    """Polls a submitted batch until it ends and hands its results to the stages."""
+    results: Dict[str, Dict[str, Any]] = {}
+    try:
+        while batch.status not in BATCH_TERMINAL:
+            await asyncio.sleep(BATCH_POLL_SECONDS)
+            batch_id = batch.id
+            batch = await clients.call_openai(lambda: client.batches.retrieve(batch_id))
+        print(f"Translation batch {batch.id} finished: {batch.status}")
+
+        if batch.output_file_id:
+            output_id = batch.output_file_id
+            content = await clients.call_openai(lambda: client.files.content(output_id))
+            results = _parse_batch_output(content.text)
+    except Exception as e:
+        print(f"Translation batch failed: {e}")
+    await _finish_batch(project_ids, results)
+
+
+async def _finish_batch(project_ids: List[str], results: Dict[str, Dict[str, Any]]):
+    for pid in project_ids:
+        patch_meta(pid, delete_paths=["translationBatch"], project_path=PROJECTS_ROOT / pid)
+        if pid in results:
+            schedule_stage(pid, "Text Translated", context={"translation": results[pid]})
+        else:
+            # Missing or failed in the batch: translate it on its own
+            await broadcaster.broadcast("log", {
+                "level": "error",
+                "message": "Batch translation missing, retrying as a realtime request",
+                "project_id": pid
+            })
+            schedule_stage(pid, "Text Translated", PRIORITY_LOW)
+
+
+def _parse_batch_output(raw: str) -> Dict[str, Dict[str, Any]]:
+    results: Dict[str, Dict[str, Any]] = {}
+    for line in raw.splitlines():
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+            response = item.get("response") or {}
+            if response.get("status_code") != 200:
+                continue
+            content = response["body"]["choices"][0]["message"]["content"]
+            results[item["custom_id"]] = json.loads(content)
+        except Exception as e:
+            print(f"Skipping unreadable batch result: {e}")
+    return results
+
+
+def schedule_translation_batch(project_ids: Optional[Iterable[str]] = None) -> asyncio.Task:
+    """
+    Runs a batch translation in the background; it may poll for hours, so
+    it does not hold a pipeline worker slot.
+    """
+    task = asyncio.create_task(translate_projects_batch(list(project_ids) if project_ids is not None else None))
+    _TASKS.add(task)
+    task.add_done_callback(_batch_done)
+    return task
+
+
+async def _resume_batch(client, batch_id: str, project_ids: List[str]):
+    try:
+        batch = await clients.call_openai(lambda: client.batches.retrieve(batch_id))
+    except Exception as e:
+        print(f"Translation batch {batch_id} could not be resumed: {e}")
+        await _finish_batch(project_ids, {})
+        return
+    print(f"Resuming translation batch {batch_id} for {len(project_ids)} projects")
+    await _await_batch(client, batch, project_ids)
+
+
+def resume_translation_batches() -> List[asyncio.Task]:
+    """
+    Picks up polling for batches submitted before a restart, found through
+    the translationBatch id left in the project metas.
+    """
+    db = SessionLocal()
+    try:
+        batch_id = func.json_extract(ProjectModel.meta_json, "$.translationBatch")
+        rows = db.query(ProjectModel.id, batch_id).filter(batch_id.isnot(None)).all()
+    finally:
+        db.close()
+    batches: Dict[str, List[str]] = {}
+    for pid, bid in rows:
+        batches.setdefault(bid, []).append(pid)
+    if not batches:
+        return []
+
+    client = clients.openai()
+    tasks = []
+    for bid, project_ids in batches.items():
+        if client is None:
+            task = asyncio.create_task(_finish_batch(project_ids, {}))
+        else:
+            task = asyncio.create_task(_resume_batch(client, bid, project_ids))
+        _TASKS.add(task)
+        task.add_done_callback(_batch_done)
+        tasks.append(task)
+    return tasks
+
+
+def _batch_done(task: asyncio.Task):
+    _TASKS.discard(task)
+    if not task.cancelled() and task.exception():
+        print(f"Translation batch task failed: {task.exception()}")
@@ -0,0 +1,87 @@
+import hashlib
+from typing import Any, Dict, Optional
+
+from ..database import SessionLocal, TranslationCacheModel
+
+
+def source_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def cache_key(model: str, prompt_version: str, text: str, title: str) -> str:
+    return hashlib.sha256(
+        "\n".join([model, prompt_version, source_hash(text), title or ""]).encode("utf-8")
+    ).hexdigest()
+
+
+def get_cached_translation(model: str, prompt_version: str, text: str, title: str) -> Optional[Dict[str, Any]]:
+    """
+    Returns a previous translation of the same story with the same model
+    and prompt version, shaped like the LLM response.
+    """
+    db = SessionLocal()
+    try:
+        row = db.query(TranslationCacheModel).filter(
+            TranslationCacheModel.id == cache_key(model, prompt_version, text, title)
+        ).first()
+        if not row:
+            return None
+        return {
+            "translation_es": row.translation_es,
+            "title_es": row.title_es,
+            "narrator_gender": row.narrator_gender
+        }
+    except Exception as e:
+        print(f"Translation cache read failed: {e}")
+        return None
+    finally:
+        db.close()
+
+
+def store_translation(model: str, prompt_version: str, text: str, title: str, data: Dict[str, Any]):
+    key = cache_key(model, prompt_version, text, title)
+    db = SessionLocal()
+    try:
+        row = db.query(TranslationCacheModel).filter(TranslationCacheModel.id == key).first()
+        if not row:
+            row = TranslationCacheModel(id=key)
+            db.add(row)
+        row.model = model
+        row.prompt_version = prompt_version
+        row.source_hash = source_hash(text)
+        row.title = title
+        row.translation_es = data["translation_es"]
+        row.title_es = data.get("title_es")
+        row.narrator_gender = data.get("narrator_gender")
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"Translation cache write failed: {e}")
+    finally:
+        db.close()
+
+
+def invalidate_translations(
+    model: Optional[str] = None,
+    prompt_version: Optional[str] = None,
+    keep_version: Optional[str] = None
+) -> int:
+    """
+    Deletes cached translations matching model and/or prompt_version, or
+    every version except keep_version. No filters clears the whole cache.
+    Returns the number of entries removed.
+    """
+    db = SessionLocal()
+    try:
+        query = db.query(TranslationCacheModel)
+        if model:
+            query = query.filter(TranslationCacheModel.model == model)
+        if prompt_version:
+            query = query.filter(TranslationCacheModel.prompt_version == prompt_version)
+        if keep_version:
+            query = query.filter(TranslationCacheModel.prompt_version != keep_version)
+        removed = query.delete(synchronize_session=False)
+        db.commit()
+        return removed
+    finally:
+        db.close()
@@ -0,0 +1,159 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Optional, Tuple
+
+from . import tts_engine
+from .media_probe import get_media_duration
+
+DATA_ROOT = Path(os.environ.get("DATA_ROOT", "/data")).resolve()
+TTS_CACHE_ROOT = DATA_ROOT / "cache" / "tts"
+TTS_CACHE_MAX_BYTES = int(float(os.environ.get("TTS_CACHE_MAX_GB", "2")) * 1024 ** 3)
+
+# Every entry is <key>.mp3 + <key>.srt (cue timings) + <key>.json (voice
+# and duration). The json file's mtime is the entry's last use, so the
+# audio mtime (and its media probe) stays untouched.
+
+# Running total of the cache size, so recording a chunk doesn't walk the
+# whole cache. Set by each full scan in evict_tts_cache; None until then.
+_cache_bytes: Optional[int] = None
+
+
+def chunk_key(voice: str, text: str) -> str:
+    return hashlib.sha256(f"{voice}\n{text.strip()}".encode("utf-8")).hexdigest()
+
+
+def chunk_paths(voice: str, text: str) -> Tuple[Path, Path]:
+    """
+    Audio and cue-timing paths of a synthesized (voice, text) chunk.
+    """
+    key = chunk_key(voice, text)
+    base = TTS_CACHE_ROOT / key[:2] / key
+    return base.with_suffix(".mp3"), base.with_suffix(".srt")
+
+
+def _info_path(audio: Path) -> Path:
+    return audio.with_suffix(".json")
+
+
+def get_chunk(voice: str, text: str) -> Optional[Tuple[Path, Path]]:
+    audio, timings = chunk_paths(voice, text)
+    if not audio.exists() or audio.stat().st_size == 0 or not timings.exists():
+        return None
+    info = _info_path(audio)
+    try:
+        if info.exists():
+            os.utime(info, None)
+    except OSError:
+        pass
+    return audio, timings
+
+
+def cached_duration(voice: str, text: str) -> Optional[float]:
+    audio, _ = chunk_paths(voice, text)
+    try:
+        return float(json.loads(_info_path(audio).read_text(encoding="utf-8"))["duration"])
+    except Exception:
+        return None
+
+
+async def record_chunk(voice: str, text: str) -> Optional[float]:
+    """
+    Stores the duration of a freshly synthesized entry and trims the cache.
+    Returns the duration.
+    """
+    audio, _ = chunk_paths(voice, text)
+    duration = await get_media_duration(audio)
+    if duration is None:
+        return None
+    _info_path(audio).write_text(json.dumps({"voice": voice, "chars": len(text), "duration": duration}), encoding="utf-8")
+    _track_entry(audio)
+    return duration
+
+
+def _track_entry(audio: Path):
+    """Adds a new entry to the running size; scans only once over the limit."""
+    global _cache_bytes
+    if _cache_bytes is not None:
+        for path in (audio, audio.with_suffix(".srt"), _info_path(audio)):
+            try:
+                _cache_bytes += path.stat().st_size
+            except OSError:
+                continue
+    if _cache_bytes is None or _cache_bytes > TTS_CACHE_MAX_BYTES:
+        evict_tts_cache()
+
+
+async def synthesize_phrase(text: str, voice: str) -> Optional[Tuple[Path, float]]:
+    """
+    Returns the cached audio and duration of a phrase, synthesizing it on
+    a miss. Identical intros/outros are synthesized once across projects.
+    """
+    cached = get_chunk(voice, text)
+    if cached:
+        duration = cached_duration(voice, text)
+        if duration is None:
+            duration = await record_chunk(voice, text)
+        if duration is not None:
+            return cached[0], duration
+
+    audio, timings = chunk_paths(voice, text)
+    audio.parent.mkdir(parents=True, exist_ok=True)
+    temp_audio = audio.with_suffix(".tmp.mp3")
+    temp_timings = timings.with_suffix(".tmp.srt")
+    try:
+        await tts_engine.synthesize(text, voice, temp_audio, temp_timings)
+        temp_timings.replace(timings)
+        temp_audio.replace(audio)
+    except Exception as e:
+        print(f"TTS phrase synthesis failed ({voice}): {e}")
+        return None
+    finally:
+        temp_audio.unlink(missing_ok=True)
+        temp_timings.unlink(missing_ok=True)
+    duration = await record_chunk(voice, text)
+    if duration is None:
+        return None
+    return audio, duration
+
+
+def evict_tts_cache(max_bytes: int = TTS_CACHE_MAX_BYTES) -> int:
+    """
+    Deletes least recently used entries until the cache fits in max_bytes.
+    Returns the number of entries removed.
+    """
+    global _cache_bytes
+    if not TTS_CACHE_ROOT.exists():
+        _cache_bytes = 0
+        return 0
+    entries = []
+    total = 0
+    for audio in TTS_CACHE_ROOT.rglob("*.mp3"):
+        if audio.name.endswith(".tmp.mp3"):
+            continue
+        files = [audio, audio.with_suffix(".srt"), _info_path(audio)]
+        size = 0
+        last_used = 0.0
+        for path in files:
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            size += stat.st_size
+            last_used = max(last_used, stat.st_mtime)
+        entries.append((last_used, size, files))
+        total += size
+    removed = 0
+    for _, size, files in sorted(entries, key=lambda e: e[0]):
+        if total <= max_bytes:
+            break
+        for path in files:
+            try:
+                path.unlink(missing_ok=True)
+            except OSError:
+                continue
+        total -= size
+        removed += 1
+    _cache_bytes = total
+    return removed
@@ -0,0 +1,143 @@
+import asyncio
+import os
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from ..utils.cues import format_srt
+
+try:
+    import edge_tts
+except ImportError:
+    edge_tts = None
+
+# Concurrent syntheses across every node sharing the engine
+TTS_ENGINE_CONCURRENCY = max(1, int(os.environ.get("TTS_ENGINE_CONCURRENCY", "8")))
+TTS_TIMEOUT = 120
+# Older edge-tts releases only emit word boundaries; they are grouped into
+# cues of at most this many words (or up to sentence punctuation).
+WORDS_PER_CUE = 10
+TICKS_PER_SECOND = 10_000_000
+
+_slots: Optional[asyncio.Semaphore] = None
+
+
+class TTSError(Exception):
+    pass
+
+
+def _engine_slots() -> asyncio.Semaphore:
+    global _slots
+    if _slots is None:
+        _slots = asyncio.Semaphore(TTS_ENGINE_CONCURRENCY)
+    return _slots
+
+
+def _boundaries_to_cues(boundaries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    cues: List[Dict[str, Any]] = []
+    words: List[Dict[str, Any]] = []
+
+    def flush():
+        if words:
+            cues.append({
+                "start": words[0]["start"],
+                "end": words[-1]["end"],
+                "text": " ".join(w["text"] for w in words)
+            })
+            words.clear()
+
+    for boundary in boundaries:
+        start = boundary["offset"] / TICKS_PER_SECOND
+        entry = {"start": start, "end": start + boundary["duration"] / TICKS_PER_SECOND, "text": boundary["text"]}
+        if boundary["type"] != "WordBoundary":
+            cues.append(entry)
+            continue
+        words.append(entry)
+        if len(words) >= WORDS_PER_CUE or re.search(r"[.!?…]$", entry["text"]):
+            flush()
+    flush()
+    return cues
+
+
+async def synthesize(
+    text: str,
+    voice: str,
+    audio_path: Path,
+    timings_path: Optional[Path] = None,
+    timeout: float = TTS_TIMEOUT
+):
+    """
+    Synthesizes text in-process, streaming audio chunks straight into
+    audio_path and writing cue timings as SRT when timings_path is given.
+    Falls back to the edge-tts CLI when the module is not installed.
+    Raises TTSError on failure.
+    """
+    async with _engine_slots():
+        if edge_tts is None:
+            await synthesize_cli(text, voice, audio_path, timings_path, timeout)
+            return
+        try:
+            await asyncio.wait_for(_stream(text, voice, audio_path, timings_path), timeout=timeout)
+        except asyncio.TimeoutError:
+            raise TTSError("timed out")
+        except TTSError:
+            raise
+        except Exception as e:
+            raise TTSError(str(e) or type(e).__name__)
+
+
+async def _stream(text: str, voice: str, audio_path: Path, timings_path: Optional[Path]):
+    communicate = edge_tts.Communicate(text, voice)
+    boundaries: List[Dict[str, Any]] = []
+    received = 0
+    with open(audio_path, "wb") as audio:
+        async for chunk in communicate.stream():
+            if chunk["type"] == "audio":
+                audio.write(chunk["data"])
+                received += len(chunk["data"])
+            elif chunk["type"] in ("WordBoundary", "SentenceBoundary"):
+                boundaries.append(chunk)
+    if not received:
+        raise TTSError("no audio received")
+    if timings_path:
+        cues = _boundaries_to_cues(boundaries)
+        timings_path.write_text(format_srt(cues) if cues else "", encoding="utf-8")
+
+
+async def synthesize_cli(
+    text: str,
+    voice: str,
+    audio_path: Path,
+    timings_path: Optional[Path] = None,
+    timeout: float = TTS_TIMEOUT
+):
+    """
+    One edge-tts subprocess per synthesis. Kept as the fallback path and
+    as the baseline of scripts/bench_tts_engine.py.
+    """
+    cmd = [
+        "edge-tts",
+        "--voice", voice,
+        f"--text={text}",
+        "--write-media", str(audio_path)
+    ]
+    if timings_path:
+        cmd += ["--write-subtitles", str(timings_path)]
+    process = None
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        _, stderr = await asyncio.wait_for(process.communicate(), timeout=timeout)
+    except asyncio.TimeoutError:
+        if process and process.returncode is None:
+            process.kill()
+        raise TTSError("timed out")
+    except Exception as e:
+        raise TTSError(str(e))
+    if process.returncode != 0 or not audio_path.exists() or audio_path.stat().st_size == 0:
+        raise TTSError(stderr.decode(errors="ignore") or "no audio produced")
+    if timings_path and not timings_path.exists():
+        timings_path.write_text("", encoding="utf-8")
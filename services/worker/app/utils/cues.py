@@ -0,0 +1,56 @@
+import re
+from typing import Any, Dict, List
+
+
+def parse_cue_time(value: str) -> float:
+    """
+    Parses "00:00:01,250", "00:00:01.250" or "00:01.250", ignoring any
+    trailing WebVTT cue settings.
+    """
+    parts = value.strip().split(" ")[0].replace(",", ".").split(":")
+    seconds = 0.0
+    for part in parts:
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+
+def parse_cues(text: str) -> List[Dict[str, Any]]:
+    """
+    Reads SRT or WebVTT cues into {start, end, text} entries.
+    """
+    entries = []
+    for block in re.split(r"\n\s*\n", text.replace("\r\n", "\n").strip()):
+        lines = [l.strip() for l in block.splitlines() if l.strip()]
+        for idx, line in enumerate(lines):
+            if "-->" not in line:
+                continue
+            try:
+                start, end = [parse_cue_time(v) for v in line.split("-->")]
+            except (ValueError, IndexError):
+                break
+            caption = " ".join(lines[idx + 1:]).strip()
+            if caption and end > start:
+                entries.append({"start": start, "end": end, "text": caption})
+            break
+    return entries
+
+
+def format_cue_time(seconds: float) -> str:
+    if seconds < 0:
+        seconds = 0
+    total = int(seconds)
+    ms = int(round((seconds - total) * 1000))
+    if ms == 1000:
+        total += 1
+        ms = 0
+    return f"{total // 3600:02d}:{(total % 3600) // 60:02d}:{total % 60:02d},{ms:03d}"
+
+
+def format_srt(entries: List[Dict[str, Any]]) -> str:
+    out_lines = []
+    for idx, entry in enumerate(entries, start=1):
+        out_lines.append(str(idx))
+        out_lines.append(f"{format_cue_time(entry['start'])} --> {format_cue_time(entry['end'])}")
+        out_lines.append(entry["text"])
+        out_lines.append("")
+    return "\n".join(out_lines).strip() + "\n"
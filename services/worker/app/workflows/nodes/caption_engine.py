@@ -13,6 +13,10 @@ class CaptionEngineNode(WorkflowNodeDefinition):
                 { "label": "Standard (Lines)", "value": "line" },
                 { "label": "Word by Word", "value": "word" }
             ]},
+            { "id": "subtitle_source", "label": "Subtitle Timing", "type": "select", "defaultValue": "tts", "options": [
+                { "label": "Speech Timings (Whisper fallback)", "value": "tts" },
+                { "label": "Whisper Transcription", "value": "whisper" }
+            ]},
             { "id": "style", "label": "Display Style", "type": "select", "defaultValue": "modern", "options": [
                 { "label": "Modern (Clean)", "value": "modern" },
                 { "label": "Dynamic (Pop)", "value": "dynamic" }
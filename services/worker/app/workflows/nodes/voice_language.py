@@ -24,6 +24,10 @@ class VoiceLanguageNode(WorkflowNodeDefinition):
                 { "label": "Auto Detect", "value": "auto" },
                 { "label": "Male", "value": "male" },
                 { "label": "Female", "value": "female" }
+            ]},
+            { "id": "translation_mode", "label": "Translation Mode", "type": "select", "defaultValue": "realtime", "options": [
+                { "label": "Realtime (per project)", "value": "realtime" },
+                { "label": "Batch (cheaper, slower)", "value": "batch" }
             ]}
         ]
 
@@ -0,0 +1,59 @@
+"""
+Compares the in-process edge-tts engine with one CLI subprocess per call.
+
+Usage (from services/worker):
+    python -m scripts.bench_tts_engine [--voice es-ES-AlvaroNeural] [--phrases 8] [--concurrency 4]
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+from app.services import tts_engine
+
+PHRASES = [
+    "Hola, bienvenidos a una nueva historia.",
+    "Esto ocurrió hace unos años, cuando todavía vivía en la ciudad.",
+    "Nadie esperaba lo que pasó aquella noche.",
+    "Gracias por escuchar, nos vemos en el próximo vídeo."
+]
+
+
+async def run_batch(label: str, synth, voice: str, count: int, concurrency: int, out_dir: Path) -> float:
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one(idx: int):
+        async with slots:
+            text = f"{PHRASES[idx % len(PHRASES)]} ({idx})"
+            await synth(text, voice, out_dir / f"{label}_{idx}.mp3", out_dir / f"{label}_{idx}.srt")
+
+    started = time.monotonic()
+    await asyncio.gather(*[one(idx) for idx in range(count)])
+    return time.monotonic() - started
+
+
+async def run(voice: str, count: int, concurrency: int):
+    if tts_engine.edge_tts is None:
+        raise SystemExit("edge_tts is not installed; the engine would fall back to the CLI")
+    with tempfile.TemporaryDirectory() as tmp:
+        out_dir = Path(tmp)
+        cli = await run_batch("cli", tts_engine.synthesize_cli, voice, count, concurrency, out_dir)
+        engine = await run_batch("engine", tts_engine.synthesize, voice, count, concurrency, out_dir)
+    print(f"{count} phrases, concurrency {concurrency}, voice {voice}")
+    print(f"subprocess: {cli:6.2f}s  ({cli / count:.2f}s per phrase)")
+    print(f"in-process: {engine:6.2f}s  ({engine / count:.2f}s per phrase)")
+    print(f"speedup   : {cli / engine:.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--voice", default="es-ES-AlvaroNeural")
+    parser.add_argument("--phrases", type=int, default=8)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+    asyncio.run(run(args.voice, args.phrases, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
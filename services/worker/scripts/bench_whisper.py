@@ -0,0 +1,58 @@
+"""
+Compares single-process Whisper transcription with the chunked mode.
+
+Usage (from services/worker):
+    python -m scripts.bench_whisper path/to/narration.mp3 [--chunk 120] [--workers 4]
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from app.nodes.subtitles import SubtitlesNode, WHISPER_CHUNK_SECONDS, WHISPER_WORKERS
+from app.services.media_probe import get_media_duration
+
+
+async def run(audio: Path, chunk_seconds: float, workers: int):
+    model_path = os.environ.get("WHISPER_MODEL_PATH", "/opt/whisper.cpp/models/ggml-small.bin")
+    node = SubtitlesNode()
+    duration = await get_media_duration(audio)
+    if not duration:
+        raise SystemExit(f"Unable to read duration of {audio}")
+    print(f"{audio.name}: {duration:.1f}s, chunk={chunk_seconds:.0f}s workers={workers}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        project_path = Path(tmp) / "bench"
+        (project_path / "audio").mkdir(parents=True)
+        local_audio = project_path / "audio" / audio.name
+        shutil.copy2(audio, local_audio)
+
+        started = time.monotonic()
+        single = await node._transcribe("bench", model_path, local_audio, project_path / "single", os.cpu_count())
+        single_time = time.monotonic() - started
+
+        started = time.monotonic()
+        chunked = await node._transcribe_chunked(project_path, local_audio, model_path, duration, chunk_seconds, workers)
+        chunked_time = time.monotonic() - started
+
+    single_entries = len(node._parse_srt_entries(single or ""))
+    chunked_entries = len(node._parse_srt_entries(chunked or ""))
+    print(f"single : {single_time:7.1f}s  {single_entries} entries  ({duration / single_time:.1f}x realtime)")
+    print(f"chunked: {chunked_time:7.1f}s  {chunked_entries} entries  ({duration / chunked_time:.1f}x realtime)")
+    print(f"speedup: {single_time / chunked_time:.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("audio", type=Path)
+    parser.add_argument("--chunk", type=float, default=WHISPER_CHUNK_SECONDS or 120.0)
+    parser.add_argument("--workers", type=int, default=WHISPER_WORKERS)
+    args = parser.parse_args()
+    asyncio.run(run(args.audio, args.chunk, args.workers))
+
+
+if __name__ == "__main__":
+    main()
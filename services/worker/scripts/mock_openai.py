@@ -0,0 +1,159 @@
+"""
+Minimal local stand-in for the OpenAI files, batches and chat completions
+endpoints used by the translation node and batch translator.
+
+Usage (from services/worker):
+    uvicorn scripts.mock_openai:app --port 8787
+    OPENAI_BASE_URL=http://localhost:8787/v1 OPENAI_API_KEY=mock OPENAI_BATCH_POLL_SECONDS=1 ...
+
+Batches complete on their first retrieve. Translations echo the source
+text with a "[es]" prefix, as JSON or plain text depending on whether the
+request asks for a json_object, and as server-sent events when streamed.
+"""
+import json
+import re
+import time
+import uuid
+from typing import Any, Dict
+
+from fastapi import FastAPI, File, Form, HTTPException, Request, UploadFile
+from fastapi.responses import PlainTextResponse, StreamingResponse
+
+app = FastAPI(title="Mock OpenAI")
+FILES: Dict[str, Dict[str, Any]] = {}
+BATCHES: Dict[str, Dict[str, Any]] = {}
+
+
+def _fake_translation(body: Dict[str, Any]) -> Dict[str, Any]:
+    prompt = body["messages"][-1]["content"]
+    title = re.search(r"Story Title: (.*)", prompt)
+    story = prompt.split("Story Body:", 1)[-1].strip()
+    if body.get("response_format", {}).get("type") == "json_object":
+        content = json.dumps({
+            "narrator_gender": "unknown",
+            "translation_es": f"[es] {story}",
+            "title_es": f"[es] {title.group(1).strip() if title else ''}"
+        }, ensure_ascii=False)
+    else:
+        content = f"[es] {story}"
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "mock"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop"
+        }],
+        "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(story) // 4, "total_tokens": (len(prompt) + len(story)) // 4}
+    }
+
+
+def _file_object(file_id: str) -> Dict[str, Any]:
+    entry = FILES[file_id]
+    return {
+        "id": file_id,
+        "object": "file",
+        "bytes": len(entry["content"]),
+        "created_at": entry["created_at"],
+        "filename": entry["filename"],
+        "purpose": entry["purpose"],
+        "status": "processed"
+    }
+
+
+def _stream_events(completion: Dict[str, Any]):
+    content = completion["choices"][0]["message"]["content"]
+    for start in range(0, len(content), 64):
+        chunk = {
+            "id": completion["id"],
+            "object": "chat.completion.chunk",
+            "created": completion["created"],
+            "model": completion["model"],
+            "choices": [{"index": 0, "delta": {"content": content[start:start + 64]}, "finish_reason": None}]
+        }
+        yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+    yield "data: [DONE]\n\n"
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    completion = _fake_translation(body)
+    if body.get("stream"):
+        return StreamingResponse(_stream_events(completion), media_type="text/event-stream")
+    return completion
+
+
+@app.post("/v1/files")
+async def upload_file(file: UploadFile = File(...), purpose: str = Form(...)):
+    file_id = f"file-{uuid.uuid4().hex[:12]}"
+    FILES[file_id] = {
+        "content": await file.read(),
+        "filename": file.filename or "upload.jsonl",
+        "purpose": purpose,
+        "created_at": int(time.time())
+    }
+    return _file_object(file_id)
+
+
+@app.get("/v1/files/{file_id}/content")
+def file_content(file_id: str):
+    if file_id not in FILES:
+        raise HTTPException(status_code=404, detail="File not found")
+    return PlainTextResponse(FILES[file_id]["content"].decode("utf-8"))
+
+
+@app.post("/v1/batches")
+async def create_batch(request: Request):
+    payload = await request.json()
+    if payload.get("input_file_id") not in FILES:
+        raise HTTPException(status_code=404, detail="Input file not found")
+    batch_id = f"batch_{uuid.uuid4().hex[:12]}"
+    BATCHES[batch_id] = {
+        "id": batch_id,
+        "object": "batch",
+        "endpoint": payload.get("endpoint"),
+        "errors": None,
+        "input_file_id": payload["input_file_id"],
+        "completion_window": payload.get("completion_window", "24h"),
+        "status": "validating",
+        "output_file_id": None,
+        "error_file_id": None,
+        "created_at": int(time.time()),
+        "request_counts": {"total": 0, "completed": 0, "failed": 0}
+    }
+    return BATCHES[batch_id]
+
+
+@app.get("/v1/batches/{batch_id}")
+def retrieve_batch(batch_id: str):
+    batch = BATCHES.get(batch_id)
+    if not batch:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    if batch["status"] != "completed":
+        lines = FILES[batch["input_file_id"]]["content"].decode("utf-8").splitlines()
+        output = []
+        for line in filter(None, lines):
+            item = json.loads(line)
+            output.append(json.dumps({
+                "id": f"batch_req_{uuid.uuid4().hex[:12]}",
+                "custom_id": item["custom_id"],
+                "response": {"status_code": 200, "request_id": uuid.uuid4().hex, "body": _fake_translation(item["body"])},
+                "error": None
+            }, ensure_ascii=False))
+        output_id = f"file-{uuid.uuid4().hex[:12]}"
+        FILES[output_id] = {
+            "content": ("\n".join(output) + "\n").encode("utf-8"),
+            "filename": f"{batch_id}_output.jsonl",
+            "purpose": "batch_output",
+            "created_at": int(time.time())
+        }
+        batch.update({
+            "status": "completed",
+            "output_file_id": output_id,
+            "completed_at": int(time.time()),
+            "request_counts": {"total": len(output), "completed": len(output), "failed": 0}
+        })
+    return batch
@@ -0,0 +1,9 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# The app modules read DATA_ROOT (and create the engine) at import time
+os.environ.setdefault("DATA_ROOT", tempfile.mkdtemp(prefix="frameforge-tests-"))
+os.environ.pop("DATABASE_URL", None)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
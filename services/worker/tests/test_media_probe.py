@@ -0,0 +1,23 @@
+from app.services import media_probe
+
+
+def test_probe_cache_evicts_least_recently_used(monkeypatch):
+    monkeypatch.setattr(media_probe, "PROBE_CACHE_SIZE", 2)
+    monkeypatch.setattr(media_probe, "PROBE_CACHE", media_probe.OrderedDict())
+
+    media_probe._cache_put("a", (1, 1.0, {"duration": 1.0}))
+    media_probe._cache_put("b", (2, 2.0, {"duration": 2.0}))
+    # Hitting "a" twice makes "b" the least recently used entry
+    assert media_probe._cache_get("a") == (1, 1.0, {"duration": 1.0})
+    assert media_probe._cache_get("a") == (1, 1.0, {"duration": 1.0})
+    media_probe._cache_put("c", (3, 3.0, {"duration": 3.0}))
+
+    assert media_probe._cache_get("b") is None
+    assert list(media_probe.PROBE_CACHE) == ["a", "c"]
+
+
+def test_lookup_uses_cache_entry_for_same_size_and_mtime(monkeypatch):
+    monkeypatch.setattr(media_probe, "PROBE_CACHE", media_probe.OrderedDict())
+    media_probe._cache_put("clip.mp4", (10, 5.0, {"duration": 3.5}))
+
+    assert media_probe._lookup(("clip.mp4", 10, 5.0)) == {"duration": 3.5}